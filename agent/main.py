@@ -6,21 +6,41 @@ Polls Redis for incoming signals and processes them using the ReAct Agent.
 This allows the agent to take actions (like notification) based on urgency.
 """
 
+import argparse
 import asyncio
 import json
 import logging
+import multiprocessing
+import signal
 import sys
 import os
+import time
 from typing import Optional
 
 from upstash_redis import Redis
+from upstash_redis.asyncio import Redis as AsyncRedis
 
 # Add src directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
 
 from deepflow_agent.config import get_settings
-from deepflow_agent.agents import process_message, process_message_sync
+from deepflow_agent.agents import (
+    GuardStats,
+    get_circuit_breaker,
+    get_semantic_gateway,
+    process_message,
+    process_message_sync,
+)
 from deepflow_agent.models import TaskSource
+from deepflow_agent.tracer import flush_traces
+from deepflow_agent.worker import (
+    FairScheduler,
+    LeasedSignalQueue,
+    RetryScheduler,
+    WorkerPool,
+    create_fetcher,
+    user_of,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -29,9 +49,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger("deepflow-agent")
 
-async def process_signal(redis: Redis, signal_data: str):
+async def process_signal(signal_data: str):
     """
     Process a single signal from the queue using ReAct Agent.
+    
+    Errors are logged and re-raised so the worker pool can count them
+    and schedule a retry.
     """
     try:
         if isinstance(signal_data, str):
@@ -57,45 +80,234 @@ async def process_signal(redis: Redis, signal_data: str):
         # Here we default to "default_user" if not provided, assuming the user will link this ID.
         user_id = metadata.get("user_id", "default_user")
         
-        # 2. Get User State
+        # 2. User State
         # We need to know if the user is in FLOW to make the right decision.
-        state_key = f"user:{user_id}:state"
-        user_state = redis.get(state_key) or "IDLE"
-
-        logger.info(f"   Context: User={user_id}, State={user_state}")
-
-        # 3. Construct Input for Agent
-        # We frame the signal as a message to the agent.
-        # "System Alert: [Source] Sender says: Content"
-        agent_input = (
-            f"INCOMING SIGNAL detected from {source_str.upper()}.\n"
-            f"Sender: {sender}\n"
-            f"Content: {content}\n\n"
-            f"Determine urgency and take action (notify or queue)."
-        )
+        # process_message looks it up while the conversation history loads.
+
+        # 3. Reply Target
+        # Auto-replies go to metadata.reply_to (Slack channel ID, email
+        # address, Telegram chat ID) if the producer set one, else the sender.
+        reply_to = str(metadata.get("reply_to") or sender)
 
         # 4. Invoke ReAct Agent
+        # The real sender and raw content go through, so planned replies and
+        # alerts address the person who wrote the message.
         # This will auto-execute tools (add_to_queue, send_telegram_notification)
         result = await process_message(
             user_id=user_id,
-            user_state=user_state,
-            message_content=agent_input,
-            sender="System_Signal_Ingestion",
+            user_state=None,
+            message_content=content,
+            sender=sender,
             source=source_str,
             source_id=str(source_id),
+            reply_to=reply_to,
             verbose=True # Helpful for debugging logs
         )
         
-        logger.info(f"🤖 Agent Action Complete.")
+        logger.info(f"🤖 Agent Action Complete. User={user_id}, State={result.get('user_state')}")
+        timings = result.get("timings", {})
+        if timings:
+            logger.info("   Timings: " + " ".join(f"{k}={v}" for k, v in timings.items()))
         if result.get("tool_calls"):
             logger.info(f"   Tools used: {len(result['tool_calls'])}")
         
     except Exception as e:
         logger.error(f"Error processing signal: {e}", exc_info=True)
+        raise
+
+async def handle_signal(scheduler: FairScheduler, signal_data: str):
+    """Process a signal, charging its processing time to the user's fair share."""
+    user_id = user_of(signal_data)
+    started = time.monotonic()
+    try:
+        await process_signal(signal_data)
+    finally:
+        scheduler.finished(user_id, time.monotonic() - started)
+
+async def report_stats(
+    pool: WorkerPool,
+    queue: LeasedSignalQueue,
+    interval: float,
+    noisy_backlog: int = 100,
+):
+    """Periodically log worker pool counters, LLM breaker state, gateway classifier, cascade, batch and cache counters, lane backlogs and per-user shares."""
+    while True:
+        await asyncio.sleep(interval)
+        stats = pool.stats
+        logger.info(
+            f"📊 Signals: in-flight={stats.in_flight} completed={stats.completed} "
+            f"failed={stats.failed} (timed out={stats.timed_out}) users={pool.lane_count}"
+        )
+        settings = get_settings()
+        gateway = get_semantic_gateway(settings.model_for("gateway"), settings.gateway_escalation_model)
+        breaker = get_circuit_breaker().to_dict()
+        guarded = gateway.guard.stats if gateway.guard else GuardStats()
+        logger.info(
+            f"   LLM breaker: state={breaker['state']} state_code={breaker['state_code']} "
+            f"error rate={breaker['error_rate']:.0%} opened={breaker['times_opened']} "
+            f"rejected={breaker['rejected']} | gateway calls={guarded.calls} errors={guarded.errors} "
+            f"timeouts={guarded.timeouts} hedged={guarded.hedged} hedge wins={guarded.hedge_wins}"
+        )
+        if gateway.classifier:
+            local = gateway.classifier.stats
+            logger.info(
+                f"   Gateway classifier: answered={local.confident}/{local.predictions} "
+                f"fallback rate={local.fallback_rate:.0%}"
+            )
+        if gateway.escalation:
+            cascade = gateway.cascade_stats
+            logger.info(
+                f"   Gateway cascade: escalated={cascade.escalated}/{cascade.first_tier} "
+                f"({cascade.escalation_rate:.0%}) failed={cascade.failed}"
+            )
+        if gateway.batcher:
+            batched = gateway.batcher.stats
+            logger.info(
+                f"   Gateway batches: {batched.batches} mean size={batched.mean_batch_size:.1f} "
+                f"fallbacks={batched.fallbacks}"
+            )
+        cache = gateway.cache
+        if cache:
+            cached = cache.stats
+            logger.info(
+                f"   Gateway cache: hit rate={cached.hit_rate:.0%} exact={cached.exact_hits} "
+                f"near={cached.near_hits} misses={cached.misses} errors={cached.errors}"
+            )
+        try:
+            backlog = await queue.backlog()
+        except Exception as e:
+            logger.warning(f"Could not read signal backlog: {e}")
+            continue
+        depths = " ".join(f"{lane}={sum(users.values())}" for lane, users in backlog.items())
+        logger.info(f"   Backlog: {depths}")
+
+        per_user = {}
+        for users in backlog.values():
+            for user_id, depth in users.items():
+                per_user[user_id] = per_user.get(user_id, 0) + depth
+        shares = queue.scheduler.shares()
+        busiest = sorted(set(per_user) | set(shares), key=lambda u: -per_user.get(u, 0))[:5]
+        for user_id in busiest:
+            share = shares.get(user_id)
+            logger.info(
+                f"   User {user_id}: backlog={per_user.get(user_id, 0)} "
+                f"claimed={share.claimed if share else 0} "
+                f"share={share.share if share else 0.0:.0%}"
+            )
+        for user_id, depth in per_user.items():
+            if depth >= noisy_backlog:
+                logger.warning(f"⚠️  User {user_id} has {depth} signals waiting")
+
+async def maintain_leases(queue: LeasedSignalQueue, reap_interval: float):
+    """Keep this worker's lease alive and re-queue signals of dead workers."""
+    renew_interval = queue.visibility_timeout / 3
+    last_reap = 0.0
+    while True:
+        try:
+            await queue.renew()
+            now = time.monotonic()
+            if now - last_reap >= reap_interval:
+                await queue.reap()
+                last_reap = now
+        except Exception as e:
+            logger.error(f"Lease maintenance failed: {e}")
+        await asyncio.sleep(renew_interval)
+
+async def settle_failure(
+    queue: LeasedSignalQueue,
+    retries: RetryScheduler,
+    item: str,
+    error: BaseException,
+) -> str:
+    """
+    Schedule a failed signal's retry (or dead-letter it), then ack it.
+    
+    If the retry cannot be scheduled the signal is re-queued as is, and if
+    that fails too it stays in our processing list, where release() hands
+    it back at shutdown and the reaper does if this worker dies.
+    
+    Returns "retry", "dead", "requeued" or "held".
+    """
+    try:
+        outcome = await asyncio.to_thread(retries.schedule, item, error)
+    except Exception as e:
+        logger.error(f"Could not schedule a retry ({e}), re-queueing the signal")
+        try:
+            await queue.requeue(item)
+        except Exception as e:
+            logger.error(f"Could not re-queue the signal ({e}), leaving it for the reaper")
+            return "held"
+        return "requeued"
+    await queue.ack(item)
+    return outcome
+
+async def promote_retries(
+    retries: RetryScheduler,
+    scheduled: asyncio.Event,
+    max_interval: float = 30.0,
+):
+    """
+    Move failed signals whose backoff has elapsed back onto the queue.
+    
+    Sleeps until the earliest retry is due, capped at `max_interval` (other
+    workers may schedule earlier ones), and wakes early when this worker
+    schedules a retry. An empty retry set costs one ZRANGE per interval.
+    """
+    while True:
+        delay = max_interval
+        scheduled.clear()
+        try:
+            await asyncio.to_thread(retries.promote_due)
+            due = await asyncio.to_thread(retries.next_due)
+            if due is not None:
+                delay = min(max(due - time.time(), 0.0), max_interval)
+        except Exception as e:
+            logger.error(f"Retry promotion failed: {e}")
+        try:
+            await asyncio.wait_for(scheduled.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+def install_stop_handlers(stopping: asyncio.Event):
+    """Turn SIGTERM/SIGINT into a graceful stop request for the running loop."""
+    loop = asyncio.get_running_loop()
+
+    def request_stop(signum: int):
+        if stopping.is_set():
+            logger.info("Already draining, shutdown is bounded by WORKER_SHUTDOWN_TIMEOUT")
+            return
+        logger.info(f"🛑 Received {signal.Signals(signum).name}, draining...")
+        stopping.set()
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, request_stop, signum)
+        except (NotImplementedError, RuntimeError):
+            # Windows, or not the main thread: KeyboardInterrupt still works
+            pass
+
+async def until_stopped(awaitable, stopping: asyncio.Event):
+    """Await `awaitable` unless a stop is requested first (then cancel it, return None)."""
+    task = asyncio.ensure_future(awaitable)
+    stop = asyncio.ensure_future(stopping.wait())
+    done, _ = await asyncio.wait({task, stop}, return_when=asyncio.FIRST_COMPLETED)
+    stop.cancel()
+    if task in done:
+        return task.result()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return None
 
 async def worker_loop():
     """
     Main worker loop.
+    
+    Signals are claimed under a lease (see LeasedSignalQueue), so any number
+    of these loops can run side by side, in one supervisor or as replicas.
+    
+    On SIGTERM/SIGINT the loop stops claiming, lets in-flight signals finish
+    for up to WORKER_SHUTDOWN_TIMEOUT seconds, hands anything unfinished
+    back to the queue and flushes traces, so rolling deploys lose nothing.
     """
     settings = get_settings()
     
@@ -114,32 +326,179 @@ async def worker_loop():
             url=settings.upstash_redis_rest_url,
             token=settings.upstash_redis_rest_token
         )
+        # Lease, claim and ack calls run on the event loop, so they use the async client
+        async_redis = AsyncRedis(
+            url=settings.upstash_redis_rest_url,
+            token=settings.upstash_redis_rest_token
+        )
     except Exception as e:
         logger.error(f"Failed to connect to Redis: {e}")
         return
 
-    queue_key = "deepflow:signals:pending"
-    logger.info(f"👀 Watching queue: {queue_key}")
+    scheduler = FairScheduler(
+        weights=settings.worker_user_weights_map,
+        max_in_flight=settings.worker_user_max_in_flight,
+    )
+    queue = LeasedSignalQueue(
+        async_redis,
+        visibility_timeout=settings.worker_visibility_timeout,
+        scheduler=scheduler,
+    )
+    await queue.register()
+    logger.info(f"👀 Watching queue: {queue.PENDING_KEY} as worker {queue.worker_id}")
     
-    while True:
-        try:
-            # Poll Redis (LPOP)
-            item = redis.lpop(queue_key)
-            
-            if item:
-                await process_signal(redis, item)
-            else:
-                await asyncio.sleep(1)
+    fetcher = create_fetcher(queue, settings)
+    logger.info(f"   Fetch: {type(fetcher).__name__}")
+    
+    retries = RetryScheduler(
+        redis,
+        max_attempts=settings.worker_max_attempts,
+        base_delay=settings.worker_retry_base_delay,
+        max_delay=settings.worker_retry_max_delay,
+    )
+    
+    retry_scheduled = asyncio.Event()
+    
+    async def on_failure(item: str, error: BaseException):
+        if await settle_failure(queue, retries, item, error) == "retry":
+            retry_scheduled.set()
+    
+    # Signals are mostly network-bound, keep several in flight at once
+    pool = WorkerPool(
+        lambda item: handle_signal(scheduler, item),
+        concurrency=settings.worker_concurrency,
+        timeout=settings.worker_signal_timeout,
+        on_complete=queue.ack,
+        on_failure=on_failure,
+    )
+    logger.info(f"   Concurrency: {pool.concurrency}, timeout: {pool.timeout}s")
+    reporter = asyncio.create_task(
+        report_stats(
+            pool, queue, settings.worker_stats_interval, settings.worker_noisy_user_backlog
+        )
+    )
+    leases = asyncio.create_task(maintain_leases(queue, settings.worker_reap_interval))
+    promoter = asyncio.create_task(
+        promote_retries(retries, retry_scheduled, settings.worker_retry_check_interval)
+    )
+    
+    stopping = asyncio.Event()
+    install_stop_handlers(stopping)
+    
+    try:
+        while not stopping.is_set():
+            try:
+                # Only take a signal once the pool can accept it
+                await until_stopped(pool.wait_for_capacity(), stopping)
+                if stopping.is_set():
+                    break
+                
+                # Claim under lease (into our processing list). Blocks or
+                # backs off while the queue is empty, None means "try again".
+                item = await until_stopped(fetcher.fetch(), stopping)
                 
+                if item:
+                    # Same user: arrival order. Different users: in parallel.
+                    await pool.submit(item, key=user_of(item))
+                    
+            except Exception as e:
+                logger.error(f"Worker loop encountered error: {e}")
+                await until_stopped(asyncio.sleep(5), stopping)
+    finally:
+        promoter.cancel()
+        
+        # Let in-flight signals finish; the lease stays renewed meanwhile
+        timeout = settings.worker_shutdown_timeout
+        logger.info(f"⏳ Waiting up to {timeout:.0f}s for {pool.in_flight} in-flight signal(s)")
+        try:
+            cancelled = await pool.shutdown(timeout)
+            if cancelled:
+                logger.warning(f"Cancelled {cancelled} signal(s) still running at the deadline")
+        except asyncio.CancelledError:
+            logger.warning("Drain interrupted, returning signals to the queue")
+        
+        # Batch calls left behind by cancelled signals
+        gateway = get_semantic_gateway(settings.model_for("gateway"), settings.gateway_escalation_model)
+        if gateway.batcher:
+            await gateway.batcher.close(timeout=0)
+        
+        reporter.cancel()
+        leases.cancel()
+        # Unfinished signals go back to the front of the queue
+        try:
+            released = await queue.release()
+            if released:
+                logger.info(f"↩️  Returned {released} unfinished signal(s) to the queue")
         except Exception as e:
-            logger.error(f"Worker loop encountered error: {e}")
-            await asyncio.sleep(5)
+            logger.error(f"Could not release signals, the reaper will re-queue them: {e}")
+        await async_redis.close()
+        flush_traces()
+        logger.info("👋 Worker stopped")
 
-def main():
+def run_worker():
+    """Run one worker process until interrupted."""
     try:
         asyncio.run(worker_loop())
     except KeyboardInterrupt:
         logger.info("👋 Agent shutting down...")
 
+def supervise(processes: int, shutdown_timeout: float):
+    """
+    Run `processes` worker processes, restarting any that die.
+    
+    On SIGTERM/SIGINT the workers are asked to drain (SIGTERM) and are
+    killed if they are still running a few seconds after their deadline.
+    """
+    logger.info(f"🧭 Supervisor starting {processes} worker processes")
+    workers = {}
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    while not stopping:
+        for slot in range(processes):
+            proc = workers.get(slot)
+            if proc is not None and proc.is_alive():
+                continue
+            if proc is not None:
+                logger.warning(f"Worker {slot} exited with code {proc.exitcode}, restarting")
+            proc = multiprocessing.Process(target=run_worker, name=f"deepflow-worker-{slot}")
+            proc.start()
+            workers[slot] = proc
+        time.sleep(1)
+
+    logger.info("👋 Supervisor shutting down, draining workers...")
+    for proc in workers.values():
+        if proc.is_alive():
+            proc.terminate()
+    deadline = time.monotonic() + shutdown_timeout + 5
+    for proc in workers.values():
+        proc.join(max(0.0, deadline - time.monotonic()))
+        if proc.is_alive():
+            logger.warning(f"{proc.name} did not stop in time, killing it")
+            proc.kill()
+            proc.join()
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="DeepFlow Sentinel Agent worker")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.worker_processes,
+        help="Number of worker processes (default: WORKER_PROCESSES)",
+    )
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        supervise(args.workers, settings.worker_shutdown_timeout)
+    else:
+        run_worker()
+
 if __name__ == "__main__":
     main()
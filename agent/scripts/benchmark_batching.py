@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Benchmark Gateway Micro-batching
+
+Simulates a backlog: every golden case is submitted to the semantic
+gateway at once (as the worker pool does when signals pile up) and the
+run is repeated for each batch size. Reports drain time, LLM input and
+output tokens, and category accuracy, so the savings can be weighed
+against any accuracy change.
+
+The gateway cache, classifier and keyword pre-routing are off, so every
+message reaches the LLM.
+
+Usage:
+    python scripts/benchmark_batching.py [--batch-size 1 --batch-size 8] [--wait-ms 20] [--concurrency 20]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).parent.parent / ".env")
+
+from langchain_core.callbacks import get_usage_metadata_callback
+
+from deepflow_agent.agents import SemanticGatewayAgent, get_chat_model
+from deepflow_agent.config import get_settings
+from deepflow_agent.models import SemanticGatewayInput
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures"
+DATASETS = [FIXTURES / "golden_dataset.json", FIXTURES / "golden_dataset_extended.json"]
+
+
+def load_cases() -> list:
+    cases = []
+    for path in DATASETS:
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                cases.extend(json.load(f))
+    return cases
+
+
+async def drain(cases: list, batch_size: int, wait_ms: float, concurrency: int) -> dict:
+    """Analyze every case with at most `concurrency` in flight; time and count tokens."""
+    settings = get_settings()
+    gateway = SemanticGatewayAgent(
+        get_chat_model(settings.llm_model, settings.llm_temperature),
+        batch_size=batch_size,
+        batch_wait_ms=wait_ms,
+    )
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(case):
+        data = case["input"]
+        async with slots:
+            try:
+                return await gateway.analyze(SemanticGatewayInput(
+                    content=data["content"],
+                    sender=data["sender"],
+                    user_state=data.get("user_state", "IDLE"),
+                ))
+            except Exception as e:
+                return e
+
+    with get_usage_metadata_callback() as usage:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one(case) for case in cases))
+        elapsed = time.perf_counter() - started
+
+    ok = [(case, result) for case, result in zip(cases, results) if not isinstance(result, Exception)]
+    tokens = {"input": 0, "output": 0}
+    for counts in usage.usage_metadata.values():
+        tokens["input"] += counts.get("input_tokens", 0)
+        tokens["output"] += counts.get("output_tokens", 0)
+    return {
+        "batch_size": batch_size,
+        "messages": len(cases),
+        "errors": len(cases) - len(ok),
+        "drain_s": round(elapsed, 2),
+        "input_tokens": tokens["input"],
+        "output_tokens": tokens["output"],
+        "category_accuracy": sum(r.category == c["expected"]["category"] for c, r in ok) / len(ok) if ok else 0.0,
+        "batches": gateway.batcher.stats.to_dict() if gateway.batcher else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark semantic gateway micro-batching")
+    parser.add_argument("--batch-size", type=int, action="append", help="Repeat to compare sizes (default: 1 and 8)")
+    parser.add_argument("--wait-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=get_settings().worker_concurrency)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    cases = load_cases()
+    print(f"📁 Loaded {len(cases)} test cases, model {get_settings().llm_model}")
+
+    results = []
+    for size in args.batch_size or [1, 8]:
+        result = asyncio.run(drain(cases, size, args.wait_ms, args.concurrency))
+        results.append(result)
+        print(
+            f"   batch={size:<3} drain={result['drain_s']:>7.2f}s  input tokens={result['input_tokens']:>7}  "
+            f"output tokens={result['output_tokens']:>6}  accuracy={result['category_accuracy']:.2%}  "
+            f"errors={result['errors']}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Inspect and replay dead-lettered signals.
+
+Usage:
+    python scripts/dead_letters.py stats
+    python scripts/dead_letters.py list [--start 0] [--count 20]
+    python scripts/dead_letters.py replay [--limit N]
+    python scripts/dead_letters.py purge --yes
+"""
+import argparse
+import json
+import os
+import sys
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from upstash_redis import Redis
+
+from deepflow_agent.config import get_settings
+from deepflow_agent.worker import RetryScheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the DeepFlow signal dead-letter queue")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="Show retry and dead-letter counts")
+
+    list_cmd = commands.add_parser("list", help="Print dead-lettered signals")
+    list_cmd.add_argument("--start", type=int, default=0)
+    list_cmd.add_argument("--count", type=int, default=20)
+
+    replay_cmd = commands.add_parser("replay", help="Re-queue dead-lettered signals")
+    replay_cmd.add_argument("--limit", type=int, default=None, help="Replay at most N (default: all)")
+
+    purge_cmd = commands.add_parser("purge", help="Delete all dead-lettered signals")
+    purge_cmd.add_argument("--yes", action="store_true", help="Confirm deletion")
+
+    args = parser.parse_args()
+
+    settings = get_settings()
+    if not settings.is_redis_configured:
+        print("Error: UPSTASH_REDIS_REST_URL and UPSTASH_REDIS_REST_TOKEN must be set in .env")
+        sys.exit(1)
+
+    redis = Redis(url=settings.upstash_redis_rest_url, token=settings.upstash_redis_rest_token)
+    retries = RetryScheduler(redis)
+
+    if args.command == "stats":
+        print(f"Waiting for retry: {retries.retry_count()}")
+        print(f"Dead-lettered:     {retries.dead_letter_count()}")
+
+    elif args.command == "list":
+        for index, signal in enumerate(retries.dead_letters(args.start, args.count), start=args.start):
+            retry = signal.get("retry", {})
+            print(
+                f"[{index}] {signal.get('source', '?')}:{signal.get('source_id', '?')} "
+                f"attempts={retry.get('attempts')} failed_at={retry.get('failed_at')}"
+            )
+            print(f"     error: {retry.get('last_error')}")
+            print(f"     {json.dumps(signal.get('content', ''))[:120]}")
+
+    elif args.command == "replay":
+        replayed = retries.replay_dead_letters(limit=args.limit)
+        print(f"Replayed {replayed} signal(s) onto their intake lanes")
+
+    elif args.command == "purge":
+        if not args.yes:
+            print("Refusing to purge without --yes")
+            sys.exit(1)
+        print(f"Purged {retries.purge_dead_letters()} signal(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+"""
+Evaluate the Gateway Model Cascade
+
+Runs the golden datasets through the semantic gateway three ways:
+- small:   the first-tier model alone
+- large:   the escalation model alone
+- cascade: small first, borderline answers re-analyzed by the large model
+
+and reports accuracy, escalation rate, latency, tokens and cost for each.
+Cost uses per-million-token prices (PRICES, or --price MODEL=IN,OUT);
+models without a price are reported with tokens only.
+
+The gateway cache, classifier and keyword rules are off, so every
+message reaches the LLM.
+
+Usage:
+    python scripts/evaluate_cascade.py --small gpt-4o-mini --large gpt-4-turbo [--dataset all] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).parent.parent / ".env")
+
+from langchain_core.callbacks import get_usage_metadata_callback
+
+from deepflow_agent.agents import SemanticGatewayAgent, get_chat_model
+from deepflow_agent.config import get_settings
+from deepflow_agent.models import SemanticGatewayInput
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures"
+DATASETS = {
+    "original": FIXTURES / "golden_dataset.json",
+    "extended": FIXTURES / "golden_dataset_extended.json",
+}
+
+# USD per million input / output tokens; matched by model-name prefix
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+
+def load_cases(name: str) -> list:
+    cases = []
+    for dataset, path in DATASETS.items():
+        if name in (dataset, "all") and path.exists():
+            with open(path, encoding="utf-8") as f:
+                cases.extend(json.load(f))
+    return cases
+
+
+def price_for(model: str, prices: dict):
+    """Longest price-table prefix of a (possibly dated) model name."""
+    matches = [name for name in prices if model.startswith(name)]
+    return prices[max(matches, key=len)] if matches else None
+
+
+def build_gateway(mode: str, small: str, large: str) -> SemanticGatewayAgent:
+    settings = get_settings()
+    temperature = settings.llm_temperature
+    if mode == "small":
+        return SemanticGatewayAgent(get_chat_model(small, temperature))
+    if mode == "large":
+        return SemanticGatewayAgent(get_chat_model(large, temperature))
+    return SemanticGatewayAgent(
+        get_chat_model(small, temperature),
+        escalation=SemanticGatewayAgent(get_chat_model(large, temperature)),
+        escalation_urgency=(settings.gateway_escalation_min_urgency, settings.gateway_escalation_max_urgency),
+        escalation_confidence=settings.gateway_escalation_confidence,
+    )
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_mode(mode: str, cases: list, small: str, large: str, prices: dict) -> dict:
+    """Analyze every case one after another, so latencies are per message."""
+    gateway = build_gateway(mode, small, large)
+    records = []
+    with get_usage_metadata_callback() as usage:
+        for case in cases:
+            data = case["input"]
+            started = time.perf_counter()
+            record = {"id": case["id"], "expected_urgency": case["expected"]["urgency_score"],
+                      "expected_category": case["expected"]["category"]}
+            try:
+                output = await gateway.analyze(SemanticGatewayInput(
+                    content=data["content"],
+                    sender=data["sender"],
+                    user_state=data.get("user_state", "IDLE"),
+                ))
+                record.update(urgency_score=output.urgency_score, category=output.category)
+            except Exception as e:
+                record["error"] = str(e)
+            record["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            records.append(record)
+
+    ok = [r for r in records if "error" not in r]
+    latencies = [r["latency_ms"] for r in ok]
+    tokens, cost, priced = {}, 0.0, True
+    for model, counts in usage.usage_metadata.items():
+        tokens[model] = {"input": counts.get("input_tokens", 0), "output": counts.get("output_tokens", 0)}
+        price = price_for(model, prices)
+        if price is None:
+            priced = False
+        else:
+            cost += (tokens[model]["input"] * price[0] + tokens[model]["output"] * price[1]) / 1e6
+
+    return {
+        "metrics": {
+            "total": len(records),
+            "errors": len(records) - len(ok),
+            "category_accuracy": sum(r["category"] == r["expected_category"] for r in ok) / len(ok) if ok else 0.0,
+            "urgency_accuracy": 1 - sum(abs(r["urgency_score"] - r["expected_urgency"]) for r in ok) / (len(ok) * 10) if ok else 0.0,
+            "escalation_rate": gateway.cascade_stats.escalation_rate if gateway.escalation else None,
+            "latency_mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+            "latency_p95_ms": percentile(latencies, 95) if latencies else 0.0,
+            "input_tokens": sum(t["input"] for t in tokens.values()),
+            "output_tokens": sum(t["output"] for t in tokens.values()),
+            "cost_usd": round(cost, 4) if priced else None,
+        },
+        "tokens_by_model": tokens,
+        "cases": records,
+    }
+
+
+def print_report(results: dict) -> None:
+    print("\n" + "=" * 72)
+    print(f"{'metric':<20}" + "".join(f"{mode:>16}" for mode in results))
+    print("=" * 72)
+    for metric in next(iter(results.values()))["metrics"]:
+        row = f"{metric:<20}"
+        for result in results.values():
+            value = result["metrics"][metric]
+            if value is None:
+                row += f"{'n/a':>16}"
+            elif "accuracy" in metric or metric.endswith("_rate"):
+                row += f"{value:>16.2%}"
+            elif isinstance(value, float):
+                row += f"{value:>16.4f}" if metric == "cost_usd" else f"{value:>16.1f}"
+            else:
+                row += f"{value:>16}"
+        print(row)
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Compare small, large and cascaded gateway models")
+    parser.add_argument("--small", default=settings.model_for("gateway"), help="First-tier model")
+    parser.add_argument("--large", default=settings.gateway_escalation_model or settings.llm_model, help="Escalation model")
+    parser.add_argument("--dataset", choices=["original", "extended", "all"], default="all")
+    parser.add_argument("--mode", choices=["small", "large", "cascade"], action="append", help="Repeat to pick modes (default: all)")
+    parser.add_argument("--price", action="append", default=[], metavar="MODEL=IN,OUT", help="USD per million tokens")
+    parser.add_argument("--output", type=Path, help="Write per-case results as JSON")
+    args = parser.parse_args()
+
+    prices = dict(PRICES)
+    for entry in args.price:
+        model, _, values = entry.partition("=")
+        prices[model] = tuple(float(v) for v in values.split(","))
+
+    cases = load_cases(args.dataset)
+    print(f"📁 Loaded {len(cases)} test cases: small={args.small} large={args.large}")
+
+    results = {}
+    for mode in args.mode or ["small", "large", "cascade"]:
+        print(f"   running {mode}...")
+        results[mode] = asyncio.run(run_mode(mode, cases, args.small, args.large, prices))
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
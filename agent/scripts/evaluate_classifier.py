@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Evaluate the Local Urgency Classifier
+
+Measures the classifier as the gateway's first tier:
+- accuracy of its confident answers (category and urgency score)
+- fallback rate, i.e. the share of messages still sent to the LLM
+- per-message prediction latency and artifact load time
+
+With --folds K (default) the golden data is split K ways and every case
+is predicted by a model trained without it. With --model an existing
+artifact is evaluated as-is, e.g. on fresh labels via --data.
+
+Usage:
+    python scripts/evaluate_classifier.py [--folds 5] [--model urgency_classifier.json] [--data labels.jsonl]
+"""
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+
+from deepflow_agent.agents.planner import category_for_score
+from deepflow_agent.agents.urgency_classifier import UrgencyClassifier, load_examples, train_classifier
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures"
+GOLDEN = [FIXTURES / "golden_dataset.json", FIXTURES / "golden_dataset_extended.json"]
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9, 0.95]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def timed_predictions(model: UrgencyClassifier, examples: list) -> list:
+    """(prediction, expected score, latency µs) per example."""
+    records = []
+    for content, sender, score in examples:
+        started = time.perf_counter()
+        prediction = model.predict(content, sender)
+        records.append((prediction, score, (time.perf_counter() - started) * 1e6))
+    return records
+
+
+def cross_validated(examples: list, folds: int, epochs: int) -> list:
+    """Predict every example with a model that did not see it."""
+    shuffled = examples[:]
+    random.Random(7).shuffle(shuffled)
+    records = []
+    for fold in range(folds):
+        test = shuffled[fold::folds]
+        train = [e for i, e in enumerate(shuffled) if i % folds != fold]
+        records += timed_predictions(train_classifier(train, epochs=epochs), test)
+        print(f"   fold {fold + 1}/{folds}: {len(train)} train / {len(test)} test")
+    return records
+
+
+def summarize(records: list, threshold: float) -> dict:
+    """Tiered metrics at one confidence threshold."""
+    answered = [(p, score) for p, score, _ in records if p.confidence >= threshold]
+    return {
+        "threshold": threshold,
+        "fallback_rate": 1 - len(answered) / len(records),
+        "category_accuracy": sum(p.category == category_for_score(s) for p, s in answered) / len(answered) if answered else None,
+        "urgency_accuracy": 1 - sum(abs(p.urgency_score - s) for p, s in answered) / (len(answered) * 10) if answered else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local urgency classifier")
+    parser.add_argument("--model", type=Path, help="Evaluate this artifact instead of cross-validating")
+    parser.add_argument("--data", type=Path, action="append", help="Golden-format JSON/JSONL files (default: golden datasets)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--output", type=Path, help="Write the metrics as JSON")
+    args = parser.parse_args()
+
+    examples = load_examples(args.data or [p for p in GOLDEN if p.exists()])
+    print(f"📁 Loaded {len(examples)} examples")
+
+    load_ms = None
+    if args.model:
+        started = time.perf_counter()
+        model = UrgencyClassifier.load(args.model)
+        load_ms = (time.perf_counter() - started) * 1000
+        records = timed_predictions(model, examples)
+    else:
+        records = cross_validated(examples, args.folds, args.epochs)
+
+    latencies = [us for _, _, us in records]
+    overall = sum(p.category == category_for_score(s) for p, s, _ in records) / len(records)
+    sweep = [summarize(records, t) for t in THRESHOLDS]
+
+    print("\n" + "=" * 64)
+    print(f"category accuracy (all answers)  {overall:.2%}")
+    print(f"latency p50 / p95                {percentile(latencies, 50):.0f} / {percentile(latencies, 95):.0f} µs")
+    if load_ms is not None:
+        print(f"artifact load                    {load_ms:.1f} ms")
+    print("=" * 64)
+    print(f"{'confidence >=':<16}{'fallback':>12}{'category acc':>16}{'urgency acc':>16}")
+    for row in sweep:
+        category = f"{row['category_accuracy']:.2%}" if row["category_accuracy"] is not None else "n/a"
+        urgency = f"{row['urgency_accuracy']:.2%}" if row["urgency_accuracy"] is not None else "n/a"
+        print(f"{row['threshold']:<16}{row['fallback_rate']:>12.2%}{category:>16}{urgency:>16}")
+
+    if args.output:
+        metrics = {
+            "examples": len(records),
+            "category_accuracy": overall,
+            "latency_p50_us": percentile(latencies, 50),
+            "latency_p95_us": percentile(latencies, 95),
+            "load_ms": load_ms,
+            "thresholds": sweep,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(metrics, f, indent=2)
+        print(f"\n💾 Metrics written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+"""
+Compare Agent Modes
+
+Runs the two-phase path (semantic gateway, then rule planner or ReAct
+agent) and the single-call structured mode against the golden datasets
+and reports accuracy and latency for each.
+
+Tools are not executed: the ReAct agent gets recording stand-ins with
+the same names and schemas, and planned actions are only collected.
+
+Each case is routed like an ingested signal: the real sender and raw
+content, with the auto-reply target from the case's "reply_to" (the
+sender if unset). reply_routing_accuracy is the share of cases with an
+auto-reply whose every reply went to that target.
+
+Usage:
+    python scripts/evaluate_modes.py [--dataset original|extended|all] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).parent.parent / ".env")
+
+from langchain.agents import create_agent
+from langchain_core.tools import StructuredTool
+
+from deepflow_agent import tools as deepflow_tools
+from deepflow_agent.agents import get_chat_model, get_semantic_gateway, get_structured_agent, plan_actions, to_plan
+from deepflow_agent.agents.react_agent import AGENT_SYSTEM_PROMPT
+from deepflow_agent.config import get_settings
+from deepflow_agent.models import SemanticGatewayInput
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures"
+DATASETS = {
+    "original": FIXTURES / "golden_dataset.json",
+    "extended": FIXTURES / "golden_dataset_extended.json",
+}
+AGENT_TOOLS = [
+    "add_to_queue",
+    "send_auto_reply",
+    "update_task_status",
+    "notify_user_tool",
+    "send_telegram_notification",
+    "send_browser_notification",
+]
+
+
+def load_cases(name: str) -> list:
+    """Load the selected golden dataset(s)."""
+    cases = []
+    for dataset, path in DATASETS.items():
+        if name in (dataset, "all") and path.exists():
+            with open(path, encoding="utf-8") as f:
+                cases.extend(json.load(f))
+    return cases
+
+
+def dry_run_agent(model: str, user_state: str):
+    """ReAct agent whose tools only acknowledge the call."""
+    def stand_in(tool):
+        return StructuredTool.from_function(
+            func=lambda **kwargs: {"success": True, "dry_run": True},
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+        )
+
+    return create_agent(
+        get_chat_model(model, 0.0),
+        [stand_in(getattr(deepflow_tools, name)) for name in AGENT_TOOLS],
+        system_prompt=AGENT_SYSTEM_PROMPT.format(user_state=user_state),
+    )
+
+
+def reply_target(data: dict) -> str:
+    """Where the case's auto-replies should go, as process_signal resolves it."""
+    return data.get("reply_to") or data["sender"]
+
+
+def reply_recipients(calls: list) -> list:
+    """Recipients of the send_auto_reply calls among (name, args) pairs."""
+    return [args.get("recipient") for name, args in calls if name == "send_auto_reply"]
+
+
+async def run_two_phase(case: dict, model: str) -> dict:
+    """Gateway analysis, then the rule plan or (for ambiguous cases) the ReAct agent."""
+    data = case["input"]
+    user_state = data.get("user_state", "IDLE")
+    source = data.get("source", "manual")
+
+    analysis = await get_semantic_gateway(model).analyze(SemanticGatewayInput(
+        content=data["content"],
+        sender=data["sender"],
+        user_state=user_state,
+    ))
+    plan = plan_actions(
+        analysis,
+        user_id="eval-user",
+        user_state=user_state,
+        sender=data["sender"],
+        source=source,
+        source_id=case["id"],
+        content=data["content"],
+        reply_to=reply_target(data),
+    )
+    if plan is not None:
+        calls, llm_calls = [(a.tool, a.args) for a in plan.actions], 1
+    else:
+        result = await dry_run_agent(model, user_state).ainvoke({"messages": [{
+            "role": "user",
+            "content": f"New message received:\nFrom: {data['sender']}\nReply To: {reply_target(data)}\n"
+                       f"Source: {source}\n"
+                       f"Content: {data['content']}\n\nUser ID: eval-user\nUser State: {user_state}\n\n"
+                       f"**Semantic Analysis**:\n- Urgency Score: {analysis.urgency_score}/10\n"
+                       f"- Category: {analysis.category}\n- Summary: {analysis.summary}\n\n"
+                       "Based on this analysis and the User State, execute the appropriate tool actions.",
+        }]})
+        ai_messages = [m for m in result["messages"] if m.type == "ai"]
+        calls = [(call["name"], call["args"]) for m in ai_messages for call in m.tool_calls]
+        llm_calls = 1 + len(ai_messages)
+
+    return {
+        "urgency_score": analysis.urgency_score,
+        "category": analysis.category,
+        "tools": [name for name, _ in calls],
+        "reply_recipients": reply_recipients(calls),
+        "expected_recipient": reply_target(data),
+        "llm_calls": llm_calls,
+    }
+
+
+async def run_single_call(case: dict, model: str) -> dict:
+    """One structured call returning the analysis and the actions."""
+    data = case["input"]
+    user_state = data.get("user_state", "IDLE")
+    source = data.get("source", "manual")
+
+    decision = await get_structured_agent(model).decide(SemanticGatewayInput(
+        content=data["content"],
+        sender=data["sender"],
+        user_state=user_state,
+    ), source=source)
+    plan = to_plan(
+        decision,
+        user_id="eval-user",
+        user_state=user_state,
+        sender=data["sender"],
+        source=source,
+        source_id=case["id"],
+        content=data["content"],
+        reply_to=reply_target(data),
+    )
+    calls = [(a.tool, a.args) for a in plan.actions]
+    return {
+        "urgency_score": decision.urgency_score,
+        "category": decision.category,
+        "tools": [name for name, _ in calls],
+        "reply_recipients": reply_recipients(calls),
+        "expected_recipient": reply_target(data),
+        "llm_calls": 1,
+    }
+
+
+MODES = {
+    "two_phase": run_two_phase,
+    "single_call": run_single_call,
+}
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(records: list) -> dict:
+    """Accuracy and latency metrics for one mode."""
+    ok = [r for r in records if "error" not in r]
+    with_tools = [r for r in ok if "expected_tools" in r]
+    with_replies = [r for r in ok if r["reply_recipients"]]
+    latencies = [r["latency_ms"] for r in ok]
+    return {
+        "total": len(records),
+        "errors": len(records) - len(ok),
+        "urgency_accuracy": 1 - sum(abs(r["urgency_score"] - r["expected_urgency"]) for r in ok) / (len(ok) * 10) if ok else 0.0,
+        "category_accuracy": sum(r["category"] == r["expected_category"] for r in ok) / len(ok) if ok else 0.0,
+        "tool_accuracy": sum(set(r["tools"]) == set(r["expected_tools"]) for r in with_tools) / len(with_tools) if with_tools else None,
+        "tool_cases": len(with_tools),
+        "reply_routing_accuracy": (
+            sum(all(to == r["expected_recipient"] for to in r["reply_recipients"]) for r in with_replies) / len(with_replies)
+            if with_replies else None
+        ),
+        "reply_cases": len(with_replies),
+        "avg_llm_calls": statistics.fmean(r["llm_calls"] for r in ok) if ok else 0.0,
+        "latency_mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+        "latency_p50_ms": percentile(latencies, 50) if latencies else 0.0,
+        "latency_p95_ms": percentile(latencies, 95) if latencies else 0.0,
+    }
+
+
+async def evaluate(dataset: str, modes: list) -> dict:
+    """Run every case through every mode, sequentially so latencies are comparable."""
+    model = get_settings().llm_model
+    cases = load_cases(dataset)
+    print(f"📁 Loaded {len(cases)} test cases, model {model}")
+
+    records = {mode: [] for mode in modes}
+    for case in cases:
+        expected = case["expected"]
+        for mode in modes:
+            record = {
+                "id": case["id"],
+                "expected_urgency": expected["urgency_score"],
+                "expected_category": expected["category"],
+            }
+            if "expected_tools" in expected:
+                record["expected_tools"] = expected["expected_tools"]
+
+            started = time.perf_counter()
+            try:
+                record.update(await MODES[mode](case, model))
+            except Exception as e:
+                record["error"] = str(e)
+            record["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            records[mode].append(record)
+
+            status = record.get("error") or f"urgency={record['urgency_score']} category={record['category']} tools={record['tools']}"
+            print(f"   {case['id']:<24} {mode:<12} {record['latency_ms']:>8.0f}ms  {status}")
+
+    return {mode: {"metrics": summarize(records[mode]), "cases": records[mode]} for mode in modes}
+
+
+def print_report(results: dict) -> None:
+    print("\n" + "=" * 72)
+    print(f"{'metric':<20}" + "".join(f"{mode:>18}" for mode in results))
+    print("=" * 72)
+    for metric in next(iter(results.values()))["metrics"]:
+        row = f"{metric:<20}"
+        for result in results.values():
+            value = result["metrics"][metric]
+            if value is None:
+                row += f"{'n/a':>18}"
+            elif "accuracy" in metric:
+                row += f"{value:>18.2%}"
+            elif isinstance(value, float):
+                row += f"{value:>18.1f}"
+            else:
+                row += f"{value:>18}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two-phase and single-call agent modes")
+    parser.add_argument("--dataset", choices=["original", "extended", "all"], default="all")
+    parser.add_argument("--mode", choices=list(MODES), action="append", help="Repeat to pick modes (default: all)")
+    parser.add_argument("--output", type=Path, help="Write per-case results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(evaluate(args.dataset, args.mode or list(MODES)))
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
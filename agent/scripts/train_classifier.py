@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Train the Local Urgency Classifier
+
+Fits the hashed n-gram logistic regression used as the gateway's first
+tier and writes the JSON artifact that gateway_classifier_path points to.
+
+Training data:
+- the golden datasets (tests/fixtures)
+- optional JSONL label files in the golden case shape
+- optionally the gateway's label log in Redis (gateway_label_log_size),
+  i.e. the LLM's own analyses of production traffic
+
+Usage:
+    python scripts/train_classifier.py [--labels labels.jsonl] [--from-redis 5000] [--output urgency_classifier.json]
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).parent.parent / ".env")
+
+from deepflow_agent.agents.planner import category_for_score
+from deepflow_agent.agents.urgency_classifier import (
+    LABEL_LOG_KEY,
+    example_from_case,
+    load_examples,
+    train_classifier,
+)
+from deepflow_agent.config import get_settings
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures"
+GOLDEN = [FIXTURES / "golden_dataset.json", FIXTURES / "golden_dataset_extended.json"]
+
+
+def redis_examples(count: int) -> list:
+    """The newest `count` labels from the gateway's label log."""
+    from deepflow_agent.tools.base import get_redis_client
+    return [example_from_case(json.loads(raw)) for raw in get_redis_client().lrange(LABEL_LOG_KEY, 0, count - 1)]
+
+
+def holdout_report(examples: list, fraction: float, epochs: int, threshold: float) -> float:
+    """Train on part of the data and report on the rest; returns the share answered locally."""
+    shuffled = examples[:]
+    random.Random(7).shuffle(shuffled)
+    split = max(1, int(len(shuffled) * fraction))
+    test, train = shuffled[:split], shuffled[split:]
+
+    model = train_classifier(train, epochs=epochs)
+    predictions = [(model.predict(content, sender), score) for content, sender, score in test]
+    correct = sum(p.category == category_for_score(score) for p, score in predictions)
+    answered = [(p, score) for p, score in predictions if p.confidence >= threshold]
+    answered_correct = sum(p.category == category_for_score(score) for p, score in answered)
+
+    print(f"🧪 Holdout ({len(test)} of {len(examples)}):")
+    print(f"   category accuracy      {correct / len(test):.2%}")
+    print(f"   answered locally       {len(answered) / len(test):.2%} (confidence >= {threshold})")
+    if answered:
+        print(f"   accuracy when answered {answered_correct / len(answered):.2%}")
+    return len(answered) / len(test)
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Train the local urgency classifier")
+    parser.add_argument("--data", type=Path, action="append", help="Golden-format JSON/JSONL files (default: golden datasets)")
+    parser.add_argument("--labels", type=Path, action="append", default=[], help="Extra JSONL label files")
+    parser.add_argument("--from-redis", type=int, default=0, metavar="N", help="Also use the newest N logged gateway labels")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction held out for the report (0 = skip)")
+    parser.add_argument("--output", type=Path, default=Path("urgency_classifier.json"))
+    args = parser.parse_args()
+
+    examples = load_examples((args.data or [p for p in GOLDEN if p.exists()]) + args.labels)
+    if args.from_redis:
+        examples += redis_examples(args.from_redis)
+    print(f"📁 Loaded {len(examples)} examples")
+
+    if args.holdout and len(examples) >= 10:
+        answered = holdout_report(examples, args.holdout, args.epochs, settings.gateway_classifier_confidence)
+        if not answered:
+            print("⚠️  Nothing answered locally: enabling this model would only add latency, collect more labels first")
+
+    model = train_classifier(examples, epochs=args.epochs)
+    model.save(args.output)
+    print(
+        f"💾 Wrote {args.output} ({args.output.stat().st_size / 1024:.0f} KiB, "
+        f"{len(model.weights)} buckets, trained in {model.metadata['train_seconds']}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,81 @@
 """Agents package."""
 
-from .semantic_gateway import SemanticGatewayAgent, create_semantic_gateway
+from .llm import get_chat_model
+from .planner import ActionPlan, PlannedAction, execute_plan, plan_actions
+from .tool_steps import (
+    TOOL_DEPENDENCIES,
+    StepTiming,
+    ToolStepMiddleware,
+    record_tool_steps,
+    run_step,
+)
+from .gateway_cache import CacheStats, GatewayCache
+from .micro_batch import BatchStats, MicroBatcher
+from .resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    GuardStats,
+    LLMGuard,
+    LLMGuardMiddleware,
+    create_llm_guard,
+    get_circuit_breaker,
+)
+from .urgency_classifier import ClassifierStats, UrgencyClassifier, train_classifier
+from .semantic_gateway import CascadeStats, SemanticGatewayAgent, create_semantic_gateway, get_semantic_gateway
+from .structured_agent import (
+    StructuredDecisionAgent,
+    create_structured_agent,
+    get_structured_agent,
+    to_analysis,
+    to_plan,
+)
 from .auto_negotiator import AutoNegotiatorAgent, create_auto_negotiator
 from .react_agent import (
     create_deepflow_agent,
+    get_deepflow_agent,
     process_message,
     process_message_sync,
 )
 
 __all__ = [
+    "get_chat_model",
     "SemanticGatewayAgent",
+    "CascadeStats",
+    "GatewayCache",
+    "CacheStats",
+    "MicroBatcher",
+    "BatchStats",
+    "LLMGuard",
+    "GuardStats",
+    "LLMGuardMiddleware",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "create_llm_guard",
+    "get_circuit_breaker",
+    "UrgencyClassifier",
+    "ClassifierStats",
+    "train_classifier",
     "create_semantic_gateway",
+    "get_semantic_gateway",
+    "StructuredDecisionAgent",
+    "create_structured_agent",
+    "get_structured_agent",
+    "to_analysis",
+    "to_plan",
     "AutoNegotiatorAgent",
     "create_auto_negotiator",
     "create_deepflow_agent",
+    "get_deepflow_agent",
     "process_message",
     "process_message_sync",
+    "ActionPlan",
+    "PlannedAction",
+    "plan_actions",
+    "execute_plan",
+    "TOOL_DEPENDENCIES",
+    "StepTiming",
+    "ToolStepMiddleware",
+    "record_tool_steps",
+    "run_step",
 ]
 
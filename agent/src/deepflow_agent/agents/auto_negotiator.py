@@ -14,6 +14,8 @@ from langchain_core.output_parsers import StrOutputParser
 from ..config import get_settings
 from ..models import AutoNegotiatorOutput
 from ..prompts import AUTO_NEGOTIATOR_SYSTEM, AUTO_NEGOTIATOR_USER
+from .llm import get_chat_model
+from .resilience import LLMGuard, create_llm_guard
 
 
 class AutoNegotiatorAgent:
@@ -21,18 +23,15 @@ class AutoNegotiatorAgent:
     Agent that generates polite auto-replies for non-urgent messages.
     """
 
-    def __init__(self, llm: Optional[ChatOpenAI] = None):
+    def __init__(self, llm: Optional[ChatOpenAI] = None, guard: Optional[LLMGuard] = None):
         settings = get_settings()
+        self.guard = guard
 
         if llm:
             self.llm = llm
         else:
-            self.llm = ChatOpenAI(
-                model=settings.llm_model,
-                temperature=0.7,  # Slightly creative for natural replies
-                api_key=settings.openai_api_key,
-                base_url=settings.openai_api_base if settings.openai_api_base != "https://api.openai.com/v1" else None,
-            )
+            # Slightly creative for natural replies
+            self.llm = get_chat_model(settings.model_for("negotiator"), 0.7)
 
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", AUTO_NEGOTIATOR_SYSTEM),
@@ -60,13 +59,17 @@ class AutoNegotiatorAgent:
                 escalation_hint="",
             )
 
-        response = await self.chain.ainvoke({
+        inputs = {
             "user_state": user_state,
             "sender": sender,
             "urgency_score": urgency_score,
             "summary": summary,
             "content": content,
-        })
+        }
+        if self.guard:
+            response = await self.guard.call(lambda: self.chain.ainvoke(inputs))
+        else:
+            response = await self.chain.ainvoke(inputs)
 
         try:
             data = json.loads(response)
@@ -99,5 +102,5 @@ class AutoNegotiatorAgent:
 
 
 def create_auto_negotiator(llm: Optional[ChatOpenAI] = None) -> AutoNegotiatorAgent:
-    """Factory function to create AutoNegotiatorAgent."""
-    return AutoNegotiatorAgent(llm)
+    """Factory function to create AutoNegotiatorAgent (deadline and circuit breaker, no hedging)."""
+    return AutoNegotiatorAgent(llm, guard=create_llm_guard(hedge=False))
@@ -0,0 +1,252 @@
+"""
+Semantic Gateway Cache
+
+Two-level Redis cache in front of the semantic gateway's LLM call.
+
+Recurring automated messages (CI failures, newsletters, standup
+reminders) otherwise cost a fresh LLM call every time.
+
+1. Exact: key is a hash of the normalized content, sender, user state
+   and gateway version (model + prompt).
+2. Near-duplicate: a 64-bit SimHash over character shingles of the
+   content, with digits masked so build numbers and dates do not count.
+   A cached result is reused when the fingerprints are at least
+   `similarity` alike (1 - Hamming distance / 64). Only entries of the
+   same sender, user state and version are considered.
+
+   Candidates are found with LSH banding: the fingerprint is cut into
+   max_distance + 1 bands, and two fingerprints within max_distance bits
+   share at least one band exactly. Each band value is a Redis set of
+   entry digests.
+
+Entries expire after `ttl` seconds, and an LRU index (sorted set by
+last access) bounds the cache at `max_entries`. The cache is best
+effort: Redis errors are logged and count as misses.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Optional, Tuple
+
+from ..models import SemanticGatewayInput, SemanticGatewayOutput
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "deepflow:gateway:cache"
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 4
+
+_WHITESPACE = re.compile(r"\s+")
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize(text: str) -> str:
+    """Case- and whitespace-insensitive form of a message (NFKC, so full-width text matches)."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip().casefold()
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> int:
+    """
+    64-bit SimHash of character shingles.
+
+    Character shingles work for unsegmented Chinese as well as English.
+    """
+    text = _DIGITS.sub("0", normalize(text))
+    if len(text) <= shingle_size:
+        shingles = Counter([text])
+    else:
+        shingles = Counter(text[i:i + shingle_size] for i in range(len(text) - shingle_size + 1))
+
+    weights = [0] * FINGERPRINT_BITS
+    for shingle, count in shingles.items():
+        value = _hash64(shingle)
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += count if value >> bit & 1 else -count
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def similarity(a: int, b: int) -> float:
+    """Fraction of equal bits between two fingerprints."""
+    return 1 - bin(a ^ b).count("1") / FINGERPRINT_BITS
+
+
+def bands(fingerprint: int, count: int) -> List[int]:
+    """Cut a fingerprint into `count` contiguous bands."""
+    edges = [round(i * FINGERPRINT_BITS / count) for i in range(count + 1)]
+    return [(fingerprint >> lo) & ((1 << (hi - lo)) - 1) for lo, hi in zip(edges, edges[1:])]
+
+
+@dataclass
+class CacheStats:
+    """Lookup counters reported by GatewayCache."""
+
+    lookups: int = 0
+    exact_hits: int = 0
+    near_hits: int = 0
+    errors: int = 0
+
+    @property
+    def misses(self) -> int:
+        return self.lookups - self.exact_hits - self.near_hits
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.exact_hits + self.near_hits) / self.lookups if self.lookups else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "misses": self.misses, "hit_rate": self.hit_rate}
+
+
+class GatewayCache:
+    """
+    Exact and near-duplicate cache of SemanticGatewayOutput in Redis.
+
+    Usage:
+        cache = GatewayCache(version=PROMPT_VERSION)
+        result = await cache.get(input)
+        if result is None:
+            result = await llm_analyze(input)
+            await cache.put(input, result)
+    """
+
+    def __init__(
+        self,
+        version: str,
+        ttl: int = 86400,
+        max_entries: int = 10000,
+        similarity_threshold: float = 0.95,
+        redis: Optional[Callable] = None,
+    ):
+        if not 0 < similarity_threshold <= 1:
+            raise ValueError("similarity_threshold must be in (0, 1]")
+        if redis is None:
+            from ..tools.base import get_async_redis_client
+            redis = get_async_redis_client
+        self.version = version
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.similarity_threshold = similarity_threshold
+        self.max_distance = int((1 - similarity_threshold) * FINGERPRINT_BITS + 1e-9)
+        self.redis = redis
+        self.stats = CacheStats()
+
+    # Keys
+
+    def _scope(self, input: SemanticGatewayInput) -> str:
+        return hashlib.sha1(f"{normalize(input.sender)}\x00{input.user_state}".encode()).hexdigest()[:16]
+
+    def digest(self, input: SemanticGatewayInput) -> str:
+        """Exact-match key of a gateway input."""
+        parts = [normalize(input.content), normalize(input.sender), input.user_state, self.version]
+        return hashlib.sha256("\x00".join(parts).encode()).hexdigest()
+
+    def _entry_key(self, digest: str) -> str:
+        return f"{KEY_PREFIX}:{self.version}:entry:{digest}"
+
+    def _lru_key(self) -> str:
+        return f"{KEY_PREFIX}:{self.version}:lru"
+
+    def _band_keys(self, scope: str, fingerprint: int) -> List[str]:
+        if self.max_distance == 0:
+            return []
+        return [
+            f"{KEY_PREFIX}:{self.version}:band:{scope}:{i}:{value:x}"
+            for i, value in enumerate(bands(fingerprint, self.max_distance + 1))
+        ]
+
+    # Lookup
+
+    async def get(self, input: SemanticGatewayInput) -> Optional[SemanticGatewayOutput]:
+        """Cached analysis for `input` (exact, then near-duplicate), or None."""
+        self.stats.lookups += 1
+        try:
+            digest = self.digest(input)
+            redis = self.redis()
+            entry = await redis.get(self._entry_key(digest))
+            if entry:
+                self.stats.exact_hits += 1
+                await self._touch(digest)
+                return SemanticGatewayOutput(**json.loads(entry)["output"])
+
+            match = await self._near_duplicate(input)
+            if match:
+                self.stats.near_hits += 1
+                digest, output = match
+                await self._touch(digest)
+                return output
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"Gateway cache lookup failed: {e}")
+        return None
+
+    async def _near_duplicate(self, input: SemanticGatewayInput) -> Optional[Tuple[str, SemanticGatewayOutput]]:
+        fingerprint = simhash(input.content)
+        band_keys = self._band_keys(self._scope(input), fingerprint)
+        if not band_keys:
+            return None
+
+        pipe = self.redis().pipeline()
+        for key in band_keys:
+            pipe.smembers(key)
+        candidates = sorted(set().union(*(set(members or []) for members in await pipe.exec())))
+        if not candidates:
+            return None
+
+        entries = await self.redis().mget(*(self._entry_key(d) for d in candidates))
+        best = None
+        for digest, entry in zip(candidates, entries):
+            if not entry:
+                continue  # evicted or expired; the band set outlives it
+            data = json.loads(entry)
+            score = similarity(fingerprint, data["fingerprint"])
+            if score >= self.similarity_threshold and (best is None or score > best[0]):
+                best = (score, digest, data["output"])
+        if best is None:
+            return None
+        return best[1], SemanticGatewayOutput(**best[2])
+
+    async def _touch(self, digest: str) -> None:
+        await self.redis().zadd(self._lru_key(), {digest: time.time()})
+
+    # Store
+
+    async def put(self, input: SemanticGatewayInput, output: SemanticGatewayOutput) -> None:
+        """Store an analysis, evicting least recently used entries past max_entries."""
+        try:
+            digest = self.digest(input)
+            fingerprint = simhash(input.content)
+            entry = json.dumps({"output": output.model_dump(), "fingerprint": fingerprint})
+
+            pipe = self.redis().pipeline()
+            pipe.set(self._entry_key(digest), entry, ex=self.ttl)
+            for key in self._band_keys(self._scope(input), fingerprint):
+                pipe.sadd(key, digest)
+                pipe.expire(key, self.ttl)
+            pipe.zadd(self._lru_key(), {digest: time.time()})
+            pipe.expire(self._lru_key(), self.ttl)
+            pipe.zcard(self._lru_key())
+            size = (await pipe.exec())[-1]
+
+            if size > self.max_entries:
+                await self._evict(size - self.max_entries)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"Gateway cache store failed: {e}")
+
+    async def _evict(self, count: int) -> None:
+        redis = self.redis()
+        evicted = await redis.zpopmin(self._lru_key(), count)
+        # zpopmin returns (member, score) pairs
+        digests = [item[0] if isinstance(item, (list, tuple)) else item for item in evicted or []]
+        if digests:
+            await redis.delete(*(self._entry_key(d) for d in digests))
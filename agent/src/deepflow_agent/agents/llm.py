@@ -0,0 +1,29 @@
+"""
+LLM Clients
+
+Process-wide chat model clients.
+
+A ChatOpenAI client owns an HTTP connection pool, so building one per
+message wastes both setup time and connections. Clients are cached by
+model and temperature and shared by every agent in the process.
+"""
+
+from functools import lru_cache
+
+from langchain_openai import ChatOpenAI
+
+from ..config import get_settings
+
+DEFAULT_API_BASE = "https://api.openai.com/v1"
+
+
+@lru_cache(maxsize=16)
+def get_chat_model(model: str, temperature: float = 0.0) -> ChatOpenAI:
+    """Get the shared chat client for `model` at `temperature`."""
+    settings = get_settings()
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        api_key=settings.openai_api_key,
+        base_url=settings.openai_api_base if settings.openai_api_base != DEFAULT_API_BASE else None,
+    )
@@ -0,0 +1,132 @@
+"""
+Micro-batching
+
+Collects concurrent calls into batches, so a backlog of signals costs
+one LLM request per batch instead of one per signal.
+
+A batch is sent when it reaches `max_size` items or `max_wait_ms` after
+its first item arrived, whichever comes first. Items are batched per
+key (the gateway uses the user state, which is part of its system
+prompt). Each caller awaits its own result; if the batch call raises,
+every caller in it gets the exception.
+
+Batch calls run as tasks owned by the batcher; close() sends what is
+still waiting and drains or cancels them on shutdown.
+"""
+
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class BatchStats:
+    """Counters reported by MicroBatcher."""
+
+    batches: int = 0
+    items: int = 0
+    fallbacks: int = 0  # items the batch could not answer, retried one by one
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "mean_batch_size": self.mean_batch_size}
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Batch concurrent submissions per key.
+
+    Usage:
+        batcher = MicroBatcher(run_batch, max_size=8, max_wait_ms=20)
+        result = await batcher.submit(key, item)
+
+    `run_batch(key, items)` returns one result per item, in order.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[Hashable, List[T]], Awaitable[List[R]]],
+        max_size: int = 8,
+        max_wait_ms: float = 20.0,
+    ):
+        self.run_batch = run_batch
+        self.max_size = max(1, max_size)
+        self.max_wait_ms = max_wait_ms
+        self.stats = BatchStats()
+        self._pending: Dict[Hashable, List[Tuple[T, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> int:
+        """Batch calls in progress."""
+        return len(self._tasks)
+
+    async def submit(self, key: Hashable, item: T) -> R:
+        """Queue `item` and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, future))
+
+        if len(batch) >= self.max_size:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.max_wait_ms / 1000, self._flush, key)
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.create_task(self._run(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def close(self, timeout: Optional[float] = None) -> int:
+        """
+        Send waiting batches now, then wait up to `timeout` seconds for
+        running batch calls and cancel the rest (their callers get
+        CancelledError).
+
+        Returns:
+            Number of batch calls cancelled.
+        """
+        for key in list(self._pending):
+            self._flush(key)
+        if not self._tasks:
+            return 0
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+        return len(pending)
+
+    async def _run(self, key: Hashable, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        self.stats.batches += 1
+        self.stats.items += len(batch)
+        try:
+            results: Optional[List[Any]] = await self.run_batch(key, [item for item, _ in batch])
+            if results is None or len(results) != len(batch):
+                raise ValueError(f"batch returned {0 if results is None else len(results)} results for {len(batch)} items")
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():  # the caller may have been cancelled
+                future.set_result(result)
@@ -0,0 +1,163 @@
+"""
+Rule-Based Action Planner
+
+Maps a semantic analysis plus the user's state to tool calls, without an
+LLM turn.
+
+The decision rules in AGENT_SYSTEM_PROMPT only depend on the urgency
+score, the user state and (for urgent items) a deadline:
+
+- 9-10 critical: add to queue + Telegram notification
+- 6-8 urgent:    add to queue (notify only with a deadline within 2h)
+- 4-5 standard:  add to queue, auto-reply if the user is in FLOW
+- 2-3 low:       add to queue
+- 0-1 discard:   nothing
+
+plan_actions() applies them directly and returns None when the case is
+ambiguous (category disagrees with the score, or an urgent message
+mentions a time that may be a deadline); those go to the ReAct agent.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from ..models import SemanticGatewayOutput
+from .tool_steps import run_step
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SOURCES = {"slack", "email", "telegram", "manual"}
+REPLY_CHANNELS = {"slack", "email", "telegram"}
+
+# Time expressions that may set a deadline; urgent messages with one are
+# left to the agent to judge against the 2 hour notification rule
+DEADLINE_PATTERN = re.compile(
+    r"\b(today|tonight|eod|end of (the )?day|asap|right now|deadline|due|"
+    r"in \d+\s*(min|mins|minutes|h|hr|hrs|hours?)|by \d{1,2}(:\d{2})?\s*(am|pm)?|"
+    r"within \d+)\b",
+    re.IGNORECASE,
+)
+
+
+def category_for_score(urgency_score: int) -> str:
+    """Category the agent prompt assigns to an urgency score."""
+    if urgency_score >= 9:
+        return "critical"
+    if urgency_score >= 6:
+        return "urgent"
+    if urgency_score >= 4:
+        return "standard"
+    if urgency_score >= 2:
+        return "low"
+    return "discard"
+
+
+@dataclass
+class PlannedAction:
+    """One tool invocation chosen by the planner."""
+
+    tool: str
+    args: Dict[str, Any]
+
+
+@dataclass
+class ActionPlan:
+    """Tool invocations for a message and the rule that produced them."""
+
+    rule: str
+    actions: List[PlannedAction] = field(default_factory=list)
+
+
+def plan_actions(
+    analysis: SemanticGatewayOutput,
+    user_id: str,
+    user_state: str,
+    sender: str,
+    source: str,
+    source_id: str = "",
+    content: str = "",
+    reply_to: str = "",
+    fallback: bool = False,
+) -> Optional[ActionPlan]:
+    """
+    Decide the tool calls for an analyzed message.
+
+    Args:
+        sender: Who wrote the message (alert titles, auto-reply greeting)
+        content: The original message text, as the negotiator should see it
+        reply_to: Auto-reply address (channel ID, email); empty = sender
+        fallback: Plan ambiguous cases by urgency score alone instead of
+            returning None (used while the LLM provider is unavailable).
+
+    Returns:
+        The plan, or None if the rules do not clearly cover the case.
+    """
+    category = category_for_score(analysis.urgency_score)
+    if analysis.category != category and not fallback:
+        return None
+    if category == "discard":
+        return ActionPlan(rule="discard")
+    if category == "urgent" and DEADLINE_PATTERN.search(content or "") and not fallback:
+        return None
+
+    actions = [
+        PlannedAction("add_to_queue", {
+            "user_id": user_id,
+            "task_summary": analysis.summary[:200],
+            "urgency_score": analysis.urgency_score,
+            "category": category,
+            "source": source if source in QUEUE_SOURCES else "manual",
+            "source_id": source_id,
+            "estimated_minutes": analysis.estimated_time_minutes,
+        })
+    ]
+
+    if category == "critical":
+        actions.append(PlannedAction("send_telegram_notification", {
+            "user_id": user_id,
+            "title": f"🚨 Critical: {sender}",
+            "body": analysis.summary[:200],
+            "urgency": "critical",
+        }))
+    elif category == "standard" and user_state == "FLOW" and source in REPLY_CHANNELS:
+        actions.append(PlannedAction("send_auto_reply", {
+            "channel": source,
+            "recipient": reply_to or sender,
+            "original_msg_id": source_id,
+            "sender_name": sender,
+            "incoming_content": content,
+            "urgency_score": analysis.urgency_score,
+            "user_state": user_state,
+        }))
+
+    return ActionPlan(rule=f"{category}:{user_state}", actions=actions)
+
+
+async def execute_plan(plan: ActionPlan) -> List[Dict[str, Any]]:
+    """
+    Run the planned tools as one step (see tool_steps.run_step): concurrently,
+    except for calls that TOOL_DEPENDENCIES keeps in order.
+
+    Returns:
+        Tool call records shaped like the agent's: name, args, id, plus
+        the tool's result or error.
+    """
+    from .. import tools
+
+    async def run(record: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            tool = getattr(tools, record["name"])
+            record["result"] = await tool.ainvoke(record["args"])
+        except Exception as e:
+            logger.error(f"Planned action {record['name']} failed: {e}")
+            record["error"] = str(e)
+        return record
+
+    records = [
+        {"name": action.tool, "args": action.args, "id": f"planned-{index}"}
+        for index, action in enumerate(plan.actions)
+    ]
+    results, _ = await run_step(records, run)
+    return results
@@ -3,17 +3,51 @@ DeepFlow ReAct Agent
 
 A ReAct (Reasoning + Acting) agent that can analyze messages and take actions
 using the available tools.
+
+Compiled agent graphs are cached per process by model and user state;
+per-user context (user ID, conversation history) is sent with each
+message, so handling a message does no agent setup work.
+
+process_message runs in stages. Independent I/O overlaps: the
+conversation history is read while the user state is looked up and the
+semantic gateway runs. Blocking Upstash REST calls run in worker
+threads, off the event loop. Per-stage timings are returned with the
+result.
+
+Cases the decision rules clearly cover are planned and executed directly
+(see planner.py); only ambiguous ones run the ReAct loop.
+
+Model calls have a deadline, optional hedging and the shared circuit
+breaker (see resilience.py). While the breaker is open, or when the
+gateway answered in degraded mode, every message is planned by the
+rules on urgency alone and the ReAct loop is skipped.
+
+Independent tool calls of a step run concurrently on both paths (see
+tool_steps.py); each step's wall-clock breakdown is returned as
+"tool_steps".
+
+With AGENT_MODE=single_call, one structured LLM call returns both the
+analysis and the actions (see structured_agent.py); if that call fails
+the message takes the two-phase path above.
 """
 
+import asyncio
+import logging
 import os
-from typing import Optional
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Dict, Optional
 
 from langchain.agents import create_agent
-from langchain_openai import ChatOpenAI
 
 from ..config import get_settings
 from ..tracer import init_opik
-from .semantic_gateway import create_semantic_gateway
+from .llm import get_chat_model
+from .planner import execute_plan, plan_actions
+from .resilience import LLMGuardMiddleware, create_llm_guard, get_circuit_breaker
+from .semantic_gateway import get_semantic_gateway
+from .structured_agent import get_structured_agent, to_analysis, to_plan
+from .tool_steps import ToolStepMiddleware, record_tool_steps
 from ..tools import (
     add_to_queue,
     send_auto_reply,
@@ -22,20 +56,20 @@ from ..tools import (
     send_browser_notification,
 )
 
+logger = logging.getLogger(__name__)
+
 
 # System prompt for the agent
 AGENT_SYSTEM_PROMPT = """You are DeepFlow Sentinel, an intelligent executive assistant that protects users' focus time.
 
 ## User Context
-- User ID: {user_id}
 - Current State: {user_state}
 - State Meanings:
   - FLOW: Deep focus mode. Only urgent (score >= 9) matters.
   - SHALLOW: Light work. Moderate urgency (score >= 6) is acceptable.
   - IDLE: Available. All notifications allowed.
 
-## Recent Conversation History
-{conversation_history}
+The user ID and recent conversation history are included with each message.
 
 ## Your Decision Process
 1. **Analyze** the incoming message for urgency (0-10) and category
@@ -66,47 +100,18 @@ Be accurate. Misjudging urgency can either waste the user's focus time or cause
 """
 
 
-def create_deepflow_agent(
-    user_id: str,
-    user_state: str = "IDLE",
-    verbose: bool = False,
-    include_memory: bool = True
-):
+@lru_cache(maxsize=16)
+def get_deepflow_agent(model: str, user_state: str = "IDLE"):
     """
-    Create a DeepFlow agent with all tools.
+    Get the shared compiled agent graph for `model` and `user_state`.
     
-    Args:
-        user_id: The user's unique identifier
-        user_state: Current user state (FLOW/SHALLOW/IDLE)
-        verbose: Whether to print agent reasoning
-        include_memory: Whether to include conversation history
-    
-    Returns:
-        Agent ready to process messages
+    The graph holds no per-user data and is safe to run concurrently.
     """
-    # Initialize Opik tracing
+    # Initialize Opik tracing (once per process)
     init_opik()
     
-    # Get settings
-    settings = get_settings()
-    
-    # Get conversation history if enabled
-    conversation_history = "No recent conversation history."
-    if include_memory:
-        try:
-            from ..memory import get_conversation_memory
-            memory = get_conversation_memory()
-            conversation_history = memory.get_formatted_history(user_id, limit=5)
-        except Exception as e:
-            logger.debug(f"Could not load conversation history: {e}")
-    
-    # Initialize LLM
-    llm = ChatOpenAI(
-        model=settings.llm_model,
-        api_key=settings.openai_api_key,
-        base_url=settings.openai_api_base,
-        temperature=0,  # Deterministic for consistent actions
-    )
+    # Deterministic for consistent actions
+    llm = get_chat_model(model, 0.0)
     
     # Available tools
     from ..tools import send_telegram_notification
@@ -120,31 +125,137 @@ def create_deepflow_agent(
         send_browser_notification,   # Fallback (SSE)
     ]
     
-    # Format system prompt with user context and history
-    system_prompt = AGENT_SYSTEM_PROMPT.format(
-        user_id=user_id,
-        user_state=user_state,
-        conversation_history=conversation_history
-    )
-    
     # Create the agent using LangChain v1 API
-    agent = create_agent(
+    return create_agent(
         llm,
         tools,
-        system_prompt=system_prompt,
+        system_prompt=AGENT_SYSTEM_PROMPT.format(user_state=user_state),
+        middleware=[ToolStepMiddleware(), LLMGuardMiddleware(create_llm_guard())],
+    )
+
+
+def create_deepflow_agent(
+    user_id: str,
+    user_state: str = "IDLE",
+    verbose: bool = False,
+    include_memory: bool = True
+):
+    """
+    Create a DeepFlow agent with all tools.
+    
+    Returns the cached agent for the configured model and `user_state`.
+    The user ID and conversation history are no longer baked into the
+    agent; process_message sends them with each message.
+    
+    Args:
+        user_id: The user's unique identifier (kept for compatibility)
+        user_state: Current user state (FLOW/SHALLOW/IDLE)
+        verbose: Whether to print agent reasoning
+        include_memory: Kept for compatibility, see process_message
+    
+    Returns:
+        Agent ready to process messages
+    """
+    return get_deepflow_agent(get_settings().model_for("agent"), user_state)
+
+
+def load_user_state(user_id: str) -> str:
+    """User's focus state from Redis (IDLE if unset or unavailable)."""
+    try:
+        from ..tools.base import get_redis_client
+        return get_redis_client().get(f"user:{user_id}:state") or "IDLE"
+    except Exception as e:
+        logger.warning(f"Could not load state for {user_id}, assuming IDLE: {e}")
+        return "IDLE"
+
+
+async def _timed(timings: Dict[str, float], stage: str, awaitable: Awaitable[Any]) -> Any:
+    """Await `awaitable`, recording its duration in milliseconds under `stage`."""
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[stage] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def load_conversation_history(user_id: str, limit: int = 5) -> str:
+    """Recent conversation history for the prompt (placeholder if unavailable)."""
+    try:
+        from ..memory import get_conversation_memory
+        return get_conversation_memory().get_formatted_history(user_id, limit=limit)
+    except Exception as e:
+        logger.debug(f"Could not load conversation history: {e}")
+        return "No recent conversation history."
+
+
+async def _process_single_call(
+    user_id: str,
+    user_state: Optional[str],
+    message_content: str,
+    sender: str,
+    source: str,
+    source_id: str,
+    verbose: bool,
+    reply_to: str = "",
+) -> dict:
+    """process_message for AGENT_MODE=single_call: one LLM call, then local execution."""
+    from ..models import SemanticGatewayInput
+    
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    agent = get_structured_agent(get_settings().model_for("agent"))
+    
+    if user_state is None:
+        user_state = await _timed(timings, "state_ms", asyncio.to_thread(load_user_state, user_id))
+    decision = await _timed(timings, "decide_ms", agent.decide(SemanticGatewayInput(
+        user_state=user_state,
+        sender=sender,
+        content=message_content,
+    ), source=source))
+    plan = to_plan(
+        decision,
+        user_id=user_id,
+        user_state=user_state,
+        sender=sender,
+        source=source,
+        source_id=str(source_id),
+        content=message_content,
+        reply_to=reply_to,
     )
+    if verbose:
+        print(f"Decision: Urgency={decision.urgency_score}, Category={decision.category}, "
+              f"Actions={[action.tool for action in plan.actions]}")
     
-    return agent
+    with record_tool_steps() as steps:
+        tool_calls = await _timed(timings, "actions_ms", execute_plan(plan))
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    analysis = to_analysis(decision)
+    return {
+        "input": message_content,
+        "output": f"Executed {len(tool_calls)} action(s) from a single structured call",
+        "tool_calls": tool_calls,
+        "user_id": user_id,
+        "user_state": user_state,
+        "analysis": {
+            "urgency_score": analysis.urgency_score,
+            "category": analysis.category,
+            "summary": analysis.summary,
+        },
+        "planner": "single_call",
+        "timings": timings,
+        "tool_steps": [step.to_dict() for step in steps],
+    }
 
 
 async def process_message(
     user_id: str,
-    user_state: str,
+    user_state: Optional[str],
     message_content: str,
     sender: str,
     source: str = "manual",
     source_id: str = "",
-    verbose: bool = False
+    verbose: bool = False,
+    reply_to: str = "",
 ) -> dict:
     """
     Process an incoming message through the DeepFlow agent.
@@ -153,45 +264,106 @@ async def process_message(
     
     Args:
         user_id: User's unique identifier
-        user_state: Current state (FLOW/SHALLOW/IDLE)
+        user_state: Current state (FLOW/SHALLOW/IDLE), or None to look it up
         message_content: The message text to analyze
         sender: Who sent the message
         source: Where the message came from (slack/email/telegram/manual)
         source_id: Original message ID from the source
         verbose: Print reasoning
+        reply_to: Where an auto-reply goes (Slack channel ID, email address,
+            Telegram chat ID); empty = the sender
     
     Returns:
-        Dict with agent's actions and final answer
+        Dict with agent's actions, final answer and per-stage timings (ms)
     """
-    # Create agents
-    agent = create_deepflow_agent(
-        user_id=user_id,
-        user_state=user_state,
-        verbose=verbose
-    )
+    from ..models import SemanticGatewayInput
     
-    gateway = create_semantic_gateway()
+    settings = get_settings()
+    if settings.agent_mode == "single_call":
+        try:
+            return await _process_single_call(
+                user_id, user_state, message_content, sender, source, source_id, verbose, reply_to
+            )
+        except Exception as e:
+            logger.warning(f"Single-call decision failed, using the two-phase path: {e}")
     
-    # 1. Semantic Analysis
-    from ..models import SemanticGatewayInput
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    gateway = get_semantic_gateway(settings.model_for("gateway"), settings.gateway_escalation_model)
     
-    if verbose:
-        print(f"Running Semantic Analysis on message from {sender}...")
-        
-    analysis = await gateway.analyze(SemanticGatewayInput(
-        user_state=user_state,
-        sender=sender,
-        content=message_content
+    async def analyze():
+        # The gateway prompt depends on the state, the history does not
+        state = user_state
+        if state is None:
+            state = await _timed(timings, "state_ms", asyncio.to_thread(load_user_state, user_id))
+        if verbose:
+            print(f"Running Semantic Analysis on message from {sender}...")
+        result = await _timed(timings, "gateway_ms", gateway.analyze(SemanticGatewayInput(
+            user_state=state,
+            sender=sender,
+            content=message_content
+        )))
+        return state, result
+    
+    # 1. Prefetch: history || (state -> semantic analysis)
+    conversation_history, (user_state, analysis) = await _timed(timings, "prefetch_ms", asyncio.gather(
+        _timed(timings, "history_ms", asyncio.to_thread(load_conversation_history, user_id)),
+        analyze(),
     ))
     
     if verbose:
         print(f"Analysis Result: Urgency={analysis.urgency_score}, Category={analysis.category}")
     
-    # 2. Format input message with analysis
+    # Use metadata from analysis to enrich return value
+    enriched_metadata = {
+        "urgency_score": analysis.urgency_score,
+        "category": analysis.category,
+        "summary": analysis.summary
+    }
+    
+    # 2. Rule-covered cases: run the planned tools, no ReAct loop.
+    # Without a working provider the rules decide every case.
+    degraded = "degraded" in analysis.context_tags or get_circuit_breaker().is_open
+    plan = None
+    if settings.agent_rule_planner or degraded:
+        plan = plan_actions(
+            analysis,
+            user_id=user_id,
+            user_state=user_state,
+            sender=sender,
+            source=source,
+            source_id=str(source_id),
+            content=message_content,
+            reply_to=reply_to,
+            fallback=degraded,
+        )
+    if plan is not None:
+        if verbose:
+            print(f"Rule {plan.rule}: {[action.tool for action in plan.actions]}")
+        with record_tool_steps() as steps:
+            tool_calls = await _timed(timings, "actions_ms", execute_plan(plan))
+        timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return {
+            "input": message_content,
+            "output": f"Planned {len(tool_calls)} action(s) by rule {plan.rule}",
+            "tool_calls": tool_calls,
+            "user_id": user_id,
+            "user_state": user_state,
+            "analysis": enriched_metadata,
+            "planner": "fallback" if degraded else "rules",
+            "timings": timings,
+            "tool_steps": [step.to_dict() for step in steps],
+        }
+    
+    # Shared agent, built once per process
+    agent = get_deepflow_agent(settings.model_for("agent"), user_state)
+    
+    # 3. Format input message with analysis
     input_message = {
         "role": "user",
         "content": f"""New message received:
 From: {sender}
+Reply To: {reply_to or sender}
 Source: {source}
 Content: {message_content}
 
@@ -205,6 +377,9 @@ User State: {user_state}
 - Suggested Action: {analysis.suggested_action}
 - Context Tags: {", ".join(analysis.context_tags)}
 
+**Recent Conversation History**:
+{conversation_history}
+
 Based on this analysis and the User State, execute the appropriate tool actions (add_to_queue, notifications, etc.)."""
     }
     
@@ -212,24 +387,22 @@ Based on this analysis and the User State, execute the appropriate tool actions
     final_output = None
     tool_calls = []
     
-    # Use metadata from analysis to enrich return value
-    enriched_metadata = {
-        "urgency_score": analysis.urgency_score,
-        "category": analysis.category,
-        "summary": analysis.summary
-    }
-    
-    async for step in agent.astream({"messages": [input_message]}):
-        if verbose:
-            print(f"Step: {step}")
-        
-        # Collect tool calls and final output
-        if "messages" in step:
-            for msg in step["messages"]:
-                if hasattr(msg, "tool_calls") and msg.tool_calls:
-                    tool_calls.extend(msg.tool_calls)
-                if hasattr(msg, "content") and msg.content:
-                    final_output = msg.content
+    # 4. Agent actions
+    agent_started = time.perf_counter()
+    with record_tool_steps() as steps:
+        async for step in agent.astream({"messages": [input_message]}):
+            if verbose:
+                print(f"Step: {step}")
+            
+            # Collect tool calls and final output
+            if "messages" in step:
+                for msg in step["messages"]:
+                    if hasattr(msg, "tool_calls") and msg.tool_calls:
+                        tool_calls.extend(msg.tool_calls)
+                    if hasattr(msg, "content") and msg.content:
+                        final_output = msg.content
+    timings["agent_ms"] = round((time.perf_counter() - agent_started) * 1000, 1)
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
     
     return {
         "input": message_content,
@@ -237,18 +410,22 @@ Based on this analysis and the User State, execute the appropriate tool actions
         "tool_calls": tool_calls,
         "user_id": user_id,
         "user_state": user_state,
-        "analysis": enriched_metadata
+        "analysis": enriched_metadata,
+        "planner": "agent",
+        "timings": timings,
+        "tool_steps": [step.to_dict() for step in steps],
     }
 
 
 def process_message_sync(
     user_id: str,
-    user_state: str,
+    user_state: Optional[str],
     message_content: str,
     sender: str,
     source: str = "manual",
     source_id: str = "",
-    verbose: bool = False
+    verbose: bool = False,
+    reply_to: str = "",
 ) -> dict:
     """
     Synchronous version of process_message.
@@ -261,5 +438,6 @@ def process_message_sync(
         sender=sender,
         source=source,
         source_id=source_id,
-        verbose=verbose
+        verbose=verbose,
+        reply_to=reply_to,
     ))
@@ -0,0 +1,294 @@
+"""
+LLM Call Resilience
+
+Deadlines, hedged requests and a circuit breaker for LLM calls.
+
+- Deadline: every call is cancelled after llm_call_timeout seconds, so a
+  stuck provider response cannot hold a worker slot.
+- Hedging (llm_hedge_enabled): when a call has not answered after the
+  p95 of recent successful calls, a second identical request is fired
+  and whichever answers first wins; the other is cancelled. Hedging
+  starts once llm_hedge_min_samples latencies have been seen.
+- Circuit breaker: one per process (the provider is shared by every
+  model). When the error rate over the last llm_breaker_window calls
+  reaches llm_breaker_failure_rate, the breaker opens and calls fail
+  fast with CircuitOpenError; the gateway then answers from local
+  heuristics (keyword rules, classifier) and the planner takes over
+  from the ReAct agent. After llm_breaker_cooldown seconds one probe
+  call is let through; its success closes the breaker.
+
+LLMGuard wraps a single call site; LLMGuardMiddleware applies it to the
+ReAct agent's model calls. Breaker state is logged by report_stats
+(state_code: 0 closed, 1 half-open, 2 open).
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+
+from langchain.agents.middleware import AgentMiddleware
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the LLM while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker over a sliding window of calls.
+
+    Usage:
+        if not breaker.allow():
+            raise CircuitOpenError()
+        try:
+            result = await call()
+        except Exception:
+            breaker.record(False)
+            raise
+        breaker.record(True)
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self.cooldown = cooldown
+        self.clock = clock
+        self._outcomes: Deque[bool] = deque(maxlen=max(self.min_calls, window))
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self.clock() - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    @property
+    def error_rate(self) -> float:
+        return self._outcomes.count(False) / len(self._outcomes) if self._outcomes else 0.0
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (half-open lets one probe through)."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, success: bool) -> None:
+        """Record the outcome of an allowed call."""
+        if self._state == self.HALF_OPEN:
+            self._probing = False
+            if success:
+                logger.info("LLM circuit breaker closed, provider recovered")
+                self._state = self.CLOSED
+                self._outcomes.clear()
+            else:
+                self._open()
+            return
+
+        self._outcomes.append(success)
+        if (
+            self._state == self.CLOSED
+            and len(self._outcomes) >= self.min_calls
+            and self.error_rate >= self.failure_rate
+        ):
+            self._open()
+
+    def release(self) -> None:
+        """Forget an allowed call that was cancelled before it finished."""
+        if self._state == self.HALF_OPEN:
+            self._probing = False
+
+    def _open(self) -> None:
+        logger.warning(
+            f"LLM circuit breaker open (error rate {self.error_rate:.0%}), "
+            f"using local heuristics for {self.cooldown:.0f}s"
+        )
+        self._state = self.OPEN
+        self._opened_at = self.clock()
+        self.times_opened += 1
+
+    def to_dict(self) -> dict:
+        state = self.state
+        return {
+            "state": state,
+            "state_code": self.STATE_CODES[state],
+            "error_rate": self.error_rate,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+@dataclass
+class GuardStats:
+    """Counters reported by LLMGuard."""
+
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0  # hedges that answered before the original request
+    rejected: int = 0  # calls refused by the open breaker
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class LLMGuard:
+    """
+    Deadline, hedging and circuit breaker around one LLM call site.
+
+    Usage:
+        guard = create_llm_guard()
+        response = await guard.call(lambda: chain.ainvoke(inputs))
+    """
+
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        hedge: bool = False,
+        hedge_min_samples: int = 20,
+        breaker: Optional[CircuitBreaker] = None,
+        latency_window: int = 200,
+    ):
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker
+        self.stats = GuardStats()
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging: the p95 of recent successful calls."""
+        if not self.hedge or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    async def call(self, make_call: Callable[[], Awaitable[T]]) -> T:
+        """Run `make_call()` (again for a hedge) under the deadline and breaker."""
+        if self.breaker and not self.breaker.allow():
+            self.stats.rejected += 1
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+        self.stats.calls += 1
+        started = time.perf_counter()
+        try:
+            if self.timeout > 0:
+                result = await asyncio.wait_for(self._hedged(make_call), self.timeout)
+            else:
+                result = await self._hedged(make_call)
+        except asyncio.CancelledError:
+            if self.breaker:
+                self.breaker.release()
+            raise
+        except Exception as e:
+            self.stats.errors += 1
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats.timeouts += 1
+            if self.breaker:
+                self.breaker.record(False)
+            raise
+
+        self._latencies.append(time.perf_counter() - started)
+        if self.breaker:
+            self.breaker.record(True)
+        return result
+
+    async def _hedged(self, make_call: Callable[[], Awaitable[T]]) -> T:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await make_call()
+
+        first = asyncio.ensure_future(make_call())
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return first.result()
+
+            self.stats.hedged += 1
+            tasks.append(asyncio.ensure_future(make_call()))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.stats.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+class LLMGuardMiddleware(AgentMiddleware):
+    """Run the ReAct agent's model calls through an LLMGuard."""
+
+    def __init__(self, guard: LLMGuard):
+        super().__init__()
+        self.guard = guard
+
+    async def awrap_model_call(self, request, handler):
+        return await self.guard.call(lambda: handler(request))
+
+
+@lru_cache
+def get_circuit_breaker() -> CircuitBreaker:
+    """Get the process-wide LLM provider circuit breaker."""
+    settings = get_settings()
+    return CircuitBreaker(
+        failure_rate=settings.llm_breaker_failure_rate,
+        window=settings.llm_breaker_window,
+        min_calls=settings.llm_breaker_min_calls,
+        cooldown=settings.llm_breaker_cooldown,
+    )
+
+
+def create_llm_guard(hedge: Optional[bool] = None) -> LLMGuard:
+    """LLMGuard configured from settings, sharing the process-wide breaker."""
+    settings = get_settings()
+    return LLMGuard(
+        timeout=settings.llm_call_timeout,
+        hedge=settings.llm_hedge_enabled if hedge is None else hedge,
+        hedge_min_samples=settings.llm_hedge_min_samples,
+        breaker=get_circuit_breaker() if settings.llm_breaker_enabled else None,
+    )
@@ -2,18 +2,81 @@
 Semantic Gateway Agent
 
 Analyzes incoming messages and converts them to structured tasks.
+
+A local classifier (see urgency_classifier.py) answers first when it
+is confident. Otherwise results are cached in Redis (see
+gateway_cache.py), so recurring and near-duplicate messages skip the
+LLM call.
+
+Keyword rules (see keyword_rules.py) can pre-route obvious noise
+without the LLM, and answer in degraded mode when the LLM call fails.
+
+With batch_size > 1, concurrent LLM analyses are micro-batched (see
+micro_batch.py): one request carries the system prompt once and
+analyzes up to batch_size messages, answering a JSON array. Messages
+the batch answer does not cover are analyzed one by one.
+
+With an escalation gateway the LLM step is a cascade: a small, fast
+model answers first, and its answer is re-analyzed by the larger model
+only when it is borderline - urgency within escalation_urgency (where
+the FLOW/SHALLOW notify thresholds flip), self-reported confidence
+below escalation_confidence, or malformed JSON.
+
+LLM calls go through an LLMGuard (see resilience.py) for the deadline,
+hedging and the shared circuit breaker. While the breaker is open, or
+when a call fails, the gateway answers in degraded mode from the
+keyword rules, else the classifier's best guess, tagged "degraded".
 """
 
+import asyncio
+import hashlib
 import json
-from typing import Optional
+import logging
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Hashable, List, Optional, Tuple
 
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import Runnable
 
 from ..config import get_settings
+from ..keyword_rules import KeywordHint, KeywordRules, get_keyword_rules
 from ..models import SemanticGatewayInput, SemanticGatewayOutput, TaskCategory
-from ..prompts import SEMANTIC_GATEWAY_SYSTEM, SEMANTIC_GATEWAY_USER
+from ..prompts import (
+    SEMANTIC_GATEWAY_BATCH_ITEM,
+    SEMANTIC_GATEWAY_BATCH_USER,
+    SEMANTIC_GATEWAY_SYSTEM,
+    SEMANTIC_GATEWAY_USER,
+)
+from .gateway_cache import GatewayCache
+from .llm import get_chat_model
+from .micro_batch import MicroBatcher
+from .planner import category_for_score
+from .resilience import CircuitOpenError, LLMGuard, create_llm_guard
+from .urgency_classifier import UrgencyClassifier, log_label
+
+logger = logging.getLogger(__name__)
+
+# Cached results are only reused by the prompt that produced them
+PROMPT_VERSION = hashlib.sha1((SEMANTIC_GATEWAY_SYSTEM + SEMANTIC_GATEWAY_USER).encode()).hexdigest()[:8]
+
+
+@dataclass
+class CascadeStats:
+    """First-tier LLM answers and how many were escalated."""
+
+    first_tier: int = 0
+    escalated: int = 0
+    failed: int = 0  # escalations that errored; the first-tier answer was kept
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalated / self.first_tier if self.first_tier else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "escalation_rate": self.escalation_rate}
 
 
 class SemanticGatewayAgent:
@@ -21,18 +84,41 @@ class SemanticGatewayAgent:
     Agent that analyzes messages and extracts structured task information.
     """
 
-    def __init__(self, llm: Optional[ChatOpenAI] = None):
+    def __init__(
+        self,
+        llm: Optional[ChatOpenAI] = None,
+        cache: Optional[GatewayCache] = None,
+        classifier: Optional[UrgencyClassifier] = None,
+        min_confidence: float = 0.9,
+        label_log_size: int = 0,
+        keyword_rules: Optional[KeywordRules] = None,
+        keyword_prerouting: bool = False,
+        keyword_fallback: bool = False,
+        batch_size: int = 1,
+        batch_wait_ms: float = 20.0,
+        escalation: Optional["SemanticGatewayAgent"] = None,
+        escalation_urgency: Tuple[int, int] = (6, 9),
+        escalation_confidence: float = 0.7,
+        guard: Optional[LLMGuard] = None,
+    ):
         settings = get_settings()
+        self.cache = cache
+        self.classifier = classifier
+        self.min_confidence = min_confidence
+        self.label_log_size = label_log_size
+        self.keyword_rules = keyword_rules
+        self.keyword_prerouting = keyword_prerouting
+        self.keyword_fallback = keyword_fallback
+        self.escalation = escalation
+        self.escalation_urgency = escalation_urgency
+        self.escalation_confidence = escalation_confidence
+        self.guard = guard
+        self.cascade_stats = CascadeStats()
 
         if llm:
             self.llm = llm
         else:
-            self.llm = ChatOpenAI(
-                model=settings.llm_model,
-                temperature=settings.llm_temperature,
-                api_key=settings.openai_api_key,
-                base_url=settings.openai_api_base if settings.openai_api_base != "https://api.openai.com/v1" else None,
-            )
+            self.llm = get_chat_model(settings.llm_model, settings.llm_temperature)
 
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", SEMANTIC_GATEWAY_SYSTEM),
@@ -41,11 +127,98 @@ class SemanticGatewayAgent:
 
         self.chain = self.prompt | self.llm | StrOutputParser()
 
+        self.batch_prompt = ChatPromptTemplate.from_messages([
+            ("system", SEMANTIC_GATEWAY_SYSTEM),
+            ("user", SEMANTIC_GATEWAY_BATCH_USER),
+        ])
+        self.batch_chain = self.batch_prompt | self.llm | StrOutputParser()
+        self.batcher = MicroBatcher(self._analyze_batch, batch_size, batch_wait_ms) if batch_size > 1 else None
+
     async def analyze(self, input: SemanticGatewayInput) -> SemanticGatewayOutput:
         """
         Analyze a message and return structured task information.
         """
-        response = await self.chain.ainvoke({
+        if self.keyword_rules and self.keyword_prerouting:
+            hint = self.keyword_rules.score(input.content)
+            # Only noise is decided by keywords alone; anything else may hide urgency
+            if hint and hint.urgency_score <= 1:
+                return self._from_keywords(input, hint)
+
+        if self.classifier:
+            prediction = self.classifier.predict_confident(input.content, input.sender, self.min_confidence)
+            if prediction:
+                return SemanticGatewayOutput(
+                    urgency_score=prediction.urgency_score,
+                    category=prediction.category,
+                    summary=input.content[:200],
+                    suggested_action="Review this message",
+                    confidence=round(prediction.confidence, 3),
+                )
+
+        if self.cache:
+            cached = await self.cache.get(input)
+            if cached:
+                return cached
+
+        try:
+            if self.batcher:
+                output, parsed = await self.batcher.submit(input.user_state, input)
+            else:
+                output, parsed = await self._analyze_one(input)
+        except Exception as e:
+            if not (self.keyword_fallback and (self.keyword_rules or self.classifier)):
+                raise
+            if isinstance(e, CircuitOpenError):
+                logger.debug("Gateway LLM circuit open, answering from local heuristics")
+            else:
+                logger.warning(f"Gateway LLM call failed, answering from local heuristics: {e!r}")
+            return self._degraded(input)
+
+        if self.escalation:
+            output, parsed = await self._cascade(input, output, parsed)
+
+        # The malformed-JSON fallback is a guess, do not reuse it
+        if self.cache and parsed:
+            await self.cache.put(input, output)
+        if self.label_log_size and parsed:
+            from ..tools.base import get_async_redis_client
+            await log_label(get_async_redis_client(), input, output, self.label_log_size)
+        return output
+
+    def needs_escalation(self, output: SemanticGatewayOutput, parsed: bool = True) -> bool:
+        """Whether a first-tier answer is borderline enough for the larger model."""
+        low, high = self.escalation_urgency
+        return (
+            not parsed
+            or low <= output.urgency_score <= high
+            or (output.confidence is not None and output.confidence < self.escalation_confidence)
+        )
+
+    async def _cascade(
+        self,
+        input: SemanticGatewayInput,
+        output: SemanticGatewayOutput,
+        parsed: bool,
+    ) -> Tuple[SemanticGatewayOutput, bool]:
+        self.cascade_stats.first_tier += 1
+        if not self.needs_escalation(output, parsed):
+            return output, parsed
+
+        self.cascade_stats.escalated += 1
+        try:
+            escalated, escalated_parsed = await self.escalation._analyze_one(input)
+        except Exception as e:
+            self.cascade_stats.failed += 1
+            logger.warning(f"Gateway escalation failed, keeping the first-tier answer: {e}")
+            return output, parsed
+        # A malformed escalation answer is no better than a parsed first-tier one
+        if escalated_parsed or not parsed:
+            return escalated, escalated_parsed
+        return output, parsed
+
+    async def _analyze_one(self, input: SemanticGatewayInput) -> Tuple[SemanticGatewayOutput, bool]:
+        """One LLM call for one message; returns the analysis and whether the JSON parsed."""
+        response = await self._invoke(self.chain, {
             "user_state": input.user_state,
             "sender": input.sender,
             "content": input.content,
@@ -53,18 +226,68 @@ class SemanticGatewayAgent:
 
         # Parse JSON response
         try:
-            data = json.loads(response)
+            return self._to_output(json.loads(response)), True
         except json.JSONDecodeError:
             # Fallback for malformed JSON
-            data = {
+            return self._to_output({
                 "urgency_score": 5,
                 "category": "standard",
                 "summary": input.content[:200],
                 "suggested_action": "Review this message",
                 "estimated_time_minutes": 15,
                 "context_tags": [],
-            }
+            }), False
+
+    async def _analyze_batch(
+        self,
+        user_state: Hashable,
+        inputs: List[SemanticGatewayInput],
+    ) -> List[Tuple[SemanticGatewayOutput, bool]]:
+        """One LLM call for several messages of the same user state."""
+        if len(inputs) == 1:
+            return [await self._analyze_one(inputs[0])]
+
+        response = await self._invoke(self.batch_chain, {
+            "user_state": user_state,
+            "count": len(inputs),
+            "messages": "\n".join(
+                SEMANTIC_GATEWAY_BATCH_ITEM.format(id=i, sender=m.sender, user_state=m.user_state, content=m.content)
+                for i, m in enumerate(inputs, 1)
+            ),
+        })
+
+        results: List[Optional[Tuple[SemanticGatewayOutput, bool]]] = [None] * len(inputs)
+        try:
+            items = json.loads(response)
+        except json.JSONDecodeError:
+            items = []
+        if isinstance(items, list):
+            for position, data in enumerate(items):
+                if not isinstance(data, dict):
+                    continue
+                index = data.get("id", position + 1)
+                if isinstance(index, int) and 1 <= index <= len(inputs) and results[index - 1] is None:
+                    try:
+                        results[index - 1] = (self._to_output(data), True)
+                    except (ValueError, TypeError):
+                        pass
 
+        # Anything the batch answer missed is analyzed on its own
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            self.batcher.stats.fallbacks += len(missing)
+            logger.warning(f"Gateway batch answered {len(inputs) - len(missing)}/{len(inputs)}, analyzing the rest one by one")
+            for i, result in zip(missing, await asyncio.gather(*(self._analyze_one(inputs[i]) for i in missing))):
+                results[i] = result
+        return results
+
+    async def _invoke(self, chain: Runnable, inputs: dict) -> Any:
+        if self.guard:
+            return await self.guard.call(lambda: chain.ainvoke(inputs))
+        return await chain.ainvoke(inputs)
+
+    @staticmethod
+    def _to_output(data: dict) -> SemanticGatewayOutput:
         return SemanticGatewayOutput(
             urgency_score=data.get("urgency_score", 5),
             category=data.get("category", "standard"),
@@ -72,14 +295,109 @@ class SemanticGatewayAgent:
             suggested_action=data.get("suggested_action", "")[:300],
             estimated_time_minutes=data.get("estimated_time_minutes", 15),
             context_tags=data.get("context_tags", []),
+            confidence=_confidence(data.get("confidence")),
+        )
+
+    def _from_keywords(
+        self,
+        input: SemanticGatewayInput,
+        hint: Optional[KeywordHint],
+        degraded: bool = False,
+    ) -> SemanticGatewayOutput:
+        """Analysis from the keyword rules (standard urgency if nothing matched)."""
+        score = hint.urgency_score if hint else 5
+        return SemanticGatewayOutput(
+            urgency_score=score,
+            category=category_for_score(score),
+            summary=input.content[:200],
+            suggested_action="Review this message",
+            context_tags=(["degraded"] if degraded else []) + (hint.matches if hint else []),
         )
 
+    def _degraded(self, input: SemanticGatewayInput) -> SemanticGatewayOutput:
+        """Analysis without the LLM: keyword rules first, then the classifier's best guess."""
+        hint = self.keyword_rules.score(input.content) if self.keyword_rules else None
+        if hint is None and self.classifier:
+            prediction = self.classifier.predict(input.content, input.sender)
+            return SemanticGatewayOutput(
+                urgency_score=prediction.urgency_score,
+                category=prediction.category,
+                summary=input.content[:200],
+                suggested_action="Review this message",
+                context_tags=["degraded"],
+                confidence=round(prediction.confidence, 3),
+            )
+        return self._from_keywords(input, hint, degraded=True)
+
     def analyze_sync(self, input: SemanticGatewayInput) -> SemanticGatewayOutput:
         """Synchronous version of analyze."""
         import asyncio
         return asyncio.run(self.analyze(input))
 
 
+def _confidence(value) -> Optional[float]:
+    """Self-reported confidence, if the model gave a usable one."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value) if 0 <= value <= 1 else None
+
+
 def create_semantic_gateway(llm: Optional[ChatOpenAI] = None) -> SemanticGatewayAgent:
     """Factory function to create SemanticGatewayAgent."""
     return SemanticGatewayAgent(llm)
+
+
+@lru_cache(maxsize=8)
+def get_semantic_gateway(model: str, escalation_model: str = "") -> SemanticGatewayAgent:
+    """
+    Get the shared gateway (prompt | llm | parser chain) for `model`.
+
+    Cached if Redis is configured, with the local classifier in front if
+    gateway_classifier_path is set, the keyword rules for pre-routing
+    and degraded mode, and micro-batched if gateway_batch_size > 1.
+    LLM calls have the configured deadline, hedging and circuit breaker.
+    Borderline answers go to `escalation_model` if it is set.
+    """
+    settings = get_settings()
+    escalation = None
+    cascade = ""
+    if escalation_model and escalation_model != model:
+        escalation = SemanticGatewayAgent(
+            get_chat_model(escalation_model, settings.llm_temperature),
+            guard=create_llm_guard(),
+        )
+        cascade = (
+            f":{escalation_model}:{settings.gateway_escalation_min_urgency}-"
+            f"{settings.gateway_escalation_max_urgency}:{settings.gateway_escalation_confidence}"
+        )
+
+    cache = None
+    if settings.gateway_cache_enabled and settings.is_redis_configured:
+        cache = GatewayCache(
+            version=hashlib.sha1(f"{model}:{settings.llm_temperature}:{PROMPT_VERSION}{cascade}".encode()).hexdigest()[:12],
+            ttl=settings.gateway_cache_ttl,
+            max_entries=settings.gateway_cache_max_entries,
+            similarity_threshold=settings.gateway_cache_similarity,
+        )
+    classifier = None
+    if settings.gateway_classifier_path:
+        try:
+            classifier = UrgencyClassifier.load(settings.gateway_classifier_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Urgency classifier not loaded, using the LLM only: {e}")
+    return SemanticGatewayAgent(
+        get_chat_model(model, settings.llm_temperature),
+        cache=cache,
+        classifier=classifier,
+        min_confidence=settings.gateway_classifier_confidence,
+        label_log_size=settings.gateway_label_log_size if settings.is_redis_configured else 0,
+        keyword_rules=get_keyword_rules(),
+        keyword_prerouting=settings.keyword_prerouting,
+        keyword_fallback=settings.keyword_fallback_enabled,
+        batch_size=settings.gateway_batch_size,
+        batch_wait_ms=settings.gateway_batch_wait_ms,
+        escalation=escalation,
+        escalation_urgency=(settings.gateway_escalation_min_urgency, settings.gateway_escalation_max_urgency),
+        escalation_confidence=settings.gateway_escalation_confidence,
+        guard=create_llm_guard(),
+    )
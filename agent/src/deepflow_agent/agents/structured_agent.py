@@ -0,0 +1,148 @@
+"""
+Structured Decision Agent
+
+Single-call alternative to the two-phase path (semantic gateway, then
+the rule planner or ReAct agent).
+
+One schema-constrained LLM call returns the analysis fields together with
+the tool actions to take (StructuredDecision). to_plan() turns the
+actions into an ActionPlan, filling in the user, source and recipient
+locally, and planner.execute_plan() runs it. Selected with
+AGENT_MODE=single_call; scripts/evaluate_modes.py compares both paths.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate
+
+from ..config import get_settings
+from ..models import SemanticGatewayInput, SemanticGatewayOutput, StructuredDecision
+from ..prompts import STRUCTURED_DECISION_SYSTEM, STRUCTURED_DECISION_USER
+from .llm import get_chat_model
+from .planner import QUEUE_SOURCES, REPLY_CHANNELS, ActionPlan, PlannedAction
+from .resilience import LLMGuard, create_llm_guard
+
+
+class StructuredDecisionAgent:
+    """
+    Agent that analyzes a message and picks its actions in one LLM call.
+
+    Usage:
+        agent = get_structured_agent(settings.model_for("agent"))
+        decision = await agent.decide(SemanticGatewayInput(...))
+        plan = to_plan(decision, user_id, user_state, sender, source)
+    """
+
+    def __init__(self, llm: Optional[ChatOpenAI] = None, guard: Optional[LLMGuard] = None):
+        settings = get_settings()
+        self.llm = llm or get_chat_model(settings.model_for("agent"), settings.llm_temperature)
+        self.guard = guard
+
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", STRUCTURED_DECISION_SYSTEM),
+            ("user", STRUCTURED_DECISION_USER),
+        ])
+
+        # Function calling works on any OpenAI-compatible endpoint, unlike
+        # strict json_schema response formats
+        self.chain = self.prompt | self.llm.with_structured_output(
+            StructuredDecision, method="function_calling"
+        )
+
+    async def decide(self, input: SemanticGatewayInput, source: Optional[str] = None) -> StructuredDecision:
+        """
+        Analyze a message and choose its tool actions.
+
+        `source` overrides input.source for channels outside TaskSource
+        (e.g. telegram).
+        """
+        inputs = {
+            "user_state": input.user_state,
+            "sender": input.sender,
+            "source": source or input.source.value,
+            "content": input.content,
+        }
+        if self.guard:
+            return await self.guard.call(lambda: self.chain.ainvoke(inputs))
+        return await self.chain.ainvoke(inputs)
+
+
+def to_analysis(decision: StructuredDecision) -> SemanticGatewayOutput:
+    """The analysis part of a decision, shaped like the gateway's output."""
+    return SemanticGatewayOutput(
+        urgency_score=decision.urgency_score,
+        category=decision.category,
+        summary=decision.summary[:200],
+        suggested_action=decision.suggested_action[:300],
+        estimated_time_minutes=decision.estimated_time_minutes,
+        context_tags=decision.context_tags,
+    )
+
+
+def to_plan(
+    decision: StructuredDecision,
+    user_id: str,
+    user_state: str,
+    sender: str,
+    source: str,
+    source_id: str = "",
+    content: str = "",
+    reply_to: str = "",
+) -> ActionPlan:
+    """
+    Turn the model's actions into tool calls for execute_plan().
+
+    Each tool runs at most once. Routing arguments come from the message,
+    never from the model: the auto-reply goes to `reply_to` (the sender if
+    empty), and is dropped for sources that cannot be replied to.
+    """
+    actions = []
+    seen = set()
+    for action in decision.actions:
+        if action.tool in seen:
+            continue
+        seen.add(action.tool)
+
+        if action.tool == "add_to_queue":
+            actions.append(PlannedAction("add_to_queue", {
+                "user_id": user_id,
+                "task_summary": (action.task_summary or decision.summary)[:200],
+                "urgency_score": decision.urgency_score,
+                "category": decision.category,
+                "source": source if source in QUEUE_SOURCES else "manual",
+                "source_id": source_id,
+                "estimated_minutes": action.estimated_minutes,
+            }))
+        elif action.tool == "send_telegram_notification":
+            actions.append(PlannedAction("send_telegram_notification", {
+                "user_id": user_id,
+                "title": action.title,
+                "body": action.body[:200],
+                "urgency": action.urgency,
+            }))
+        elif action.tool == "send_auto_reply" and source in REPLY_CHANNELS:
+            actions.append(PlannedAction("send_auto_reply", {
+                "channel": source,
+                "recipient": reply_to or sender,
+                "message": action.message,
+                "original_msg_id": source_id,
+                "sender_name": sender,
+                "incoming_content": content,
+                "urgency_score": decision.urgency_score,
+                "user_state": user_state,
+            }))
+
+    return ActionPlan(rule=f"single_call:{decision.category}", actions=actions)
+
+
+def create_structured_agent(llm: Optional[ChatOpenAI] = None) -> StructuredDecisionAgent:
+    """Factory function to create StructuredDecisionAgent."""
+    return StructuredDecisionAgent(llm)
+
+
+@lru_cache(maxsize=8)
+def get_structured_agent(model: str) -> StructuredDecisionAgent:
+    """Get the shared structured decision chain for `model`."""
+    return StructuredDecisionAgent(get_chat_model(model, get_settings().llm_temperature), guard=create_llm_guard())
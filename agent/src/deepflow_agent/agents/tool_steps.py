@@ -0,0 +1,232 @@
+"""
+Tool Step Execution
+
+Concurrent execution of the tool calls of one agent step.
+
+When the model asks for several tools in one step (typically
+add_to_queue together with send_telegram_notification) the calls are
+independent REST round trips, so they run together and the step costs
+as much as its slowest tool. TOOL_DEPENDENCIES is the allowlist of
+calls that must wait for another tool of the same step to finish.
+
+- run_step() runs a list of calls this way (used by the rule planner).
+- ToolStepMiddleware applies the same ordering inside the ReAct agent,
+  whose tool node already starts a step's calls concurrently.
+
+Both report a StepTiming per step to the list opened with
+record_tool_steps(), which process_message returns as "tool_steps".
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple
+
+from langchain.agents.middleware import AgentMiddleware
+
+# tool -> tools of the same step it has to run after
+TOOL_DEPENDENCIES: Dict[str, FrozenSet[str]] = {
+    # A status change may refer to the task queued in the same step
+    "update_task_status": frozenset({"add_to_queue"}),
+    # The browser push is the fallback channel for Telegram
+    "send_browser_notification": frozenset({"send_telegram_notification"}),
+}
+
+_step_log: ContextVar[Optional[List["StepTiming"]]] = ContextVar("tool_step_log", default=None)
+
+
+def step_dependencies(
+    names: Sequence[str],
+    depends_on: Dict[str, FrozenSet[str]] = TOOL_DEPENDENCIES,
+) -> List[List[int]]:
+    """For each call of a step, the indexes of earlier calls it must wait for."""
+    return [
+        [j for j in range(i) if names[j] in depends_on.get(name, ())]
+        for i, name in enumerate(names)
+    ]
+
+
+@dataclass
+class ToolTiming:
+    """When one tool call of a step ran, in ms from the start of the step."""
+
+    name: str
+    id: str
+    start_ms: float
+    end_ms: float
+    waited_ms: float = 0.0  # time spent waiting for dependencies
+
+    @property
+    def elapsed_ms(self) -> float:
+        return round(self.end_ms - self.start_ms, 1)
+
+
+@dataclass
+class StepTiming:
+    """Wall-clock breakdown of one step."""
+
+    wall_ms: float
+    tools: List[ToolTiming] = field(default_factory=list)
+
+    @property
+    def serial_ms(self) -> float:
+        """What the step would have taken with the calls one after another."""
+        return round(sum(t.elapsed_ms for t in self.tools), 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "wall_ms": self.wall_ms,
+            "serial_ms": self.serial_ms,
+            "tools": [{**asdict(t), "elapsed_ms": t.elapsed_ms} for t in self.tools],
+        }
+
+
+@contextmanager
+def record_tool_steps() -> Iterator[List[StepTiming]]:
+    """Collect the StepTiming of every step run in this context."""
+    steps: List[StepTiming] = []
+    token = _step_log.set(steps)
+    try:
+        yield steps
+    finally:
+        _step_log.reset(token)
+
+
+def _report(step: StepTiming) -> None:
+    steps = _step_log.get()
+    if steps is not None:
+        steps.append(step)
+
+
+def _ms(since: float, now: float) -> float:
+    return round((now - since) * 1000, 1)
+
+
+async def run_step(
+    calls: Sequence[Dict[str, Any]],
+    invoke: Callable[[Dict[str, Any]], Awaitable[Any]],
+    depends_on: Dict[str, FrozenSet[str]] = TOOL_DEPENDENCIES,
+) -> Tuple[List[Any], StepTiming]:
+    """
+    Run one step's tool calls concurrently, respecting depends_on.
+
+    Args:
+        calls: Tool calls with at least "name" and "id"
+        invoke: Coroutine function running one call; a dependent call
+            still runs when the call it waits for fails
+
+    Returns:
+        The results in call order, and the step's timing
+    """
+    started = time.perf_counter()
+    deps = step_dependencies([call["name"] for call in calls], depends_on)
+    timings: List[Optional[ToolTiming]] = [None] * len(calls)
+    tasks: List[asyncio.Future] = []
+
+    async def run(index: int) -> Any:
+        ready = time.perf_counter()
+        if deps[index]:
+            await asyncio.wait([tasks[j] for j in deps[index]])
+        begin = time.perf_counter()
+        try:
+            return await invoke(calls[index])
+        finally:
+            timings[index] = ToolTiming(
+                name=calls[index]["name"],
+                id=calls[index]["id"],
+                start_ms=_ms(started, begin),
+                end_ms=_ms(started, time.perf_counter()),
+                waited_ms=_ms(ready, begin),
+            )
+
+    # Dependencies always point at earlier calls, whose tasks already exist
+    for index in range(len(calls)):
+        tasks.append(asyncio.ensure_future(run(index)))
+    results = list(await asyncio.gather(*tasks)) if tasks else []
+
+    step = StepTiming(wall_ms=_ms(started, time.perf_counter()), tools=list(timings))
+    _report(step)
+    return results, step
+
+
+@dataclass
+class _Step:
+    """A step in flight in ToolStepMiddleware."""
+
+    started: float
+    index: Dict[str, int]
+    names: List[str]
+    deps: List[List[int]]
+    done: List[asyncio.Event]
+    timings: List[Optional[ToolTiming]]
+    remaining: int
+
+
+class ToolStepMiddleware(AgentMiddleware):
+    """
+    Order dependent tool calls of a ReAct step and record its timing.
+
+    The agent's tool node runs every call of a step as its own concurrent
+    task; this middleware holds a call back until the calls it depends on
+    (per TOOL_DEPENDENCIES) have finished.
+    """
+
+    def __init__(self, depends_on: Dict[str, FrozenSet[str]] = TOOL_DEPENDENCIES):
+        super().__init__()
+        self.depends_on = depends_on
+        # Keyed by the step's first pending tool call ID, unique across runs
+        self._steps: Dict[str, _Step] = {}
+
+    def _step_for(self, request) -> Tuple[str, _Step]:
+        call_id = request.tool_call["id"]
+        messages = request.state.get("messages", []) if isinstance(request.state, dict) else []
+        answered = {getattr(m, "tool_call_id", None) for m in messages if getattr(m, "type", "") == "tool"}
+        pending = [request.tool_call]
+        for message in reversed(messages):
+            if getattr(message, "type", "") == "ai" and any(c["id"] == call_id for c in message.tool_calls):
+                pending = [c for c in message.tool_calls if c["id"] not in answered]
+                break
+
+        key = pending[0]["id"]
+        step = self._steps.get(key)
+        if step is None:
+            names = [c["name"] for c in pending]
+            step = self._steps[key] = _Step(
+                started=time.perf_counter(),
+                index={c["id"]: i for i, c in enumerate(pending)},
+                names=names,
+                deps=step_dependencies(names, self.depends_on),
+                done=[asyncio.Event() for _ in pending],
+                timings=[None] * len(pending),
+                remaining=len(pending),
+            )
+        return key, step
+
+    async def awrap_tool_call(self, request, handler):
+        key, step = self._step_for(request)
+        index = step.index[request.tool_call["id"]]
+
+        ready = time.perf_counter()
+        for j in step.deps[index]:
+            await step.done[j].wait()
+        begin = time.perf_counter()
+        try:
+            return await handler(request)
+        finally:
+            step.timings[index] = ToolTiming(
+                name=step.names[index],
+                id=request.tool_call["id"],
+                start_ms=_ms(step.started, begin),
+                end_ms=_ms(step.started, time.perf_counter()),
+                waited_ms=_ms(ready, begin),
+            )
+            step.done[index].set()
+            step.remaining -= 1
+            if step.remaining == 0:
+                del self._steps[key]
+                _report(StepTiming(
+                    wall_ms=_ms(step.started, time.perf_counter()),
+                    tools=list(step.timings),
+                ))
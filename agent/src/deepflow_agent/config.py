@@ -5,7 +5,7 @@ Supports OpenAI-compatible API endpoints.
 """
 
 from functools import lru_cache
-from typing import Optional
+from typing import Dict, Literal, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -26,6 +26,53 @@ class Settings(BaseSettings):
     llm_model: str = "gpt-4-turbo"
     llm_temperature: float = 0.0
 
+    # Per-task models (empty = llm_model)
+    gateway_model: str = ""  # first tier of the semantic gateway, e.g. a small fast model
+    agent_model: str = ""  # ReAct agent and single-call decisions
+    negotiator_model: str = ""  # auto-replies
+
+    # Semantic Gateway Cascade: re-analyze borderline first-tier answers with a larger model
+    gateway_escalation_model: str = ""  # empty = no cascade
+    gateway_escalation_min_urgency: int = 6  # urgency band where notify decisions flip
+    gateway_escalation_max_urgency: int = 9
+    gateway_escalation_confidence: float = 0.7  # escalate when the first tier reports less confidence
+
+    # Agent
+    agent_rule_planner: bool = True  # run rule-covered cases without the ReAct loop
+    agent_mode: Literal["two_phase", "single_call"] = "two_phase"  # single_call: one structured LLM call
+
+    # Semantic Gateway Cache (needs Upstash Redis)
+    gateway_cache_enabled: bool = True
+    gateway_cache_ttl: int = 86400  # seconds a cached analysis is reused
+    gateway_cache_max_entries: int = 10000  # LRU bound per gateway version
+    gateway_cache_similarity: float = 0.95  # SimHash similarity for near-duplicates (1.0 = exact only)
+
+    # Semantic Gateway Micro-batching
+    gateway_batch_size: int = 1  # >1: analyze up to N concurrent messages in one LLM call
+    gateway_batch_wait_ms: float = 20.0  # how long a message waits for others to join its batch
+
+    # Local Urgency Classifier (first tier in front of the gateway LLM), off by default:
+    # the golden data alone is too small for it to answer anything at 0.9 (see urgency_classifier.py)
+    gateway_classifier_path: str = ""  # artifact from scripts/train_classifier.py; empty = disabled
+    gateway_classifier_confidence: float = 0.9  # category probability needed to skip the LLM
+    gateway_label_log_size: int = 0  # keep the last N LLM analyses in Redis as training labels (0 = off)
+
+    # Keyword Rules (see keyword_rules.py)
+    keyword_rules_path: str = ""  # JSON rules file, shared with backend triage; empty = built-in rules
+    keyword_rules_reload_seconds: float = 5.0  # how often the file is checked for changes
+    keyword_prerouting: bool = False  # answer discard-only keyword matches without the gateway LLM
+    keyword_fallback_enabled: bool = True  # degraded mode: keyword answer when the gateway LLM fails
+
+    # LLM Call Resilience (see agents/resilience.py)
+    llm_call_timeout: float = 30.0  # seconds before an LLM call is abandoned (0 = no deadline)
+    llm_hedge_enabled: bool = False  # fire a second request after the p95 latency, take the first answer
+    llm_hedge_min_samples: int = 20  # latencies needed before the p95 is trusted
+    llm_breaker_enabled: bool = True
+    llm_breaker_failure_rate: float = 0.5  # error rate that opens the breaker
+    llm_breaker_window: int = 20  # recent calls the error rate is measured over
+    llm_breaker_min_calls: int = 10  # calls needed before the breaker can open
+    llm_breaker_cooldown: float = 30.0  # seconds open before a probe call is let through
+
     # Opik
     opik_api_key: str = ""
     opik_project_name: str = "DeepFlow"
@@ -35,6 +82,29 @@ class Settings(BaseSettings):
     upstash_redis_rest_url: str = ""
     upstash_redis_rest_token: str = ""
 
+    # Native Redis (TCP, optional) - same database, used for blocking fetch
+    redis_url: str = ""
+
+    # Signal Worker
+    worker_concurrency: int = 20  # signals processed in parallel
+    worker_signal_timeout: float = 120.0  # seconds per signal
+    worker_stats_interval: float = 60.0  # seconds between stats log lines
+    worker_processes: int = 1  # local worker processes (main.py --workers)
+    worker_visibility_timeout: int = 300  # seconds before a dead worker's signals are re-queued
+    worker_reap_interval: float = 60.0  # seconds between reaper sweeps
+    worker_fetch_mode: Literal["poll", "blocking"] = "poll"  # blocking needs REDIS_URL
+    worker_poll_min_interval: float = 0.05  # poll delay right after work
+    worker_poll_max_interval: float = 5.0  # poll delay ceiling while idle
+    worker_block_timeout: float = 5.0  # doorbell BLPOP timeout in blocking mode
+    worker_max_attempts: int = 5  # attempts before a signal is dead-lettered
+    worker_retry_base_delay: float = 2.0  # seconds, doubled per attempt
+    worker_retry_max_delay: float = 300.0  # backoff ceiling in seconds
+    worker_retry_check_interval: float = 30.0  # longest sleep between checks for due retries
+    worker_user_max_in_flight: int = 2  # claimed but unfinished signals per user per worker
+    worker_user_weights: str = ""  # fair-share weights, e.g. "alice=2,bulk-bot=0.5"
+    worker_noisy_user_backlog: int = 100  # warn when one user has this many waiting signals
+    worker_shutdown_timeout: float = 25.0  # seconds in-flight signals get to finish on SIGTERM
+
     # Slack Integration
     slack_bot_token: str = ""
     slack_signing_secret: str = ""
@@ -49,6 +119,10 @@ class Settings(BaseSettings):
     flow_state_threshold: int = 9
     shallow_state_threshold: int = 6
 
+    def model_for(self, task: Literal["gateway", "agent", "negotiator"]) -> str:
+        """Model for a task: its own setting, or llm_model."""
+        return getattr(self, f"{task}_model") or self.llm_model
+
     @property
     def is_opik_configured(self) -> bool:
         return bool(self.opik_api_key)
@@ -65,6 +139,15 @@ class Settings(BaseSettings):
     def is_slack_configured(self) -> bool:
         return bool(self.slack_bot_token)
 
+    @property
+    def worker_user_weights_map(self) -> Dict[str, float]:
+        weights = {}
+        for entry in self.worker_user_weights.split(","):
+            user, _, weight = entry.partition("=")
+            if user.strip() and weight.strip():
+                weights[user.strip()] = float(weight)
+        return weights
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -0,0 +1,68 @@
+"""
+DeepFlow Signal Contract
+
+Names and rules the backend and the agent must agree on: the Redis keys
+of the signal lanes, the keyword rules that pick a signal's lane, and the
+channel and payloads of per-user change events.
+
+The backend and the agent are deployed from separate root directories,
+so this package is kept as an identical copy in both
+(deepflow_backend/contract and deepflow_agent/contract). Edit one copy,
+copy it over; the backend test suite fails while the two differ.
+"""
+
+from .events import (
+    QUEUE_EVENT,
+    STATE_EVENT,
+    USER_EVENTS_CHANNEL_PREFIX,
+    encode_event,
+    queue_diff,
+    state_event,
+    user_events_channel,
+)
+from .keywords import (
+    DEFAULT_RULES,
+    HIGH_LEVEL,
+    AhoCorasick,
+    KeywordHint,
+    KeywordRules,
+    KeywordRuleSet,
+)
+from .lanes import (
+    DEFAULT_LANE,
+    DEFAULT_USER,
+    DOORBELL_KEY,
+    DOORBELL_MAX,
+    LANES,
+    PENDING_KEY,
+    lane_for_urgency,
+    lane_key,
+    lane_users_key,
+    user_queue_key,
+)
+
+__all__ = [
+    "QUEUE_EVENT",
+    "STATE_EVENT",
+    "USER_EVENTS_CHANNEL_PREFIX",
+    "encode_event",
+    "queue_diff",
+    "state_event",
+    "user_events_channel",
+    "DEFAULT_RULES",
+    "HIGH_LEVEL",
+    "AhoCorasick",
+    "KeywordHint",
+    "KeywordRules",
+    "KeywordRuleSet",
+    "DEFAULT_LANE",
+    "DEFAULT_USER",
+    "DOORBELL_KEY",
+    "DOORBELL_MAX",
+    "LANES",
+    "PENDING_KEY",
+    "lane_for_urgency",
+    "lane_key",
+    "lane_users_key",
+    "user_queue_key",
+]
@@ -0,0 +1,47 @@
+"""
+User Events
+
+Channel and payloads of the per-user change events the backend relays to
+a user's WebSocket connections (queue diffs, state changes).
+
+The backend's Redis managers and the agent's queue tools both publish
+them, so the channel name and event shapes live here; each side only
+supplies its own Redis client.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+USER_EVENTS_CHANNEL_PREFIX = "user_events:"
+
+QUEUE_EVENT = "queue"
+STATE_EVENT = "state"
+
+
+def user_events_channel(user_id: str) -> str:
+    """Pub/sub channel of one user's change events."""
+    return f"{USER_EVENTS_CHANNEL_PREFIX}{user_id}"
+
+
+def encode_event(event: Dict[str, Any]) -> str:
+    """Wire format of a change event."""
+    return json.dumps(event)
+
+
+def queue_diff(
+    added: Optional[Iterable[Tuple[str, float]]] = None,
+    removed: Optional[Iterable[str]] = None,
+    reordered: Optional[Iterable[Tuple[str, float]]] = None,
+) -> Dict[str, Any]:
+    """Build a queue change event from (task_id, score) pairs and removed IDs."""
+    return {
+        "type": QUEUE_EVENT,
+        "added": [{"task_id": tid, "score": score} for tid, score in added or []],
+        "removed": list(removed or []),
+        "reordered": [{"task_id": tid, "score": score} for tid, score in reordered or []],
+    }
+
+
+def state_event(state: str) -> Dict[str, Any]:
+    """Build a focus state change event."""
+    return {"type": STATE_EVENT, "state": state}
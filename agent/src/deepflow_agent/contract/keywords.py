@@ -0,0 +1,229 @@
+"""
+Keyword Rules
+
+Multilingual urgency keywords compiled into one Aho-Corasick automaton,
+so a message is scored in a single pass however many keywords there are.
+
+The default rules are the keyword lists of the agent's optimized gateway
+prompts plus the backend's ingestion keywords, each keyword at the urgency
+level the prompt's scale gives it. A message's hint is the highest matched
+level if any keyword of level 6 or more matched, otherwise the lowest
+matched level; a match inside a longer match is ignored, so "不緊急" does
+not count as "緊急". ASCII keywords only match whole words ("p0" does not
+match "p0wer").
+
+Rules can be replaced by a JSON file:
+
+    {"rules": [{"urgency": 9, "keywords": ["緊急", "urgent"]}, ...]}
+
+KeywordRules checks the file for changes at most every `reload_seconds`
+and recompiles it on change; a broken file keeps the previous rules.
+"""
+
+import json
+import logging
+import os
+import time
+import unicodedata
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .lanes import HIGH_URGENCY, lane_for_urgency
+
+logger = logging.getLogger(__name__)
+
+# Urgency level -> keywords (lowercase; matched case-insensitively)
+DEFAULT_RULES: Dict[int, List[str]] = {
+    10: ["系統掛掉", "系統掛了", "線上掛了", "legal emergency", "health crisis", "critical infrastructure"],
+    9: [
+        "緊急", "urgent", "p0", "asap", "馬上", "掛了", "系統掛", "is down", "went down", "are down",
+        "outage", "security breach", "五分鐘內", "老闆緊急",
+        "production down", "prod down", "sev1", "sev-1", "sev 1", "incident", "data breach", "data loss",
+        "pagerduty",
+    ],
+    8: [
+        "critical", "blocking", "blocked", "blocker", "阻塞", "客戶威脅取消", "prod bug", "production bug",
+        "線上問題", "客戶抱怨", "escalation", "老闆", "ceo", "investor", "投資人", "高層",
+        "escalate", "escalated", "customer complaint", "p1", "sev2",
+    ],
+    7: ["production", "production上", "deadline", "deployment failed", "ci failed", "即將到期", "30分鐘", "within hours",
+        "by tomorrow",
+    ],
+    6: ["今天", "today", "eod", "今天結束前"],
+    3: ["fyi", "供參考", "政策更新", "不急", "不緊急", "not urgent", "no rush", "when you can", "有空", "方便時"],
+    2: ["聚餐", "lunch", "social", "happy hour"],
+    1: ["newsletter", "廣告", "免費", "垃圾郵件", "unsubscribe", "webinar", "promotion", "digest", "weekly update"],
+}
+
+# Levels at or above this dominate lower matches ("FYI: prod is down" is urgent)
+HIGH_LEVEL = HIGH_URGENCY
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isascii() and (char.isalnum() or char == "_")
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a fixed keyword list.
+
+    Usage:
+        automaton = AhoCorasick(["he", "she", "hers"])
+        for start, end, index in automaton.find("ushers"):
+            ...
+    """
+
+    def __init__(self, keywords: Sequence[str]):
+        self.keywords = list(keywords)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        # Breadth-first: failure links point at the longest proper suffix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Yield (start, end, keyword index) of every occurrence, overlaps included."""
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._out[state]:
+                yield position + 1 - len(self.keywords[index]), position + 1, index
+
+
+@dataclass
+class KeywordHint:
+    """Urgency suggested by the keyword rules."""
+
+    urgency_score: int
+    matches: List[str] = field(default_factory=list)
+
+    @property
+    def lane(self) -> str:
+        """Priority lane for this hint (see lanes.py)."""
+        return lane_for_urgency(self.urgency_score)
+
+
+class KeywordRuleSet:
+    """Compiled keyword -> urgency level rules."""
+
+    def __init__(self, rules: Dict[int, Iterable[str]]):
+        levels: Dict[str, int] = {}
+        for level, keywords in rules.items():
+            for keyword in keywords:
+                keyword = _normalize(keyword).strip()
+                if keyword:
+                    # A keyword listed twice keeps its highest level
+                    levels[keyword] = max(int(level), levels.get(keyword, 0))
+        self.levels = levels
+        self.automaton = AhoCorasick(list(levels))
+
+    @classmethod
+    def from_file(cls, path: str) -> "KeywordRuleSet":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        rules: Dict[int, List[str]] = {}
+        for rule in data["rules"]:
+            rules.setdefault(int(rule["urgency"]), []).extend(rule["keywords"])
+        return cls(rules)
+
+    def matches(self, text: str) -> List[str]:
+        """Keywords found in `text`, excluding matches inside a longer match."""
+        text = _normalize(text)
+        spans = []
+        for start, end, index in self.automaton.find(text):
+            keyword = self.automaton.keywords[index]
+            if _is_word_char(keyword[0]) and start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if _is_word_char(keyword[-1]) and end < len(text) and _is_word_char(text[end]):
+                continue
+            spans.append((start, end, keyword))
+
+        return [
+            keyword for start, end, keyword in spans
+            if not any(s <= start and end <= e and (e - s) > (end - start) for s, e, _ in spans)
+        ]
+
+    def score(self, text: str) -> Optional[KeywordHint]:
+        """Urgency hint for `text`, or None if no keyword matched."""
+        found = self.matches(text)
+        if not found:
+            return None
+        levels = [self.levels[k] for k in found]
+        high = [level for level in levels if level >= HIGH_LEVEL]
+        return KeywordHint(urgency_score=max(high) if high else min(levels), matches=sorted(set(found)))
+
+
+class KeywordRules:
+    """
+    Hot-reloadable keyword rules.
+
+    Usage:
+        rules = get_keyword_rules()
+        hint = rules.score(content)
+    """
+
+    def __init__(self, path: str = "", reload_seconds: float = 5.0):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._ruleset = KeywordRuleSet(DEFAULT_RULES)
+        self._mtime: Optional[int] = None
+        self._checked = 0.0
+        if path:
+            self.reload()
+
+    def reload(self) -> bool:
+        """Recompile the rules file if it changed; returns True when new rules are in use."""
+        self._checked = time.monotonic()
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return False
+            ruleset = KeywordRuleSet.from_file(self.path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Keyword rules not reloaded from {self.path}, keeping the current rules: {e}")
+            return False
+        # A single assignment, so concurrent readers see either the old or the new rules
+        self._ruleset, self._mtime = ruleset, mtime
+        logger.info(f"Loaded {len(ruleset.levels)} keyword rules from {self.path}")
+        return True
+
+    @property
+    def ruleset(self) -> KeywordRuleSet:
+        if self.path and time.monotonic() - self._checked >= self.reload_seconds:
+            self.reload()
+        return self._ruleset
+
+    def score(self, text: str) -> Optional[KeywordHint]:
+        """Urgency hint for `text`, or None if no keyword matched."""
+        return self.ruleset.score(text)
@@ -0,0 +1,54 @@
+"""
+Signal Lanes
+
+Redis keys of the urgency lanes signals are queued in.
+
+Producers (backend webhooks, agent retries) push a signal onto its user's
+queue in a lane, add the user to the lane's active-user set and ring the
+doorbell; workers claim from these keys. The "normal" lane keeps the
+original deepflow:signals:pending key as a shared list, so producers that
+do not classify or route per user keep working unchanged.
+"""
+
+PENDING_KEY = "deepflow:signals:pending"
+DOORBELL_KEY = "deepflow:signals:doorbell"
+DOORBELL_MAX = 100
+DEFAULT_USER = "default_user"
+
+# Highest priority first
+LANES = ["critical", "high", "normal", "low"]
+DEFAULT_LANE = "normal"
+
+# Keyword urgency at or above which a signal is "critical" / "high",
+# at or below which it is "low" (see keywords.py for the scale)
+CRITICAL_URGENCY = 9
+HIGH_URGENCY = 6
+LOW_URGENCY = 3
+
+
+def lane_key(lane: str) -> str:
+    """Redis list for a lane ("normal" is the legacy pending key)."""
+    if lane not in LANES or lane == DEFAULT_LANE:
+        return PENDING_KEY
+    return f"{PENDING_KEY}:{lane}"
+
+
+def user_queue_key(lane: str, user_id: str) -> str:
+    """Redis list holding one user's signals in a lane."""
+    return f"{lane_key(lane)}:user:{user_id}"
+
+
+def lane_users_key(lane: str) -> str:
+    """Redis set of users with signals waiting in a lane."""
+    return f"{lane_key(lane)}:users"
+
+
+def lane_for_urgency(urgency_score: int) -> str:
+    """Lane for a 1-10 urgency score."""
+    if urgency_score >= CRITICAL_URGENCY:
+        return "critical"
+    if urgency_score >= HIGH_URGENCY:
+        return "high"
+    if urgency_score <= LOW_URGENCY:
+        return "low"
+    return DEFAULT_LANE
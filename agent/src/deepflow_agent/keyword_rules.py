@@ -0,0 +1,44 @@
+"""
+Keyword Rules
+
+The agent's process-wide keyword rules (see contract/keywords.py for the
+rule format and matching).
+
+The backend triages incoming signals into lanes with the same rules, so
+KEYWORD_RULES_PATH should point both services at the same file.
+
+Used for:
+- priority lanes: signals enqueued without a lane (see worker/priority.py)
+- pre-routing: with keyword_prerouting, messages that only match
+  discard-level keywords (newsletters, ads) skip the gateway LLM
+- degraded mode: the gateway's answer when the LLM call fails
+"""
+
+from functools import lru_cache
+
+from .config import get_settings
+from .contract.keywords import (
+    DEFAULT_RULES,
+    HIGH_LEVEL,
+    AhoCorasick,
+    KeywordHint,
+    KeywordRules,
+    KeywordRuleSet,
+)
+
+__all__ = [
+    "DEFAULT_RULES",
+    "HIGH_LEVEL",
+    "AhoCorasick",
+    "KeywordHint",
+    "KeywordRules",
+    "KeywordRuleSet",
+    "get_keyword_rules",
+]
+
+
+@lru_cache
+def get_keyword_rules() -> KeywordRules:
+    """Get the process-wide keyword rules."""
+    settings = get_settings()
+    return KeywordRules(settings.keyword_rules_path, settings.keyword_rules_reload_seconds)
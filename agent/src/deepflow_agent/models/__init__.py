@@ -6,6 +6,10 @@ from .task import (
     NormalizedTask,
     SemanticGatewayInput,
     SemanticGatewayOutput,
+    QueueAction,
+    TelegramAction,
+    AutoReplyAction,
+    StructuredDecision,
     AutoNegotiatorOutput,
 )
 
@@ -15,5 +19,9 @@ __all__ = [
     "NormalizedTask",
     "SemanticGatewayInput",
     "SemanticGatewayOutput",
+    "QueueAction",
+    "TelegramAction",
+    "AutoReplyAction",
+    "StructuredDecision",
     "AutoNegotiatorOutput",
 ]
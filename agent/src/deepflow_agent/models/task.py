@@ -6,7 +6,7 @@ Pydantic models for normalized task representation.
 
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Annotated, List, Literal, Optional, Union
 from uuid import UUID, uuid4
 
 from pydantic import BaseModel, Field
@@ -70,6 +70,46 @@ class SemanticGatewayOutput(BaseModel):
     suggested_action: str = Field(max_length=300)
     estimated_time_minutes: int = Field(ge=1, default=15)
     context_tags: List[str] = Field(default_factory=list)
+    confidence: Optional[float] = Field(default=None, ge=0, le=1)  # self-reported, if any
+
+
+class QueueAction(BaseModel):
+    """Add the message to the user's priority queue."""
+    tool: Literal["add_to_queue"] = "add_to_queue"
+    task_summary: str
+    estimated_minutes: int = Field(ge=1, default=15)
+
+
+class TelegramAction(BaseModel):
+    """Push a Telegram notification to the user."""
+    tool: Literal["send_telegram_notification"] = "send_telegram_notification"
+    title: str
+    body: str
+    urgency: Literal["normal", "urgent", "critical"] = "normal"
+
+
+class AutoReplyAction(BaseModel):
+    """Reply to the sender on the user's behalf."""
+    tool: Literal["send_auto_reply"] = "send_auto_reply"
+    message: str = ""  # empty lets the tool write the reply
+
+
+class StructuredDecision(BaseModel):
+    """
+    Analysis and tool actions from a single schema-constrained LLM call.
+
+    Actions only carry what the model has to decide; user, source and
+    recipient are filled in locally before execution.
+    """
+    urgency_score: int = Field(ge=0, le=10)
+    category: Literal["critical", "urgent", "standard", "low", "discard"]
+    summary: str
+    suggested_action: str = ""
+    estimated_time_minutes: int = Field(ge=1, default=15)
+    context_tags: List[str] = Field(default_factory=list)
+    actions: List[
+        Annotated[Union[QueueAction, TelegramAction, AutoReplyAction], Field(discriminator="tool")]
+    ] = Field(default_factory=list)
 
 
 class AutoNegotiatorOutput(BaseModel):
@@ -1,11 +1,21 @@
 """Prompts package."""
 
-from .semantic_gateway import SEMANTIC_GATEWAY_SYSTEM, SEMANTIC_GATEWAY_USER
+from .semantic_gateway import (
+    SEMANTIC_GATEWAY_BATCH_ITEM,
+    SEMANTIC_GATEWAY_BATCH_USER,
+    SEMANTIC_GATEWAY_SYSTEM,
+    SEMANTIC_GATEWAY_USER,
+)
+from .structured_decision import STRUCTURED_DECISION_SYSTEM, STRUCTURED_DECISION_USER
 from .auto_negotiator import AUTO_NEGOTIATOR_SYSTEM, AUTO_NEGOTIATOR_USER
 
 __all__ = [
     "SEMANTIC_GATEWAY_SYSTEM",
     "SEMANTIC_GATEWAY_USER",
+    "SEMANTIC_GATEWAY_BATCH_USER",
+    "SEMANTIC_GATEWAY_BATCH_ITEM",
+    "STRUCTURED_DECISION_SYSTEM",
+    "STRUCTURED_DECISION_USER",
     "AUTO_NEGOTIATOR_SYSTEM",
     "AUTO_NEGOTIATOR_USER",
 ]
@@ -51,7 +51,8 @@ The user is in "{user_state}" state:
   "urgency_score": <int 0-10>,
   "category": "<critical|urgent|standard|low|discard>",
   "summary": "<brief summary in same language as input>",
-  "should_interrupt": <true/false based on urgency and user_state>
+  "should_interrupt": <true/false based on urgency and user_state>,
+  "confidence": <0.0-1.0, how sure you are of the urgency score>
 }}
 
 Be accurate. Misjudging urgency can either waste the user's focus time or cause them to miss critical issues.
@@ -67,3 +68,18 @@ Message:
 
 Respond with JSON only."""
 
+# Micro-batched analysis: SEMANTIC_GATEWAY_SYSTEM stays the system prompt,
+# sent once for the whole batch (all messages share the user state)
+SEMANTIC_GATEWAY_BATCH_USER = """Analyze each of these {count} messages independently:
+
+{messages}
+
+Respond with a JSON array only: one object per message, in the same order,
+in the response format above plus "id": <the message number>."""
+
+SEMANTIC_GATEWAY_BATCH_ITEM = """### Message {id}
+From: {sender}
+User State: {user_state}
+
+{content}
+"""
@@ -2,6 +2,8 @@
 DeepFlow Agent Tools Package
 
 This package contains custom tools for the ReAct agent to execute actions.
+The tools are coroutines (async Redis and HTTP clients); run them with
+`await tool.ainvoke(args)` so they never block the worker's event loop.
 """
 
 from .add_to_queue import add_to_queue
@@ -11,11 +11,12 @@ from typing import Literal
 
 from langchain.tools import tool
 
-from .base import get_redis_client, calculate_priority_score, tool_with_tracing
+from ..contract.events import queue_diff
+from .base import get_async_redis_client, calculate_priority_score, publish_user_event, tool_with_tracing
 
 
 @tool
-def add_to_queue(
+async def add_to_queue(
     user_id: str,
     task_summary: str,
     urgency_score: int,
@@ -42,7 +43,7 @@ def add_to_queue(
     Returns:
         Dict with task_id, position in queue, and queue length
     """
-    return _add_to_queue_impl(
+    return await _add_to_queue_impl(
         user_id=user_id,
         task_summary=task_summary,
         urgency_score=urgency_score,
@@ -54,7 +55,7 @@ def add_to_queue(
 
 
 @tool_with_tracing("add_to_queue")
-def _add_to_queue_impl(
+async def _add_to_queue_impl(
     user_id: str,
     task_summary: str,
     urgency_score: int,
@@ -64,7 +65,7 @@ def _add_to_queue_impl(
     estimated_minutes: int
 ) -> dict:
     """Internal implementation with Opik tracing."""
-    redis = get_redis_client()
+    redis = get_async_redis_client()
     
     # Generate task ID
     task_id = str(uuid.uuid4())
@@ -94,15 +95,16 @@ def _add_to_queue_impl(
     task_key = f"task:{task_id}"
     
     # Store task details
-    redis.set(task_key, json.dumps(task))
+    await redis.set(task_key, json.dumps(task))
     
     # Add to sorted set (higher score = higher priority)
-    redis.zadd(queue_key, {task_id: priority_score})
+    await redis.zadd(queue_key, {task_id: priority_score})
+    await publish_user_event(user_id, queue_diff(added=[(task_id, priority_score)]))
     
     # Get queue length and position
-    queue_length = redis.zcard(queue_key)
+    queue_length = await redis.zcard(queue_key)
     # Position is based on rank (0 = highest priority)
-    position = redis.zrevrank(queue_key, task_id)
+    position = await redis.zrevrank(queue_key, task_id)
     
     return {
         "task_id": task_id,
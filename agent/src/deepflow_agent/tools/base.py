@@ -2,20 +2,34 @@
 Base utilities for DeepFlow Agent Tools
 
 Provides common functionality for all tools including:
-- Redis client connection
+- Redis client connections (sync, and async for the tool coroutines)
+- Change events for live frontend connections
 - Opik tracing decoration
 - Error handling
 """
 
+import asyncio
+import inspect
+import logging
 import os
+import weakref
 from functools import wraps
 from typing import Any, Callable
 from opik import track
 from upstash_redis import Redis
+from upstash_redis.asyncio import Redis as AsyncRedis
+
+from ..contract.events import encode_event, user_events_channel
+
+logger = logging.getLogger(__name__)
 
 # Redis client singleton
 _redis_client: Redis | None = None
 
+# Async clients pool HTTP connections on the loop that created them, so
+# there is one per event loop
+_async_redis_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncRedis]" = weakref.WeakKeyDictionary()
+
 
 def get_redis_client() -> Redis:
     """Get or create Redis client singleton."""
@@ -34,16 +48,68 @@ def get_redis_client() -> Redis:
     return _redis_client
 
 
+def get_async_redis_client() -> AsyncRedis:
+    """Get or create the async Redis client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_redis_clients.get(loop)
+    if client is None:
+        redis_url = os.getenv("UPSTASH_REDIS_REST_URL")
+        redis_token = os.getenv("UPSTASH_REDIS_REST_TOKEN")
+        
+        if not redis_url or not redis_token:
+            raise ValueError(
+                "Redis not configured. Set UPSTASH_REDIS_REST_URL and UPSTASH_REDIS_REST_TOKEN"
+            )
+        
+        client = _async_redis_clients[loop] = AsyncRedis(url=redis_url, token=redis_token)
+    
+    return client
+
+
+async def publish_user_event(user_id: str, event: dict) -> None:
+    """
+    Publish a change event (queue diff, state change) for the user's open tabs.
+    
+    Best effort: the Redis write has already happened, so failures are
+    logged and never fail the tool.
+    """
+    try:
+        await get_async_redis_client().publish(user_events_channel(user_id), encode_event(event))
+    except Exception as e:
+        logger.warning(f"Failed to publish {event.get('type')} event for {user_id}: {e}")
+
+
 def tool_with_tracing(tool_name: str):
     """
     Decorator that adds Opik tracing to a tool function.
     
+    Works on plain functions and coroutine functions.
+    
     Usage:
         @tool_with_tracing("add_to_queue")
-        def add_to_queue(...):
+        async def add_to_queue(...):
             ...
     """
     def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            @track(name=f"tool_{tool_name}", tags=["tool", tool_name])
+            async def async_wrapper(*args, **kwargs) -> Any:
+                try:
+                    result = await func(*args, **kwargs)
+                    return {
+                        "success": True,
+                        "tool": tool_name,
+                        "result": result
+                    }
+                except Exception as e:
+                    return {
+                        "success": False,
+                        "tool": tool_name,
+                        "error": str(e)
+                    }
+            return async_wrapper
+        
         @wraps(func)
         @track(name=f"tool_{tool_name}", tags=["tool", tool_name])
         def wrapper(*args, **kwargs) -> Any:
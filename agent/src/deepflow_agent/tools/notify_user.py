@@ -10,11 +10,11 @@ from typing import Literal
 
 from langchain.tools import tool
 
-from .base import get_redis_client, tool_with_tracing
+from .base import get_async_redis_client, tool_with_tracing
 
 
 @tool
-def notify_user_tool(
+async def notify_user_tool(
     user_id: str,
     title: str,
     message: str,
@@ -37,7 +37,7 @@ def notify_user_tool(
     Returns:
         Dict with notification ID and status
     """
-    return _notify_user_impl(
+    return await _notify_user_impl(
         user_id=user_id,
         title=title,
         message=message,
@@ -46,14 +46,14 @@ def notify_user_tool(
 
 
 @tool_with_tracing("notify_user")
-def _notify_user_impl(
+async def _notify_user_impl(
     user_id: str,
     title: str,
     message: str,
     urgency: str
 ) -> dict:
     """Internal implementation with Opik tracing."""
-    redis = get_redis_client()
+    redis = get_async_redis_client()
     
     import uuid
     notification_id = str(uuid.uuid4())
@@ -69,18 +69,18 @@ def _notify_user_impl(
     
     # Store notification
     notification_key = f"notification:{notification_id}"
-    redis.set(notification_key, json.dumps(notification))
+    await redis.set(notification_key, json.dumps(notification))
     
     # Add to user's notification list (for retrieval)
     user_notifications_key = f"user:{user_id}:notifications"
-    redis.lpush(user_notifications_key, notification_id)
+    await redis.lpush(user_notifications_key, notification_id)
     
     # Keep only last 100 notifications
-    redis.ltrim(user_notifications_key, 0, 99)
+    await redis.ltrim(user_notifications_key, 0, 99)
     
     # Publish to notification channel (for real-time SSE)
     channel_key = f"notifications:{user_id}"
-    redis.publish(channel_key, json.dumps(notification))
+    await redis.publish(channel_key, json.dumps(notification))
     
     return {
         "status": "sent",
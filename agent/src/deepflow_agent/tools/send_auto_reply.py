@@ -2,15 +2,16 @@
 Send Auto Reply Tool
 
 Automatically sends a reply to a message on behalf of the user.
-Currently supports Slack integration.
+Currently supports Slack, email and Telegram.
 """
 
+import asyncio
 import os
 from typing import Literal, Optional
 
 from langchain.tools import tool
 
-from .base import tool_with_tracing
+from .base import get_async_redis_client, tool_with_tracing
 
 
 # Slack client placeholder - will be initialized on first use
@@ -18,22 +19,22 @@ _slack_client = None
 
 
 def get_slack_client():
-    """Get or create Slack client."""
+    """Get or create the async Slack client."""
     global _slack_client
     if _slack_client is None:
         try:
-            from slack_sdk import WebClient
+            from slack_sdk.web.async_client import AsyncWebClient
             token = os.getenv("SLACK_BOT_TOKEN")
             if not token:
                 raise ValueError("SLACK_BOT_TOKEN not configured")
-            _slack_client = WebClient(token=token)
+            _slack_client = AsyncWebClient(token=token)
         except ImportError:
             raise ImportError("slack_sdk not installed. Run: pip install slack_sdk")
     return _slack_client
 
 
 @tool
-def send_auto_reply(
+async def send_auto_reply(
     channel: Literal["slack", "email", "telegram"],
     recipient: str,
     message: str = "",
@@ -65,7 +66,7 @@ def send_auto_reply(
     Returns:
         Dict with status and message ID if successful
     """
-    return _send_auto_reply_impl(
+    return await _send_auto_reply_impl(
         channel=channel,
         recipient=recipient,
         message=message,
@@ -88,18 +89,16 @@ def get_telegram_bot():
         raise ValueError("TELEGRAM_BOT_TOKEN not set")
     return Bot(token=token)
 
-def get_telegram_id_for_user(user_id: str) -> Optional[str]:
+async def get_telegram_id_for_user(user_id: str) -> Optional[str]:
     """Get Telegram ID for a DeepFlow user."""
-    from .base import get_redis_client
-    redis = get_redis_client()
+    redis = get_async_redis_client()
     key = f"deepflow_binding:{user_id}"
-    return redis.get(key)
+    return await redis.get(key)
 
-def _send_telegram_reply(user_id: str, message: str) -> dict:
+async def _send_telegram_reply(user_id: str, message: str) -> dict:
     """Send a Telegram message (reply)."""
-    import asyncio
     try:
-        telegram_id = get_telegram_id_for_user(user_id)
+        telegram_id = await get_telegram_id_for_user(user_id)
         if not telegram_id:
             return {
                 "status": "error",
@@ -107,14 +106,10 @@ def _send_telegram_reply(user_id: str, message: str) -> dict:
             }
         
         bot = get_telegram_bot()
-        
-        async def send():
-            await bot.send_message(
-                chat_id=telegram_id,
-                text=message
-            )
-        
-        asyncio.run(send())
+        await bot.send_message(
+            chat_id=telegram_id,
+            text=message
+        )
         
         return {
             "status": "sent",
@@ -129,7 +124,7 @@ def _send_telegram_reply(user_id: str, message: str) -> dict:
         }
 
 @tool_with_tracing("send_auto_reply")
-def _send_auto_reply_impl(
+async def _send_auto_reply_impl(
     channel: str,
     recipient: str,
     message: str,
@@ -145,10 +140,10 @@ def _send_auto_reply_impl(
     # Generate message if not provided
     if not message and incoming_content:
         try:
+            from ..agents.auto_negotiator import create_auto_negotiator
             negotiator = create_auto_negotiator()
             
-            # Run sync for tool context
-            result = negotiator.generate_reply_sync(
+            result = await negotiator.generate_reply(
                 content=incoming_content,
                 sender=sender_name,
                 urgency_score=urgency_score,
@@ -176,11 +171,12 @@ def _send_auto_reply_impl(
         }
 
     if channel == "slack":
-        return _send_slack_reply(recipient, message, thread_ts)
+        return await _send_slack_reply(recipient, message, thread_ts)
     elif channel == "email":
-        return _send_email_reply(recipient, message, sender_name)
+        # smtplib blocks, keep it off the event loop
+        return await asyncio.to_thread(_send_email_reply, recipient, message, sender_name)
     elif channel == "telegram":
-        return _send_telegram_reply(recipient, message)
+        return await _send_telegram_reply(recipient, message)
     else:
         return {
             "status": "error",
@@ -188,7 +184,7 @@ def _send_auto_reply_impl(
         }
 
 
-def _send_slack_reply(channel_id: str, message: str, thread_ts: Optional[str]) -> dict:
+async def _send_slack_reply(channel_id: str, message: str, thread_ts: Optional[str]) -> dict:
     """Send a Slack message."""
     # ... existing slack implementation ...
     try:
@@ -202,7 +198,7 @@ def _send_slack_reply(channel_id: str, message: str, thread_ts: Optional[str]) -
         if thread_ts:
             kwargs["thread_ts"] = thread_ts
         
-        response = client.chat_postMessage(**kwargs)
+        response = await client.chat_postMessage(**kwargs)
         
         return {
             "status": "sent",
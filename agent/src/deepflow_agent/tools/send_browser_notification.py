@@ -2,7 +2,10 @@
 Send Browser Notification Tool
 
 Sends a browser push notification for urgent items.
-Uses Redis pub/sub to communicate with the frontend via SSE.
+Notifications are appended to a capped per-user Redis Stream and a
+wake-up is published on a per-user channel, so backends connected to
+Redis over TCP deliver them to the frontend's SSE stream immediately.
+The stream entry ID doubles as the SSE event ID for resumable delivery.
 """
 
 import json
@@ -11,11 +14,15 @@ from typing import Literal
 
 from langchain.tools import tool
 
-from .base import get_redis_client, tool_with_tracing
+from .base import get_async_redis_client, tool_with_tracing
+
+
+# Entries retained per user for SSE replay (Last-Event-ID)
+STREAM_MAXLEN = 100
 
 
 @tool
-def send_browser_notification(
+async def send_browser_notification(
     user_id: str,
     title: str,
     body: str,
@@ -43,7 +50,7 @@ def send_browser_notification(
     Returns:
         Dict with notification status
     """
-    return _send_browser_notification_impl(
+    return await _send_browser_notification_impl(
         user_id=user_id,
         title=title,
         body=body,
@@ -53,7 +60,7 @@ def send_browser_notification(
 
 
 @tool_with_tracing("send_browser_notification")
-def _send_browser_notification_impl(
+async def _send_browser_notification_impl(
     user_id: str,
     title: str,
     body: str,
@@ -61,7 +68,7 @@ def _send_browser_notification_impl(
     action_url: str
 ) -> dict:
     """Internal implementation with Opik tracing."""
-    redis = get_redis_client()
+    redis = get_async_redis_client()
     
     import uuid
     notification_id = str(uuid.uuid4())
@@ -96,19 +103,28 @@ def _send_browser_notification_impl(
     elif urgency == "urgent":
         browser_notification["options"]["vibrate"] = [100, 50, 100]
     
-    # Push to pending list for SSE polling
-    # (Upstash REST API doesn't support pub/sub, so we use a list)
-    pending_key = f"browser_notifications:{user_id}:pending"
-    redis.rpush(pending_key, json.dumps(browser_notification))
+    # Append to the user's capped stream (replayable until trimmed)
+    stream_key = f"browser_notifications:{user_id}:stream"
+    entry_id = await redis.xadd(
+        stream_key,
+        "*",
+        {"data": json.dumps(browser_notification)},
+        maxlen=STREAM_MAXLEN,
+    )
+    
+    # Wake up backends subscribed over TCP Redis (push mode).
+    # REST can publish but not subscribe; REST-only backends poll the stream.
+    await redis.publish(f"browser_notifications:{user_id}", entry_id)
     
     # Also store for history/debugging
     history_key = f"user:{user_id}:browser_notification_history"
-    redis.lpush(history_key, json.dumps(browser_notification))
-    redis.ltrim(history_key, 0, 49)  # Keep last 50
+    await redis.lpush(history_key, json.dumps(browser_notification))
+    await redis.ltrim(history_key, 0, 49)  # Keep last 50
     
     return {
         "status": "sent",
         "notification_id": notification_id,
+        "stream_id": entry_id,
         "urgency": urgency,
         "message": f"Browser notification '{title}' pushed to user"
     }
@@ -5,7 +5,6 @@ Sends a Telegram push notification for urgent/critical items.
 Uses the Telegram Bot API to directly message users who have linked their accounts.
 """
 
-import asyncio
 import json
 import logging
 import os
@@ -16,7 +15,7 @@ from langchain.tools import tool
 from telegram import Bot
 from dotenv import load_dotenv
 
-from .base import get_redis_client, tool_with_tracing
+from .base import get_async_redis_client, tool_with_tracing
 
 # Load environment variables
 load_dotenv()
@@ -32,15 +31,15 @@ def get_telegram_bot() -> Bot:
     return Bot(token=token)
 
 
-def get_telegram_id_for_user(user_id: str) -> str | None:
+async def get_telegram_id_for_user(user_id: str) -> str | None:
     """Get Telegram ID for a DeepFlow user."""
-    redis = get_redis_client()
+    redis = get_async_redis_client()
     key = f"deepflow_binding:{user_id}"
-    return redis.get(key)
+    return await redis.get(key)
 
 
 @tool
-def send_telegram_notification(
+async def send_telegram_notification(
     user_id: str,
     title: str,
     body: str,
@@ -68,7 +67,7 @@ def send_telegram_notification(
     Returns:
         Dict with notification status
     """
-    return _send_telegram_notification_impl(
+    return await _send_telegram_notification_impl(
         user_id=user_id,
         title=title,
         body=body,
@@ -78,7 +77,7 @@ def send_telegram_notification(
 
 
 @tool_with_tracing("send_telegram_notification")
-def _send_telegram_notification_impl(
+async def _send_telegram_notification_impl(
     user_id: str,
     title: str,
     body: str,
@@ -88,7 +87,7 @@ def _send_telegram_notification_impl(
     """Implementation with Opik tracing."""
     
     # Get Telegram ID for this user
-    telegram_id = get_telegram_id_for_user(user_id)
+    telegram_id = await get_telegram_id_for_user(user_id)
     
     if not telegram_id:
         logger.warning(f"No Telegram binding for user {user_id}")
@@ -120,21 +119,16 @@ def _send_telegram_notification_impl(
     try:
         # Send message via Telegram Bot API
         bot = get_telegram_bot()
-        
-        # Run async send in sync context
-        async def send():
-            await bot.send_message(
-                chat_id=telegram_id,
-                text=message,
-                parse_mode="Markdown"
-            )
-        
-        asyncio.run(send())
+        await bot.send_message(
+            chat_id=telegram_id,
+            text=message,
+            parse_mode="Markdown"
+        )
         
         logger.info(f"Telegram notification sent to {user_id} ({telegram_id})")
         
         # Log to Redis for history
-        redis = get_redis_client()
+        redis = get_async_redis_client()
         notification = {
             "type": "telegram_notification",
             "title": title,
@@ -145,8 +139,8 @@ def _send_telegram_notification_impl(
         }
         
         history_key = f"user:{user_id}:telegram_notification_history"
-        redis.lpush(history_key, json.dumps(notification))
-        redis.ltrim(history_key, 0, 99)  # Keep last 100
+        await redis.lpush(history_key, json.dumps(notification))
+        await redis.ltrim(history_key, 0, 99)  # Keep last 100
         
         return {
             "success": True,
@@ -166,13 +160,13 @@ def _send_telegram_notification_impl(
 
 
 # Convenience function for use outside of Agent context
-def notify_user_telegram(user_id: str, title: str, body: str, urgency: str = "normal"):
+async def notify_user_telegram(user_id: str, title: str, body: str, urgency: str = "normal"):
     """
     Send a Telegram notification (non-tool version for direct calls).
     
-    Can be called from anywhere without needing Agent context.
+    Can be awaited from anywhere without needing Agent context.
     """
-    return _send_telegram_notification_impl(
+    return await _send_telegram_notification_impl(
         user_id=user_id,
         title=title,
         body=body,
@@ -10,11 +10,12 @@ from typing import Literal
 
 from langchain.tools import tool
 
-from .base import get_redis_client, tool_with_tracing
+from ..contract.events import queue_diff
+from .base import get_async_redis_client, publish_user_event, tool_with_tracing
 
 
 @tool
-def update_task_status(
+async def update_task_status(
     user_id: str,
     task_id: str,
     status: Literal["done", "blocked", "defer"],
@@ -37,7 +38,7 @@ def update_task_status(
     Returns:
         Dict with updated task info and next task if available
     """
-    return _update_task_status_impl(
+    return await _update_task_status_impl(
         user_id=user_id,
         task_id=task_id,
         status=status,
@@ -46,20 +47,20 @@ def update_task_status(
 
 
 @tool_with_tracing("update_task_status")
-def _update_task_status_impl(
+async def _update_task_status_impl(
     user_id: str,
     task_id: str,
     status: str,
     note: str
 ) -> dict:
     """Internal implementation with Opik tracing."""
-    redis = get_redis_client()
+    redis = get_async_redis_client()
     
     queue_key = f"user:{user_id}:queue"
     task_key = f"task:{task_id}"
     
     # Get task details
-    task_data = redis.get(task_key)
+    task_data = await redis.get(task_key)
     if not task_data:
         return {
             "status": "error",
@@ -77,35 +78,38 @@ def _update_task_status_impl(
     # Handle different status types
     if status == "done":
         # Remove from active queue
-        redis.zrem(queue_key, task_id)
+        await redis.zrem(queue_key, task_id)
+        await publish_user_event(user_id, queue_diff(removed=[task_id]))
         # Move to completed set
         completed_key = f"user:{user_id}:completed"
-        redis.zadd(completed_key, {task_id: datetime.utcnow().timestamp()})
+        await redis.zadd(completed_key, {task_id: datetime.utcnow().timestamp()})
         
     elif status == "blocked":
         # Lower priority but keep in queue
-        current_score = redis.zscore(queue_key, task_id)
+        current_score = await redis.zscore(queue_key, task_id)
         if current_score:
             new_score = current_score * 0.5  # Reduce priority
-            redis.zadd(queue_key, {task_id: new_score})
+            await redis.zadd(queue_key, {task_id: new_score})
             task["priority_score"] = new_score
+            await publish_user_event(user_id, queue_diff(reordered=[(task_id, new_score)]))
             
     elif status == "defer":
         # Move to bottom of queue
-        redis.zadd(queue_key, {task_id: 0.1})  # Very low priority
+        await redis.zadd(queue_key, {task_id: 0.1})  # Very low priority
         task["priority_score"] = 0.1
+        await publish_user_event(user_id, queue_diff(reordered=[(task_id, 0.1)]))
     
     # Save updated task
-    redis.set(task_key, json.dumps(task))
+    await redis.set(task_key, json.dumps(task))
     
     # Get next task if current was completed
     next_task = None
     if status == "done":
         # Get highest priority task
-        next_tasks = redis.zrevrange(queue_key, 0, 0, withscores=True)
+        next_tasks = await redis.zrevrange(queue_key, 0, 0, withscores=True)
         if next_tasks:
             next_task_id = next_tasks[0][0]
-            next_task_data = redis.get(f"task:{next_task_id}")
+            next_task_data = await redis.get(f"task:{next_task_id}")
             if next_task_data:
                 next_task = json.loads(next_task_data)
     
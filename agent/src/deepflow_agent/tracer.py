@@ -4,7 +4,7 @@ Opik Tracer Module
 Provides tracing and observability for Agent calls.
 """
 
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import Callable, Any, Optional
 import os
 
@@ -21,8 +21,13 @@ except ImportError:
 from .config import get_settings
 
 
+@lru_cache
 def init_opik() -> bool:
-    """Initialize Opik with project settings. Returns True if successful."""
+    """
+    Initialize Opik with project settings. Returns True if successful.
+
+    Runs once per process; later calls return the first result.
+    """
     if not OPIK_AVAILABLE:
         print("⚠️ Opik not installed")
         return False
@@ -45,6 +50,17 @@ def init_opik() -> bool:
         return False
 
 
+def flush_traces(timeout: int = 10) -> None:
+    """Send buffered Opik traces before the process exits."""
+    if not OPIK_AVAILABLE:
+        return
+
+    try:
+        opik.flush_tracker(timeout=timeout)
+    except Exception as e:
+        print(f"⚠️ Opik flush failed: {e}")
+
+
 def trace_agent(name: str):
     """
     Decorator to trace agent function calls with Opik.
@@ -0,0 +1,32 @@
+"""
+DeepFlow Agent Worker Package
+
+Concurrency and scheduling primitives for the signal worker in main.py.
+"""
+
+from .pool import WorkerPool, PoolStats
+from .leases import LeasedSignalQueue, make_worker_id
+from .fetch import AdaptivePollFetcher, BlockingFetcher, create_fetcher
+from .retry import RetryScheduler
+from ..contract.lanes import LANES, lane_key, user_queue_key
+from .priority import enqueue, lane_of, user_of
+from .fair import FairScheduler, UserShare
+
+__all__ = [
+    "WorkerPool",
+    "PoolStats",
+    "LeasedSignalQueue",
+    "make_worker_id",
+    "AdaptivePollFetcher",
+    "BlockingFetcher",
+    "create_fetcher",
+    "RetryScheduler",
+    "LANES",
+    "lane_key",
+    "lane_of",
+    "user_of",
+    "user_queue_key",
+    "enqueue",
+    "FairScheduler",
+    "UserShare",
+]
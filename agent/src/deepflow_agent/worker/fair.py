@@ -0,0 +1,161 @@
+"""
+Fair Scheduler
+
+Deficit round-robin across users for signal claims.
+
+Signals wait in per-user queues (see priority.user_queue_key), so one
+user's flooded inbox no longer sits in front of everyone else's mail.
+When claiming, the worker asks the scheduler which users to try:
+
+- Every active user is visited in turn and earns `quantum * weight`
+  credit per round; a claim costs one credit. Over time each backlogged
+  user gets a share of claims proportional to its weight.
+- A user with `max_in_flight` claimed but unfinished signals on this
+  worker is skipped until one finishes, which bounds how much of the
+  worker's LLM concurrency a single user can hold.
+
+Per-user counters (claims, busy seconds, share) are kept for the stats
+reporter so noisy tenants are easy to spot. They cover users with queued
+or in-flight work and are dropped once a user has neither, so a worker
+that sees many users over its lifetime does not grow without bound.
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional
+
+# Pseudo-user for a lane's shared list (producers that do not route per user)
+SHARED_QUEUE = "*"
+
+
+@dataclass
+class UserShare:
+    """Per-user counters reported by FairScheduler."""
+
+    in_flight: int = 0
+    claimed: int = 0
+    busy_seconds: float = 0.0
+    share: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class FairScheduler:
+    """
+    Deficit round-robin order of users to claim from.
+
+    Usage:
+        scheduler = FairScheduler(weights={"vip": 2})
+        for user in scheduler.order(active_users):
+            item = try_claim(user)
+            if item:
+                scheduler.charge(user)
+                scheduler.started(user)
+                break
+        ...
+        scheduler.finished(user, elapsed)
+    """
+
+    def __init__(
+        self,
+        quantum: float = 1.0,
+        weights: Optional[Dict[str, float]] = None,
+        max_in_flight: int = 2,
+    ):
+        if quantum <= 0:
+            raise ValueError("quantum must be positive")
+        self.quantum = quantum
+        self.weights = dict(weights or {})
+        self.max_in_flight = max(1, max_in_flight)
+
+        self._ring: List[str] = []
+        self._deficit: Dict[str, float] = {}
+        self._next: Optional[str] = None
+        self._shares: Dict[str, UserShare] = {}
+
+    def weight(self, user: str) -> float:
+        return max(self.weights.get(user, 1.0), 0.01)
+
+    def can_accept(self, user: str) -> bool:
+        """Whether another signal of `user` may be claimed on this worker."""
+        if user == SHARED_QUEUE:
+            return True
+        share = self._shares.get(user)
+        return share is None or share.in_flight < self.max_in_flight
+
+    def order(self, users: Iterable[str]) -> List[str]:
+        """
+        Users to try for the next claim, best first.
+
+        The first entry is the user whose turn it is; the rest follow in
+        round-robin order as fallbacks if its queue turns out to be empty.
+        """
+        users = list(dict.fromkeys(users))
+        for user in users:
+            if user not in self._deficit:
+                self._ring.append(user)
+                self._deficit[user] = 0.0
+
+        eligible = set(u for u in users if self.can_accept(u))
+        if not eligible:
+            return []
+
+        start = self._ring.index(self._next) if self._next in self._deficit else 0
+        rotation = [u for u in self._ring[start:] + self._ring[:start] if u in eligible]
+
+        # Hand out rounds of credit until someone can afford a claim
+        while not any(self._deficit[u] >= 1 for u in rotation):
+            for user in rotation:
+                self._deficit[user] += self.quantum * self.weight(user)
+
+        first = next(i for i, u in enumerate(rotation) if self._deficit[u] >= 1)
+        return rotation[first:] + rotation[:first]
+
+    def charge(self, user: str, cost: float = 1.0) -> None:
+        """Spend `user`'s credit for a claim; the turn moves on once it runs out."""
+        if user not in self._deficit:
+            return
+        self._deficit[user] -= cost
+        if self._deficit[user] >= 1:
+            self._next = user
+        else:
+            index = self._ring.index(user)
+            self._next = self._ring[(index + 1) % len(self._ring)]
+
+    def retire(self, user: str) -> None:
+        """Forget a user whose queue is empty; unspent credit is dropped, as in DRR."""
+        if user not in self._deficit:
+            return
+        if self._next == user:
+            index = self._ring.index(user)
+            following = self._ring[(index + 1) % len(self._ring)]
+            self._next = following if following != user else None
+        self._ring.remove(user)
+        del self._deficit[user]
+        self._forget_idle(user)
+
+    def started(self, user: str) -> None:
+        """Record a claimed signal of `user`."""
+        share = self._shares.setdefault(user, UserShare())
+        share.in_flight += 1
+        share.claimed += 1
+
+    def finished(self, user: str, elapsed: float) -> None:
+        """Record that a signal of `user` finished after `elapsed` seconds of work."""
+        share = self._shares.setdefault(user, UserShare())
+        share.in_flight = max(0, share.in_flight - 1)
+        share.busy_seconds += elapsed
+        self._forget_idle(user)
+
+    def _forget_idle(self, user: str) -> None:
+        """Drop the counters of a user with nothing queued or in flight."""
+        share = self._shares.get(user)
+        if share is not None and share.in_flight == 0 and user not in self._deficit:
+            del self._shares[user]
+
+    def shares(self) -> Dict[str, UserShare]:
+        """Per-user counters with `share` = fraction of total busy time."""
+        total = sum(s.busy_seconds for s in self._shares.values())
+        for share in self._shares.values():
+            share.share = share.busy_seconds / total if total else 0.0
+        return dict(self._shares)
@@ -0,0 +1,120 @@
+"""
+Signal Fetchers
+
+How the worker waits for the next signal when the queue is empty.
+
+- AdaptivePollFetcher (REST-only deployments): polls over the Upstash
+  REST API, quickly right after work and backing off exponentially
+  while idle.
+- BlockingFetcher (native Redis): when every queue is empty, BLPOP on the
+  doorbell list over a TCP connection, so a new signal is picked up as
+  soon as it is pushed.
+
+A full claim() costs a few REST calls per lane, so neither fetcher
+scans the lanes while idle. After a claim succeeds they claim again
+right away, because more signals are likely waiting. Once a claim comes
+back empty, the poller checks LeasedSignalQueue.has_pending() (one
+EXISTS call) before claiming again. The blocking fetcher claims after
+the doorbell rings, and after a timed-out block only if has_pending()
+says so (a doorbell token can be taken by a worker that could not claim
+the signal). An idle poller makes one REST call per interval; an idle
+blocking worker makes one BLPOP and one EXISTS per block timeout.
+
+Both claim through LeasedSignalQueue.claim(), so priority lanes, fair
+scheduling, leases, acks and the reaper work the same either way.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from ..config import Settings
+from ..contract.lanes import DOORBELL_KEY
+from .leases import LeasedSignalQueue
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptivePollFetcher:
+    """Poll the queue with exponential backoff while it is empty."""
+
+    def __init__(
+        self,
+        queue: LeasedSignalQueue,
+        min_interval: float = 0.05,
+        max_interval: float = 5.0,
+        backoff_factor: float = 2.0,
+    ):
+        self.queue = queue
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.interval = min_interval
+        self._backlog = True  # claim without checking first (startup, or right after work)
+
+    async def fetch(self) -> Optional[str]:
+        """Claim the next signal, or sleep the current backoff and return None."""
+        if self._backlog or await self.queue.has_pending():
+            item = await self.queue.claim()
+            if item:
+                self._backlog = True
+                self.interval = self.min_interval
+                return item
+        self._backlog = False
+
+        await asyncio.sleep(self.interval)
+        self.interval = min(self.interval * self.backoff_factor, self.max_interval)
+        return None
+
+
+class BlockingFetcher:
+    """Block on the doorbell over native Redis until a signal arrives."""
+
+    def __init__(self, queue: LeasedSignalQueue, client, block_timeout: float = 5.0):
+        self.queue = queue
+        self.client = client
+        self.block_timeout = block_timeout
+        self._backlog = True  # claim without blocking first (startup, or right after work)
+
+    async def fetch(self) -> Optional[str]:
+        """Claim the next signal, waiting up to block_timeout; None on timeout."""
+        if self._backlog:
+            item = await self.queue.claim()
+            if item:
+                return item
+            self._backlog = False
+
+        # Signals are spread over many user queues, so wait for a producer's
+        # doorbell token instead of on any single list
+        if await self.client.blpop([DOORBELL_KEY], timeout=self.block_timeout) is None:
+            self._backlog = await self.queue.has_pending()
+            return None
+        item = await self.queue.claim()
+        self._backlog = item is not None
+        return item
+
+
+def create_fetcher(queue: LeasedSignalQueue, settings: Settings):
+    """
+    Create the fetcher selected by WORKER_FETCH_MODE.
+
+    "blocking" needs REDIS_URL and the `redis` package (agent[native]);
+    without them the worker falls back to adaptive polling.
+    """
+    if settings.worker_fetch_mode == "blocking":
+        if not settings.redis_url:
+            logger.warning("WORKER_FETCH_MODE=blocking but REDIS_URL is not set, polling instead")
+        else:
+            try:
+                import redis.asyncio
+            except ImportError:
+                logger.warning("WORKER_FETCH_MODE=blocking needs the 'redis' package, polling instead")
+            else:
+                client = redis.asyncio.from_url(settings.redis_url, decode_responses=True)
+                return BlockingFetcher(queue, client, block_timeout=settings.worker_block_timeout)
+
+    return AdaptivePollFetcher(
+        queue,
+        min_interval=settings.worker_poll_min_interval,
+        max_interval=settings.worker_poll_max_interval,
+    )
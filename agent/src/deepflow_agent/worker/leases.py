@@ -0,0 +1,262 @@
+"""
+Leased Signal Queue
+
+At-least-once consumption of deepflow:signals:pending by many workers.
+
+A signal is claimed with LMOVE into the claiming worker's own processing
+list instead of being destroyed by LPOP, and is removed from there (acked)
+only after it has been handled. Each worker holds a lease key with a TTL
+of `visibility_timeout` seconds and renews it while alive. If a worker
+dies, its lease expires and any live worker's reaper moves the dead
+worker's processing list back to the front of the pending queue.
+
+Works the same whether the workers are processes under one supervisor or
+independent replicas on different nodes.
+
+Signals are claimed from the urgency lanes in priority.py: "critical"
+first, then the other lanes in weighted round-robin order. Within a lane
+the FairScheduler picks the order of the users' queues, and one Lua
+script call claims from the first non-empty one. Re-queued signals go
+back to the front of their user's queue in their own lane.
+
+Every call goes through the async Upstash client, so lease upkeep,
+claims and acks never block the event loop that runs the signals.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Dict, List, Optional
+
+from upstash_redis.asyncio import Redis as AsyncRedis
+
+from ..contract.lanes import LANES, PENDING_KEY, lane_key, lane_users_key, user_queue_key
+from .fair import SHARED_QUEUE, FairScheduler
+from .priority import LANE_WEIGHTS, lane_of, ring_doorbell_async, user_of, weighted_schedule
+
+logger = logging.getLogger(__name__)
+
+
+def make_worker_id() -> str:
+    """Unique ID for this worker process (host, pid, random suffix)."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class LeasedSignalQueue:
+    """
+    Claim/ack access to the signal queue with per-worker leases.
+
+    Usage:
+        queue = LeasedSignalQueue(async_redis, visibility_timeout=300)
+        await queue.register()
+        item = await queue.claim()
+        ...  # process
+        await queue.ack(item)
+    """
+
+    PENDING_KEY = PENDING_KEY
+    PROCESSING_KEY_TEMPLATE = "deepflow:signals:processing:{worker_id}"
+    WORKERS_KEY = "deepflow:signals:workers"
+    LEASE_KEY_TEMPLATE = "deepflow:signals:workers:{worker_id}:lease"
+
+    # LMOVE from the first non-empty queue into the processing list. Users
+    # whose queue is empty are dropped from the lane's active set on the way
+    # (atomically, so no producer push can slip in between).
+    # KEYS: processing list, lane users set, one queue per user.
+    # ARGV: the users, in the same order ("*" is the lane's shared list).
+    # Returns {claimed user, item, retired users...}; "" for no claim.
+    CLAIM_SCRIPT = """
+local retired = {}
+for i = 3, #KEYS do
+    local user = ARGV[i - 2]
+    local item = redis.call('LMOVE', KEYS[i], KEYS[1], 'LEFT', 'RIGHT')
+    if item then
+        return {user, item, unpack(retired)}
+    end
+    if user ~= '*' then
+        redis.call('SREM', KEYS[2], user)
+        table.insert(retired, user)
+    end
+end
+return {'', '', unpack(retired)}
+"""
+
+    def __init__(
+        self,
+        redis: AsyncRedis,
+        worker_id: Optional[str] = None,
+        visibility_timeout: int = 300,
+        lane_weights: Dict[str, int] = LANE_WEIGHTS,
+        scheduler: Optional[FairScheduler] = None,
+    ):
+        self.redis = redis
+        self.worker_id = worker_id or make_worker_id()
+        self.visibility_timeout = visibility_timeout
+        self.scheduler = scheduler or FairScheduler()
+        self._schedule = weighted_schedule(lane_weights)
+        self._turn = 0
+
+    @classmethod
+    def processing_key(cls, worker_id: str) -> str:
+        return cls.PROCESSING_KEY_TEMPLATE.format(worker_id=worker_id)
+
+    @classmethod
+    def lease_key(cls, worker_id: str) -> str:
+        return cls.LEASE_KEY_TEMPLATE.format(worker_id=worker_id)
+
+    async def register(self) -> None:
+        """Announce this worker and take its first lease."""
+        await self.redis.sadd(self.WORKERS_KEY, self.worker_id)
+        await self.renew()
+
+    async def renew(self) -> None:
+        """Extend this worker's lease by another visibility timeout."""
+        await self.redis.set(self.lease_key(self.worker_id), "1", ex=self.visibility_timeout)
+
+    async def has_pending(self) -> bool:
+        """
+        Whether any lane may hold a signal, in one EXISTS call.
+
+        Redis deletes empty lists and sets, so this is false exactly when
+        every shared list and active-user set is gone. Fetchers check it
+        before claim(), which costs two calls per lane.
+        """
+        keys = [key for lane in LANES for key in (lane_key(lane), lane_users_key(lane))]
+        return bool(await self.redis.exists(*keys))
+
+    async def claim(self) -> Optional[str]:
+        """Atomically move the next signal by priority into this worker's processing list."""
+        for lane in self.claim_order():
+            item = await self._claim_from_lane(lane)
+            if item:
+                return item
+        return None
+
+    async def _claim_from_lane(self, lane: str) -> Optional[str]:
+        """
+        Claim from the lane's user queues in fair order (shared list included).
+
+        Costs one SMEMBERS and one CLAIM_SCRIPT call however many users are
+        active: the script tries the queues in order server-side.
+        """
+        users = sorted(await self.redis.smembers(lane_users_key(lane)) or [])
+        order = self.scheduler.order(users + [SHARED_QUEUE])
+        if not order:
+            return None
+        sources = [lane_key(lane) if user == SHARED_QUEUE else user_queue_key(lane, user) for user in order]
+        claimed, item, *retired = await self.redis.eval(
+            self.CLAIM_SCRIPT,
+            keys=[self.processing_key(self.worker_id), lane_users_key(lane), *sources],
+            args=order,
+        )
+        for user in retired:
+            self.scheduler.retire(user)
+        if not item:
+            return None
+        self.scheduler.charge(claimed)
+        self.scheduler.started(user_of(item))
+        return item
+
+    def claim_order(self) -> List[str]:
+        """Lanes to try for the next claim: critical, this turn's lane, then the rest."""
+        preferred = self._schedule[self._turn % len(self._schedule)]
+        self._turn += 1
+        return ["critical", preferred] + [
+            lane for lane in LANES if lane not in ("critical", preferred)
+        ]
+
+    async def lane_depths(self) -> Dict[str, int]:
+        """Number of waiting signals per lane."""
+        return {lane: sum(users.values()) for lane, users in (await self.backlog()).items()}
+
+    async def user_backlog(self) -> Dict[str, int]:
+        """Number of waiting signals per user across lanes (shared lists under "*")."""
+        totals: Dict[str, int] = {}
+        for users in (await self.backlog()).values():
+            for user, depth in users.items():
+                totals[user] = totals.get(user, 0) + depth
+        return totals
+
+    async def backlog(self) -> Dict[str, Dict[str, int]]:
+        """Waiting signals per lane and user (one LLEN per active user queue, sent concurrently)."""
+        backlog = {}
+        for lane in LANES:
+            users = [SHARED_QUEUE] + sorted(await self.redis.smembers(lane_users_key(lane)) or [])
+            lengths = await asyncio.gather(*(
+                self.redis.llen(lane_key(lane) if user == SHARED_QUEUE else user_queue_key(lane, user))
+                for user in users
+            ))
+            backlog[lane] = {user: depth for user, depth in zip(users, lengths) if depth}
+        return backlog
+
+    async def ack(self, item: str) -> None:
+        """Mark a claimed signal as handled."""
+        await self.redis.lrem(self.processing_key(self.worker_id), 1, item)
+
+    async def requeue(self, item: str) -> None:
+        """Hand one claimed signal back to the front of its user's queue."""
+        lane, user = lane_of(item), user_of(item)
+        # Pushed before the ack, so a failure in between duplicates it rather than losing it
+        await self.redis.lpush(user_queue_key(lane, user), item)
+        await self.redis.sadd(lane_users_key(lane), user)
+        await self.ack(item)
+        await ring_doorbell_async(self.redis)
+
+    async def reap(self) -> int:
+        """Re-queue signals held by workers whose lease has expired."""
+        requeued = 0
+        for worker_id in await self._workers():
+            if worker_id == self.worker_id or await self.redis.exists(self.lease_key(worker_id)):
+                continue
+            count = await self._requeue(worker_id)
+            await self.redis.srem(self.WORKERS_KEY, worker_id)
+            if count:
+                logger.warning(f"Re-queued {count} signal(s) from expired worker {worker_id}")
+            requeued += count
+        return requeued
+
+    async def release(self) -> int:
+        """Hand back unfinished signals and leave (clean shutdown, after the pool has drained)."""
+        count = await self._requeue(self.worker_id)
+        await self.redis.srem(self.WORKERS_KEY, self.worker_id)
+        await self.redis.delete(self.lease_key(self.worker_id))
+        return count
+
+    async def _workers(self) -> List[str]:
+        return list(await self.redis.smembers(self.WORKERS_KEY) or [])
+
+    async def _requeue(self, worker_id: str) -> int:
+        """
+        Move a processing list back to the front of its user queues, keeping order.
+
+        Another worker's list is taken one LMOVE at a time into our own
+        processing list, so when several reapers race each signal goes to
+        exactly one of them, and it stays leased by us until it is back in
+        its queue. No reaper touches our own list while our lease is live,
+        so it is moved directly.
+        """
+        source = self.processing_key(worker_id)
+        mine = self.processing_key(self.worker_id)
+        own = worker_id == self.worker_id
+        count = 0
+        while True:
+            if own:
+                item = await self.redis.lindex(mine, -1)
+            else:
+                item = await self.redis.lmove(source, mine, "RIGHT", "RIGHT")
+            if item is None:
+                break
+            lane, user = lane_of(item), user_of(item)
+            if own:
+                if await self.redis.lmove(mine, user_queue_key(lane, user), "RIGHT", "LEFT") is None:
+                    break
+            else:
+                await self.redis.lpush(user_queue_key(lane, user), item)
+                await self.redis.lrem(mine, -1, item)
+            await self.redis.sadd(lane_users_key(lane), user)
+            count += 1
+        if count:
+            await ring_doorbell_async(self.redis)
+        return count
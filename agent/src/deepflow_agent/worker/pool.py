@@ -0,0 +1,200 @@
+"""
+Worker Pool
+
+Bounded-concurrency execution of signal handlers.
+
+Processing a signal is mostly waiting on the LLM and Redis, so one process
+can keep many signals in flight. The pool caps that number with a
+semaphore, enforces a per-signal timeout and keeps simple counters for
+monitoring.
+
+Signals submitted with a key (the user ID) run on that key's lane: one at
+a time, in submission order, so two messages for the same user never race
+on its queue or conversation history. Different keys run concurrently.
+A lane only exists while it has work, so memory is bounded by the number
+of accepted signals.
+
+Optional on_complete/on_failure callbacks run after each signal (for
+example to ack it, or schedule a retry); they may be coroutine functions. Neither runs for a signal that
+was cancelled at shutdown, so it stays claimed and can be handed back.
+shutdown() lets in-flight signals finish up to a deadline and cancels
+the rest.
+"""
+
+import asyncio
+import inspect
+import logging
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+SignalHandler = Callable[[Any], Awaitable[Any]]
+CompleteCallback = Callable[[Any], Union[None, Awaitable[None]]]
+FailureCallback = Callable[[Any, BaseException], Union[None, Awaitable[None]]]
+
+
+@dataclass
+class PoolStats:
+    """Counters reported by WorkerPool."""
+
+    in_flight: int = 0
+    completed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class WorkerPool:
+    """
+    Run up to `concurrency` signal handlers at once.
+
+    submit() waits while `max_pending` signals are accepted but unfinished
+    (running, or queued behind another signal of the same key), so the
+    fetch loop naturally stops pulling signals while the pool is busy.
+
+    Usage:
+        pool = WorkerPool(handle_signal, concurrency=20, timeout=120)
+        while True:
+            item = await fetch()
+            await pool.submit(item, key=user_id_of(item))
+    """
+
+    def __init__(
+        self,
+        handler: SignalHandler,
+        concurrency: int = 20,
+        timeout: float = 120.0,
+        max_pending: Optional[int] = None,
+        on_complete: Optional[CompleteCallback] = None,
+        on_failure: Optional[FailureCallback] = None,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.handler = handler
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_pending = max(max_pending or concurrency * 4, concurrency)
+        self.on_complete = on_complete
+        self.on_failure = on_failure
+        self.stats = PoolStats()
+
+        self._slots = asyncio.Semaphore(concurrency)
+        self._capacity = asyncio.Semaphore(self.max_pending)
+        # Signals waiting behind the running one, per key
+        self._lanes: Dict[Hashable, Deque[Any]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def in_flight(self) -> int:
+        return self.stats.in_flight
+
+    @property
+    def lane_count(self) -> int:
+        """Number of keys with a signal running or queued."""
+        return len(self._lanes)
+
+    async def wait_for_capacity(self) -> None:
+        """Block until another signal can be accepted (without taking it)."""
+        async with self._capacity:
+            pass
+
+    async def submit(self, item: Any, key: Optional[Hashable] = None) -> None:
+        """
+        Accept `item` for processing once there is capacity.
+
+        Items with the same key are processed one at a time in submission
+        order; items without a key are independent.
+        """
+        await self._capacity.acquire()
+        self.stats.in_flight += 1
+
+        if key is not None:
+            lane = self._lanes.get(key)
+            if lane is not None:
+                # The lane's task picks it up after the current signal
+                lane.append(item)
+                return
+            self._lanes[key] = deque()
+
+        task = asyncio.create_task(self._run_lane(key, item))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def drain(self) -> None:
+        """Wait for every accepted signal to finish."""
+        while True:
+            pending = [task for task in self._tasks if not task.done()]
+            if not pending:
+                return
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def shutdown(self, timeout: float) -> int:
+        """
+        Wait up to `timeout` seconds for accepted signals, then cancel the rest.
+
+        Returns:
+            Number of signals that were cancelled (running or still queued
+            in a lane); their callbacks do not run.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            pending = [task for task in self._tasks if not task.done()]
+            if not pending:
+                return 0
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await asyncio.wait(pending, timeout=remaining)
+
+        unfinished = self.stats.in_flight
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._lanes.clear()
+        self.stats.in_flight = 0
+        return unfinished
+
+    async def _run_lane(self, key: Optional[Hashable], item: Any) -> None:
+        """Process `item`, then the rest of its lane, holding one slot."""
+        async with self._slots:
+            while True:
+                await self._process(item)
+                lane = self._lanes.get(key) if key is not None else None
+                if not lane:
+                    self._lanes.pop(key, None)
+                    return
+                item = lane.popleft()
+
+    async def _process(self, item: Any) -> None:
+        try:
+            await asyncio.wait_for(self.handler(item), timeout=self.timeout)
+            self.stats.completed += 1
+            await self._callback(self.on_complete, item)
+        except asyncio.TimeoutError as e:
+            self.stats.timed_out += 1
+            self.stats.failed += 1
+            logger.error(f"Signal timed out after {self.timeout}s")
+            await self._callback(self.on_failure, item, e)
+        except Exception as e:
+            self.stats.failed += 1
+            logger.debug(f"Signal failed: {e}")
+            await self._callback(self.on_failure, item, e)
+        finally:
+            self.stats.in_flight -= 1
+            self._capacity.release()
+
+    @staticmethod
+    async def _callback(callback: Optional[Callable], *args: Any) -> None:
+        if callback is None:
+            return
+        try:
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.error(f"Signal callback {getattr(callback, '__name__', callback)} failed: {e}")
@@ -0,0 +1,120 @@
+"""
+Priority Lanes
+
+Urgency lanes for incoming signals.
+
+The backend pre-classifies each signal at ingestion (the same keyword
+rules plus sender priors, see deepflow_backend.services.signal_triage)
+and pushes it onto one of these lists; both take the key names from the
+shared contract package (contract/lanes.py). Workers always drain
+"critical" first and share the remaining claims between the other lanes
+by weight, so a production page does not wait behind a newsletter
+backlog and low-priority mail still makes progress.
+
+Within a lane, each user has their own queue, listed in the lane's
+active-user set, so workers can schedule users fairly (see fair.py).
+Producers also push a token onto a short doorbell list, which wakes
+workers that block while every queue is empty.
+
+Signals the agent enqueues itself (retries, dead
+letter replays) without a recorded lane get one from the keyword rules
+(see keyword_rules.py).
+"""
+
+import json
+from typing import Any, Dict, List, Tuple
+
+from ..contract.lanes import (
+    DEFAULT_LANE,
+    DEFAULT_USER,
+    DOORBELL_KEY,
+    DOORBELL_MAX,
+    LANES,
+    lane_users_key,
+    user_queue_key,
+)
+from ..keyword_rules import get_keyword_rules
+
+# Share of claims for the non-critical lanes ("critical" is strict priority)
+LANE_WEIGHTS: Dict[str, int] = {"high": 4, "normal": 2, "low": 1}
+
+
+def _decode(item: Any) -> Any:
+    return json.loads(item) if isinstance(item, str) else item
+
+
+def lane_of(item: Any) -> str:
+    """Lane recorded on a signal at ingestion (default lane if missing)."""
+    try:
+        lane = _decode(item).get("lane", DEFAULT_LANE)
+    except (TypeError, json.JSONDecodeError, AttributeError):
+        return DEFAULT_LANE
+    return lane if lane in LANES else DEFAULT_LANE
+
+
+def user_of(item: Any) -> str:
+    """User a signal belongs to (metadata.user_id, default user if missing)."""
+    try:
+        user_id = (_decode(item).get("metadata") or {}).get("user_id")
+    except (TypeError, json.JSONDecodeError, AttributeError):
+        return DEFAULT_USER
+    return str(user_id) if user_id else DEFAULT_USER
+
+
+def ring_doorbell(redis) -> None:
+    """Wake one blocked worker; the list is trimmed so idle polling deployments stay small."""
+    redis.rpush(DOORBELL_KEY, "1")
+    redis.ltrim(DOORBELL_KEY, -DOORBELL_MAX, -1)
+
+
+async def ring_doorbell_async(redis) -> None:
+    """ring_doorbell for the async Upstash client."""
+    await redis.rpush(DOORBELL_KEY, "1")
+    await redis.ltrim(DOORBELL_KEY, -DOORBELL_MAX, -1)
+
+
+def with_lane(item: str) -> str:
+    """The signal with a "lane" field, picked by the keyword rules if it has none."""
+    try:
+        data = _decode(item)
+    except (TypeError, json.JSONDecodeError):
+        return item
+    if not isinstance(data, dict) or "lane" in data:
+        return item
+    hint = get_keyword_rules().score(str(data.get("content", "")))
+    return json.dumps({**data, "lane": hint.lane if hint else DEFAULT_LANE})
+
+
+def route(item: str) -> Tuple[str, str, str]:
+    """The signal with its lane (see with_lane), the lane and the user it is queued under."""
+    item = with_lane(item)
+    return item, lane_of(item), user_of(item)
+
+
+def enqueue(redis, item: str) -> str:
+    """Push a signal onto its user's queue in its lane; returns the lane."""
+    item, lane, user_id = route(item)
+    redis.rpush(user_queue_key(lane, user_id), item)
+    redis.sadd(lane_users_key(lane), user_id)
+    ring_doorbell(redis)
+    return lane
+
+
+def weighted_schedule(weights: Dict[str, int] = LANE_WEIGHTS) -> List[str]:
+    """
+    Smooth weighted round-robin order of the non-critical lanes.
+
+    With weights high=4, normal=2, low=1 this yields
+    [high, normal, high, low, high, normal, high] - every lane is visited
+    in proportion to its weight without long runs of one lane.
+    """
+    current = {lane: 0 for lane in weights}
+    total = sum(weights.values())
+    order = []
+    for _ in range(total):
+        for lane, weight in weights.items():
+            current[lane] += weight
+        chosen = max(current, key=lambda lane: (current[lane], -LANES.index(lane)))
+        current[chosen] -= total
+        order.append(chosen)
+    return order
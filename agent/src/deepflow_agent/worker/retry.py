@@ -0,0 +1,167 @@
+"""
+Retry Scheduler
+
+Delayed retries and a dead-letter list for signals that failed.
+
+A failed signal is re-encoded with its attempt count and last error and
+added to a ZSET scored by its next-attempt time (exponential backoff with
+jitter). Workers periodically promote due entries back onto their user's
+queue, in one Lua script per signal so a retry is never dropped between
+leaving the ZSET and reaching its queue. After `max_attempts` failures the signal goes to a dead-letter list
+instead, where it can be inspected and replayed (scripts/dead_letters.py).
+"""
+
+import json
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from upstash_redis import Redis
+
+from ..contract.lanes import DOORBELL_KEY, DOORBELL_MAX, lane_users_key, user_queue_key
+from .priority import enqueue, route
+
+logger = logging.getLogger(__name__)
+
+
+class RetryScheduler:
+    """
+    Schedule failed signals for retry or dead-lettering.
+
+    Retry bookkeeping is stored in the signal itself under the "retry" key:
+    {"attempts": n, "last_error": "...", "failed_at": "..."}.
+    """
+
+    RETRY_KEY = "deepflow:signals:retry"
+    DEAD_LETTER_KEY = "deepflow:signals:dead"
+
+    # enqueue() for one due retry, run only by the caller whose ZREM wins.
+    # KEYS: retry zset, user queue, lane users set, doorbell.
+    # ARGV: zset member, signal with its lane, user id, doorbell length.
+    PROMOTE_SCRIPT = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('RPUSH', KEYS[2], ARGV[2])
+redis.call('SADD', KEYS[3], ARGV[3])
+redis.call('RPUSH', KEYS[4], '1')
+redis.call('LTRIM', KEYS[4], -tonumber(ARGV[4]), -1)
+return 1
+"""
+
+    def __init__(
+        self,
+        redis: Redis,
+        max_attempts: int = 5,
+        base_delay: float = 2.0,
+        max_delay: float = 300.0,
+        jitter: float = 0.5,
+    ):
+        self.redis = redis
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def backoff(self, attempts: int) -> float:
+        """Delay before retry number `attempts` (1-based), with +/- jitter."""
+        delay = min(self.base_delay * (2 ** (attempts - 1)), self.max_delay)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def schedule(self, item: str, error: BaseException, now: Optional[float] = None) -> str:
+        """
+        Record a failure and schedule the next attempt.
+
+        Returns:
+            "retry" if the signal was scheduled again, "dead" if it was
+            moved to the dead-letter list.
+        """
+        now = time.time() if now is None else now
+        data = self.decode(item)
+        retry = dict(data.get("retry") or {})
+        retry["attempts"] = retry.get("attempts", 0) + 1
+        retry["last_error"] = f"{type(error).__name__}: {error}"[:500]
+        retry["failed_at"] = datetime.now(timezone.utc).isoformat()
+        data["retry"] = retry
+        encoded = json.dumps(data)
+
+        if retry["attempts"] >= self.max_attempts:
+            self.redis.rpush(self.DEAD_LETTER_KEY, encoded)
+            logger.error(
+                f"Signal {data.get('source_id', 'unknown')} dead-lettered after "
+                f"{retry['attempts']} attempts: {retry['last_error']}"
+            )
+            return "dead"
+
+        delay = self.backoff(retry["attempts"])
+        self.redis.zadd(self.RETRY_KEY, {encoded: now + delay})
+        logger.warning(
+            f"Signal {data.get('source_id', 'unknown')} failed (attempt {retry['attempts']}), "
+            f"retrying in {delay:.1f}s"
+        )
+        return "retry"
+
+    def promote_due(self, now: Optional[float] = None, limit: int = 100) -> int:
+        """Move retries whose time has come back onto their user's queue."""
+        now = time.time() if now is None else now
+        due = self.redis.zrangebyscore(self.RETRY_KEY, "-inf", now, offset=0, count=limit)
+        promoted = 0
+        for item in due or []:
+            # ZREM decides which worker promotes it when several race
+            if self.promote(item):
+                promoted += 1
+        return promoted
+
+    def promote(self, item: str) -> bool:
+        """Atomically move one retry onto its user's queue; False if another worker got it."""
+        routed, lane, user_id = route(item)
+        keys = [self.RETRY_KEY, user_queue_key(lane, user_id), lane_users_key(lane), DOORBELL_KEY]
+        args = [item, routed, user_id, str(DOORBELL_MAX)]
+        return bool(self.redis.eval(self.PROMOTE_SCRIPT, keys=keys, args=args))
+
+    def next_due(self) -> Optional[float]:
+        """Time (epoch seconds) the earliest retry is due, None if none are waiting."""
+        earliest = self.redis.zrange(self.RETRY_KEY, 0, 0, withscores=True)
+        return float(earliest[0][1]) if earliest else None
+
+    def retry_count(self) -> int:
+        return self.redis.zcard(self.RETRY_KEY)
+
+    def dead_letter_count(self) -> int:
+        return self.redis.llen(self.DEAD_LETTER_KEY)
+
+    def dead_letters(self, start: int = 0, count: int = 50) -> List[Dict[str, Any]]:
+        """Decoded dead-lettered signals, oldest first."""
+        items = self.redis.lrange(self.DEAD_LETTER_KEY, start, start + count - 1)
+        return [self.decode(item) for item in items or []]
+
+    def replay_dead_letters(self, limit: Optional[int] = None) -> int:
+        """Re-queue dead-lettered signals with a fresh attempt budget."""
+        replayed = 0
+        while limit is None or replayed < limit:
+            item = self.redis.lpop(self.DEAD_LETTER_KEY)
+            if not item:
+                break
+            data = self.decode(item)
+            data.pop("retry", None)
+            enqueue(self.redis, json.dumps(data))
+            replayed += 1
+        return replayed
+
+    def purge_dead_letters(self) -> int:
+        """Delete every dead-lettered signal; returns how many there were."""
+        count = self.dead_letter_count()
+        self.redis.delete(self.DEAD_LETTER_KEY)
+        return count
+
+    @staticmethod
+    def decode(item: Any) -> Dict[str, Any]:
+        if isinstance(item, dict):
+            return dict(item)
+        try:
+            data = json.loads(item)
+        except (TypeError, json.JSONDecodeError):
+            return {"raw": item}
+        return data if isinstance(data, dict) else {"raw": data}
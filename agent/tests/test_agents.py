@@ -108,3 +108,101 @@ class TestAutoNegotiatorOutput:
         )
         assert output.should_reply
         assert "focus" in output.reply_message
+
+
+class TestAgentCache:
+    """Test process-level reuse of LLM clients, gateways and agent graphs."""
+
+    def test_chat_model_is_shared(self):
+        """Test that clients are cached by model and temperature."""
+        from deepflow_agent.agents import get_chat_model
+
+        assert get_chat_model("gpt-4-turbo", 0.0) is get_chat_model("gpt-4-turbo", 0.0)
+        assert get_chat_model("gpt-4-turbo", 0.0) is not get_chat_model("gpt-4-turbo", 0.7)
+
+    def test_gateway_is_shared(self):
+        """Test that the gateway chain is built once per model."""
+        from deepflow_agent.agents import get_chat_model, get_semantic_gateway
+
+        gateway = get_semantic_gateway("gpt-4-turbo")
+        assert get_semantic_gateway("gpt-4-turbo") is gateway
+        assert gateway.llm is get_chat_model("gpt-4-turbo", 0.0)
+
+    def test_agent_graph_is_cached_by_state(self):
+        """Test that compiled agents are reused per model and user state."""
+        from deepflow_agent.agents import create_deepflow_agent, get_deepflow_agent
+
+        with patch("deepflow_agent.agents.react_agent.create_agent") as create_agent, \
+                patch("deepflow_agent.agents.react_agent.init_opik") as init_opik:
+            create_agent.side_effect = lambda *args, **kwargs: object()
+            get_deepflow_agent.cache_clear()
+
+            flow = get_deepflow_agent("gpt-4-turbo", "FLOW")
+            assert get_deepflow_agent("gpt-4-turbo", "FLOW") is flow
+            assert create_deepflow_agent("user-1", "FLOW") is flow
+            assert create_deepflow_agent("user-2", "FLOW") is flow
+            assert get_deepflow_agent("gpt-4-turbo", "IDLE") is not flow
+
+            assert create_agent.call_count == 2
+            assert "FLOW" in create_agent.call_args_list[0].kwargs["system_prompt"]
+            get_deepflow_agent.cache_clear()
+
+
+class TestProcessMessagePipeline:
+    """Test staged, concurrent pre-fetch in process_message."""
+
+    def test_history_overlaps_state_and_gateway(self):
+        """Test that history loads while state lookup and analysis run, with timings."""
+        import asyncio
+        import time
+
+        from deepflow_agent.agents import react_agent
+
+        analysis = SemanticGatewayOutput(
+            urgency_score=7,
+            category="urgent",
+            summary="Deploy is blocked",
+            suggested_action="Look at CI",
+        )
+        gateway = MagicMock()
+
+        async def analyze(input):
+            await asyncio.sleep(0.1)
+            assert input.user_state == "FLOW"
+            return analysis
+
+        gateway.analyze = analyze
+        agent = MagicMock()
+
+        async def astream(payload):
+            assert "[USER] earlier" in payload["messages"][0]["content"]
+            yield {"messages": []}
+
+        agent.astream = astream
+
+        def history(user_id):
+            time.sleep(0.15)
+            return "[USER] earlier"
+
+        def state(user_id):
+            time.sleep(0.05)
+            return "FLOW"
+
+        with patch.object(react_agent, "get_semantic_gateway", return_value=gateway), \
+                patch.object(react_agent, "get_deepflow_agent", return_value=agent) as get_agent, \
+                patch.object(react_agent, "load_conversation_history", side_effect=history), \
+                patch.object(react_agent, "load_user_state", side_effect=state):
+            result = asyncio.run(react_agent.process_message(
+                user_id="u1",
+                user_state=None,
+                message_content="CI is red, release is due by 3pm",
+                sender="bob",
+            ))
+
+        timings = result["timings"]
+        assert result["user_state"] == "FLOW"
+        assert result["planner"] == "agent"
+        assert get_agent.call_args.args[1] == "FLOW"
+        assert set(timings) >= {"state_ms", "gateway_ms", "history_ms", "prefetch_ms", "agent_ms", "total_ms"}
+        # Sequential would be 300ms; overlapped is max(150, 50 + 100)
+        assert timings["prefetch_ms"] < 250
@@ -0,0 +1,174 @@
+"""Tests for fair scheduling of signals across users."""
+
+import asyncio
+import json
+
+from deepflow_agent.worker import FairScheduler, LeasedSignalQueue, enqueue, user_of
+
+from .test_signal_leases import AsyncFakeRedis, FakeRedis
+
+
+def signal(user, index, lane="normal"):
+    return json.dumps({"source_id": f"{user}-{index}", "lane": lane, "metadata": {"user_id": user}})
+
+
+class CountingRedis(AsyncFakeRedis):
+    """AsyncFakeRedis that records the name of every command sent."""
+
+    def __init__(self, redis):
+        super().__init__(redis)
+        self.calls = []
+
+    def __getattr__(self, name):
+        self.calls.append(name)
+        return super().__getattr__(name)
+
+
+def claim_all(queue, count):
+    """Claim up to `count` signals, finishing each right away."""
+    users = []
+    for _ in range(count):
+        item = asyncio.run(queue.claim())
+        if item is None:
+            break
+        users.append(user_of(item))
+        queue.scheduler.finished(user_of(item), 0.1)
+        asyncio.run(queue.ack(item))
+    return users
+
+
+class TestFairScheduler:
+    """Test deficit round-robin ordering in isolation."""
+
+    def test_round_robin_between_equal_users(self):
+        """Test that equal-weight users alternate."""
+        scheduler = FairScheduler()
+        picks = []
+        for _ in range(6):
+            user = scheduler.order(["a", "b", "c"])[0]
+            scheduler.charge(user)
+            picks.append(user)
+
+        assert picks == ["a", "b", "c", "a", "b", "c"]
+
+    def test_weights_set_share(self):
+        """Test that a weight-2 user gets twice the claims."""
+        scheduler = FairScheduler(weights={"a": 2})
+        picks = []
+        for _ in range(30):
+            user = scheduler.order(["a", "b"])[0]
+            scheduler.charge(user)
+            picks.append(user)
+
+        assert picks.count("a") == 20
+        assert picks.count("b") == 10
+
+    def test_in_flight_cap_skips_user(self):
+        """Test that a user at the in-flight cap is not offered."""
+        scheduler = FairScheduler(max_in_flight=1)
+        scheduler.started("a")
+
+        assert scheduler.order(["a", "b"]) == ["b"]
+        scheduler.finished("a", 2.0)
+        assert "a" in scheduler.order(["a", "b"])
+
+    def test_shares(self):
+        """Test that shares are fractions of total busy time."""
+        scheduler = FairScheduler()
+        scheduler.order(["a", "b"])
+        for user, elapsed in [("a", 3.0), ("b", 1.0)]:
+            scheduler.started(user)
+            scheduler.finished(user, elapsed)
+
+        shares = scheduler.shares()
+        assert shares["a"].share == 0.75
+        assert shares["b"].claimed == 1
+
+    def test_idle_users_are_forgotten(self):
+        """Test that counters are dropped once a user has nothing queued or in flight."""
+        scheduler = FairScheduler()
+        scheduler.order(["a", "b"])
+        scheduler.started("a")
+        scheduler.started("b")
+
+        scheduler.retire("a")
+        assert "a" in scheduler.shares()
+        scheduler.finished("a", 1.0)
+        assert "a" not in scheduler.shares()
+
+        scheduler.finished("b", 1.0)
+        assert "b" in scheduler.shares()
+        scheduler.retire("b")
+        assert scheduler.shares() == {}
+
+
+class TestFairClaims:
+    """Test fair claiming from per-user Redis queues."""
+
+    def test_flooded_user_does_not_block_others(self):
+        """Test that quiet users are served promptly behind a flooded inbox."""
+        redis = FakeRedis()
+        for i in range(1000):
+            enqueue(redis, signal("flood", i))
+        for user in ("bob", "carol"):
+            for i in range(5):
+                enqueue(redis, signal(user, i))
+        queue = LeasedSignalQueue(AsyncFakeRedis(redis), worker_id="w1")
+
+        claimed = claim_all(queue, 15)
+
+        assert claimed.count("bob") == 5
+        assert claimed.count("carol") == 5
+        assert claimed.count("flood") == 5
+
+    def test_in_flight_cap_bounds_one_user(self):
+        """Test that unfinished signals cap a user's claims on a worker."""
+        redis = FakeRedis()
+        for i in range(10):
+            enqueue(redis, signal("flood", i))
+        enqueue(redis, signal("bob", 0))
+        queue = LeasedSignalQueue(AsyncFakeRedis(redis), worker_id="w1", scheduler=FairScheduler(max_in_flight=2))
+
+        claimed = [asyncio.run(queue.claim()) for _ in range(4)]
+
+        assert [user_of(item) for item in claimed[:3]].count("flood") == 2
+        assert claimed[3] is None
+        queue.scheduler.finished("flood", 1.0)
+        assert user_of(asyncio.run(queue.claim())) == "flood"
+
+    def test_empty_user_is_retired(self):
+        """Test that a drained user leaves the lane's active set."""
+        redis = FakeRedis()
+        enqueue(redis, signal("bob", 0))
+        queue = LeasedSignalQueue(AsyncFakeRedis(redis), worker_id="w1")
+
+        assert asyncio.run(queue.claim()) is not None
+        assert asyncio.run(queue.claim()) is None
+        assert redis.smembers("deepflow:signals:pending:users") == set()
+
+    def test_claim_calls_do_not_grow_with_users(self):
+        """Test that a claim costs two calls per lane however many users are active."""
+        redis = FakeRedis()
+        redis.sadd("deepflow:signals:pending:users", *[f"idle{i}" for i in range(100)])
+        enqueue(redis, signal("zed", 0))
+        client = CountingRedis(redis)
+        queue = LeasedSignalQueue(client, worker_id="w1")
+
+        item = asyncio.run(queue.claim())
+
+        assert user_of(item) == "zed"
+        # critical, then this turn's lane (high), then normal
+        assert client.calls == ["smembers", "eval"] * 3
+        assert redis.smembers("deepflow:signals:pending:users") == {"zed"}
+
+    def test_backlog_per_user(self):
+        """Test per-lane and per-user backlog metrics."""
+        redis = FakeRedis()
+        for i in range(3):
+            enqueue(redis, signal("flood", i, lane="low"))
+        enqueue(redis, signal("bob", 0))
+        redis.rpush(LeasedSignalQueue.PENDING_KEY, "legacy")
+        queue = LeasedSignalQueue(AsyncFakeRedis(redis), worker_id="w1")
+
+        assert asyncio.run(queue.user_backlog()) == {"flood": 3, "bob": 1, "*": 1}
+        assert asyncio.run(queue.lane_depths()) == {"critical": 0, "high": 0, "normal": 2, "low": 3}
@@ -0,0 +1,243 @@
+"""Tests for the semantic gateway's exact and near-duplicate cache."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from deepflow_agent.agents import GatewayCache, SemanticGatewayAgent
+from deepflow_agent.agents.gateway_cache import bands, simhash, similarity
+from deepflow_agent.models import SemanticGatewayInput, SemanticGatewayOutput
+
+CI_FAILURE = "CI failed on main: job test-backend exited with code 1. See run 48213 for logs."
+
+
+class FakeAsyncRedis:
+    """In-memory async Redis with the commands the cache uses."""
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.zsets = {}
+        self.ttls = {}
+        self.fail = False
+
+    def _check(self):
+        if self.fail:
+            raise ConnectionError("redis down")
+
+    async def get(self, key):
+        self._check()
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self._check()
+        self.values[key] = value
+        self.ttls[key] = ex
+
+    async def mget(self, *keys):
+        self._check()
+        return [self.values.get(k) for k in keys]
+
+    async def smembers(self, key):
+        self._check()
+        return list(self.sets.get(key, set()))
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    async def zadd(self, key, mapping):
+        self._check()
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    async def zpopmin(self, key, count=1):
+        ranked = sorted(self.zsets.get(key, {}).items(), key=lambda kv: kv[1])[:count]
+        for member, _ in ranked:
+            del self.zsets[key][member]
+        return ranked
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def exec(self):
+        self.redis._check()
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+def message(content=CI_FAILURE, sender="ci@github.com", state="FLOW"):
+    return SemanticGatewayInput(content=content, sender=sender, user_state=state)
+
+
+def analysis(score=7, summary="CI is failing on main"):
+    return SemanticGatewayOutput(urgency_score=score, category="urgent", summary=summary, suggested_action="Check logs")
+
+
+def cache_with(redis, **kwargs):
+    return GatewayCache(version="test", redis=lambda: redis, **kwargs)
+
+
+class TestFingerprints:
+    """Test SimHash fingerprints and LSH bands."""
+
+    def test_digits_do_not_count(self):
+        """Test that build numbers and codes do not change the fingerprint."""
+        other_run = CI_FAILURE.replace("48213", "48299").replace("code 1", "code 2")
+        assert similarity(simhash(CI_FAILURE), simhash(other_run)) == 1.0
+
+    def test_unrelated_messages_differ(self):
+        """Test that unrelated English and Chinese messages are far apart."""
+        assert similarity(simhash(CI_FAILURE), simhash("Lunch on Friday? The team is going out.")) < 0.8
+        assert similarity(simhash("正式環境掛了，結帳 API 全部回傳 500"), simhash("下週五團隊聚餐，大家有空嗎？")) < 0.8
+
+    def test_bands_cover_fingerprint(self):
+        """Test that bands split all 64 bits."""
+        fingerprint = simhash(CI_FAILURE)
+        parts = bands(fingerprint, 4)
+        assert len(parts) == 4
+        assert sum(part << (16 * i) for i, part in enumerate(parts)) == fingerprint
+
+
+class TestGatewayCache:
+    """Test exact and near-duplicate lookups."""
+
+    def test_exact_hit_ignores_case_and_whitespace(self):
+        """Test that normalized content, sender and state form the exact key."""
+        redis = FakeAsyncRedis()
+        cache = cache_with(redis)
+
+        async def run():
+            await cache.put(message(), analysis())
+            hit = await cache.get(message(content="  " + CI_FAILURE.upper() + "\n"))
+            other_state = await cache.get(message(state="IDLE"))
+            return hit, other_state
+
+        hit, other_state = asyncio.run(run())
+        assert hit == analysis()
+        assert other_state is None
+        assert cache.stats.exact_hits == 1
+        assert cache.stats.misses == 1
+
+    def test_near_duplicate_hit(self):
+        """Test that a recurring message with new numbers reuses the result."""
+        redis = FakeAsyncRedis()
+        cache = cache_with(redis)
+        recurring = CI_FAILURE.replace("48213", "48377")
+
+        async def run():
+            await cache.put(message(), analysis())
+            return (
+                await cache.get(message(content=recurring)),
+                await cache.get(message(content=recurring, sender="alice@corp.com")),
+                await cache.get(message(content="Lunch on Friday? The team is going out.")),
+            )
+
+        near, other_sender, unrelated = asyncio.run(run())
+        assert near == analysis()
+        assert other_sender is None
+        assert unrelated is None
+        assert cache.stats.near_hits == 1
+        assert cache.stats.hit_rate == pytest.approx(1 / 3)
+
+    def test_exact_only_threshold(self):
+        """Test that similarity 1.0 disables the near-duplicate layer."""
+        redis = FakeAsyncRedis()
+        cache = cache_with(redis, similarity_threshold=1.0)
+
+        async def run():
+            await cache.put(message(), analysis())
+            return await cache.get(message(content=CI_FAILURE.replace("48213", "1")))
+
+        assert asyncio.run(run()) is None
+        assert not redis.sets
+
+    def test_lru_eviction_and_ttl(self):
+        """Test that entries carry the TTL and the least recently used is evicted."""
+        redis = FakeAsyncRedis()
+        # Exact-only: the three messages differ by a single letter
+        cache = cache_with(redis, max_entries=2, ttl=60, similarity_threshold=1.0)
+        first, second, third = (message(content=f"Newsletter issue about topic {name}") for name in "abc")
+
+        async def run():
+            await cache.put(first, analysis(2))
+            await cache.put(second, analysis(3))
+            await cache.get(first)  # first is now more recent than second
+            await cache.put(third, analysis(4))
+            return [await cache.get(m) for m in (first, second, third)]
+
+        first_hit, second_hit, third_hit = asyncio.run(run())
+        assert first_hit is not None and third_hit is not None
+        assert second_hit is None
+        assert set(redis.ttls.values()) == {60}
+
+    def test_redis_errors_are_misses(self):
+        """Test that a failing Redis never fails the analysis."""
+        redis = FakeAsyncRedis()
+        redis.fail = True
+        cache = cache_with(redis)
+
+        async def run():
+            await cache.put(message(), analysis())
+            return await cache.get(message())
+
+        assert asyncio.run(run()) is None
+        assert cache.stats.errors == 2
+
+
+class TestCachedGateway:
+    """Test the cache in front of SemanticGatewayAgent."""
+
+    def gateway(self, responses, cache):
+        calls = []
+
+        def respond(prompt):
+            calls.append(prompt)
+            return responses.pop(0)
+
+        agent = SemanticGatewayAgent(llm=MagicMock(), cache=cache)
+        agent.chain = RunnableLambda(respond)
+        return agent, calls
+
+    def test_second_analysis_skips_llm(self):
+        """Test that a repeated message is answered from the cache."""
+        cache = cache_with(FakeAsyncRedis())
+        agent, calls = self.gateway(['{"urgency_score": 7, "category": "urgent", "summary": "CI red"}'], cache)
+
+        async def run():
+            return await agent.analyze(message()), await agent.analyze(message())
+
+        first, second = asyncio.run(run())
+        assert first == second
+        assert len(calls) == 1
+
+    def test_malformed_response_is_not_cached(self):
+        """Test that the malformed-JSON fallback is not reused."""
+        cache = cache_with(FakeAsyncRedis())
+        agent, calls = self.gateway(["not json", '{"urgency_score": 7, "category": "urgent", "summary": "CI red"}'], cache)
+
+        async def run():
+            return await agent.analyze(message()), await agent.analyze(message())
+
+        fallback, retried = asyncio.run(run())
+        assert fallback.urgency_score == 5
+        assert retried.urgency_score == 7
+        assert len(calls) == 2
@@ -0,0 +1,117 @@
+"""Tests for the semantic gateway's small-then-large model cascade."""
+
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+from langchain_core.runnables import RunnableLambda
+
+from deepflow_agent.agents import SemanticGatewayAgent, get_chat_model, get_semantic_gateway
+from deepflow_agent.config import Settings
+from deepflow_agent.models import SemanticGatewayInput, SemanticGatewayOutput
+
+MESSAGE = SemanticGatewayInput(content="Deploy to staging failed", sender="ci@github.com", user_state="SHALLOW")
+
+
+def scripted(response):
+    calls = []
+
+    def respond(prompt):
+        calls.append(prompt)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    agent = SemanticGatewayAgent(llm=MagicMock())
+    agent.chain = RunnableLambda(respond)
+    return agent, calls
+
+
+def reply(score, summary, **extra):
+    return json.dumps({"urgency_score": score, "category": "standard", "summary": summary, **extra})
+
+
+def cascade(small_response, large_response):
+    small, small_calls = scripted(small_response)
+    large, large_calls = scripted(large_response)
+    small.escalation = large
+    return small, small_calls, large_calls
+
+
+class TestEscalationRule:
+    """Test which first-tier answers are borderline."""
+
+    def test_band_confidence_and_malformed(self):
+        """Test the urgency band, low self-reported confidence and malformed JSON."""
+        agent = SemanticGatewayAgent(llm=MagicMock(), escalation_urgency=(6, 9), escalation_confidence=0.7)
+
+        def output(score, confidence=None):
+            return SemanticGatewayOutput(urgency_score=score, category="x", summary="", suggested_action="", confidence=confidence)
+
+        assert agent.needs_escalation(output(7))
+        assert agent.needs_escalation(output(9))
+        assert not agent.needs_escalation(output(10))
+        assert not agent.needs_escalation(output(3, confidence=0.95))
+        assert agent.needs_escalation(output(3, confidence=0.4))
+        assert agent.needs_escalation(output(3), parsed=False)
+
+
+class TestCascade:
+    """Test the cascade inside analyze()."""
+
+    def test_clear_answer_stays_on_small_model(self):
+        """Test that an out-of-band answer is not escalated."""
+        gateway, small_calls, large_calls = cascade(reply(2, "small"), reply(2, "large"))
+
+        output = asyncio.run(gateway.analyze(MESSAGE))
+
+        assert output.summary == "small"
+        assert large_calls == []
+        assert gateway.cascade_stats.escalation_rate == 0.0
+
+    def test_borderline_answer_is_escalated(self):
+        """Test that the large model's answer replaces a borderline one."""
+        gateway, small_calls, large_calls = cascade(reply(7, "small"), reply(9, "large"))
+
+        output = asyncio.run(gateway.analyze(MESSAGE))
+
+        assert output.summary == "large"
+        assert output.urgency_score == 9
+        assert len(small_calls) == len(large_calls) == 1
+        assert gateway.cascade_stats.to_dict()["escalation_rate"] == 1.0
+
+    def test_low_confidence_is_escalated(self):
+        """Test that a self-reported low confidence escalates."""
+        gateway, _, large_calls = cascade(reply(3, "small", confidence=0.3), reply(4, "large"))
+
+        assert asyncio.run(gateway.analyze(MESSAGE)).summary == "large"
+        assert len(large_calls) == 1
+
+    def test_failed_or_malformed_escalation_keeps_first_answer(self):
+        """Test that a broken large model never makes the answer worse."""
+        for large_response in (TimeoutError("slow"), "not json"):
+            gateway, _, _ = cascade(reply(7, "small"), large_response)
+            assert asyncio.run(gateway.analyze(MESSAGE)).summary == "small"
+
+        gateway, _, _ = cascade(reply(7, "small"), TimeoutError("slow"))
+        asyncio.run(gateway.analyze(MESSAGE))
+        assert gateway.cascade_stats.failed == 1
+
+
+class TestPerTaskModels:
+    """Test per-task model settings."""
+
+    def test_model_for_falls_back_to_llm_model(self):
+        """Test that unset task models use llm_model."""
+        settings = Settings(llm_model="gpt-4-turbo", gateway_model="gpt-4o-mini")
+        assert settings.model_for("gateway") == "gpt-4o-mini"
+        assert settings.model_for("agent") == "gpt-4-turbo"
+        assert settings.model_for("negotiator") == "gpt-4-turbo"
+
+    def test_shared_gateway_with_escalation(self):
+        """Test that the shared gateway wires the escalation model."""
+        gateway = get_semantic_gateway("gpt-4o-mini", "gpt-4-turbo")
+
+        assert gateway.llm is get_chat_model("gpt-4o-mini", 0.0)
+        assert gateway.escalation.llm is get_chat_model("gpt-4-turbo", 0.0)
+        assert get_semantic_gateway("gpt-4-turbo", "gpt-4-turbo").escalation is None
@@ -0,0 +1,156 @@
+"""Tests for the compiled keyword rules."""
+
+import asyncio
+import json
+import os
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from deepflow_agent.agents import SemanticGatewayAgent
+from deepflow_agent.keyword_rules import AhoCorasick, KeywordRules, KeywordRuleSet, get_keyword_rules
+from deepflow_agent.models import SemanticGatewayInput
+from deepflow_agent.worker import enqueue, user_queue_key
+
+from .test_signal_leases import FakeRedis
+
+
+def write_rules(path, rules, mtime_ns):
+    path.write_text(json.dumps({"rules": rules}), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestAhoCorasick:
+    """Test the automaton itself."""
+
+    def test_finds_overlapping_keywords(self):
+        """Test the classic he/she/his/hers example."""
+        automaton = AhoCorasick(["he", "she", "his", "hers"])
+        found = sorted((start, automaton.keywords[index]) for start, _, index in automaton.find("ushers"))
+        assert found == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+class TestKeywordRuleSet:
+    """Test scoring with the default prompt keywords."""
+
+    rules = get_keyword_rules().ruleset
+
+    def test_english_and_chinese_keywords(self):
+        """Test that keywords of both languages are scored."""
+        assert self.rules.score("URGENT: checkout is down").urgency_score == 9
+        assert self.rules.score("線上掛了，客戶抱怨").urgency_score == 10
+        assert self.rules.score("本週電子報廣告").urgency_score == 1
+        assert self.rules.score("Can you look at the design doc?") is None
+
+    def test_whole_words_only_for_ascii(self):
+        """Test that ASCII keywords do not match inside other words."""
+        assert self.rules.score("New p0wer tools catalogue") is None
+        assert self.rules.matches("P0 ticket") == ["p0"]
+
+    def test_longer_match_wins(self):
+        """Test that a keyword inside a longer one is ignored."""
+        hint = self.rules.score("這個不緊急，有空再看")
+        assert "緊急" not in hint.matches
+        assert hint.urgency_score == 3
+
+    def test_high_urgency_dominates(self):
+        """Test that an urgent keyword is not diluted by a low one."""
+        hint = self.rules.score("FYI: production is down")
+        assert hint.urgency_score == 9
+        assert hint.lane == "critical"
+
+
+class TestHotReload:
+    """Test reloading a rules file."""
+
+    def test_reload_on_change_and_keep_rules_on_error(self, tmp_path):
+        """Test that changes are picked up and a broken file is ignored."""
+        path = tmp_path / "rules.json"
+        write_rules(path, [{"urgency": 9, "keywords": ["kaboom"]}], 1_000_000_000)
+        rules = KeywordRules(str(path), reload_seconds=0)
+        assert rules.score("kaboom").urgency_score == 9
+        assert rules.score("outage") is None  # the file replaces the defaults
+
+        write_rules(path, [{"urgency": 2, "keywords": ["kaboom"]}], 2_000_000_000)
+        assert rules.score("kaboom").urgency_score == 2
+
+        path.write_text("{not json")
+        os.utime(path, ns=(3_000_000_000, 3_000_000_000))
+        assert rules.score("kaboom").urgency_score == 2
+
+    def test_missing_file_uses_defaults(self, tmp_path):
+        """Test that the built-in rules apply until a file exists."""
+        rules = KeywordRules(str(tmp_path / "missing.json"), reload_seconds=0)
+        assert rules.score("outage").urgency_score == 9
+
+    def test_rule_set_from_file(self, tmp_path):
+        """Test that a keyword listed twice keeps its highest level."""
+        path = tmp_path / "rules.json"
+        write_rules(path, [{"urgency": 3, "keywords": ["Deploy"]}, {"urgency": 7, "keywords": ["deploy"]}], 1)
+        assert KeywordRuleSet.from_file(str(path)).levels == {"deploy": 7}
+
+
+class TestKeywordLanes:
+    """Test lanes for signals enqueued without one."""
+
+    def test_enqueue_picks_lane_from_keywords(self):
+        """Test that an unrouted outage goes to the critical lane and keeps its lane."""
+        redis = FakeRedis()
+        outage = json.dumps({"content": "Prod is down!", "metadata": {"user_id": "alice"}})
+        routed = json.dumps({"content": "Prod is down!", "lane": "low", "metadata": {"user_id": "alice"}})
+
+        assert enqueue(redis, outage) == "critical"
+        assert enqueue(redis, routed) == "low"
+        assert json.loads(redis.lists[user_queue_key("critical", "alice")][0])["lane"] == "critical"
+        assert redis.lists[user_queue_key("low", "alice")] == [routed]
+
+
+class TestKeywordGateway:
+    """Test pre-routing and degraded mode in the gateway."""
+
+    def gateway(self, respond, **kwargs):
+        agent = SemanticGatewayAgent(llm=MagicMock(), keyword_rules=KeywordRules(), **kwargs)
+        agent.chain = RunnableLambda(respond)
+        return agent
+
+    def test_prerouting_answers_noise_without_llm(self):
+        """Test that a discard-only match skips the LLM, anything else does not."""
+        calls = []
+
+        def respond(prompt):
+            calls.append(prompt)
+            return '{"urgency_score": 9, "category": "critical", "summary": "Outage"}'
+
+        agent = self.gateway(respond, keyword_prerouting=True)
+
+        async def run():
+            noise = await agent.analyze(SemanticGatewayInput(content="Weekly newsletter: 10 tips", sender="news@medium.com"))
+            outage = await agent.analyze(SemanticGatewayInput(content="Newsletter service is down", sender="ops"))
+            return noise, outage
+
+        noise, outage = asyncio.run(run())
+        assert noise.category == "discard"
+        assert outage.urgency_score == 9
+        assert len(calls) == 1
+
+    def test_degraded_mode_when_llm_fails(self):
+        """Test that a failing LLM is replaced by the keyword answer."""
+        def respond(prompt):
+            raise ConnectionError("LLM unavailable")
+
+        agent = self.gateway(respond, keyword_fallback=True)
+        output = asyncio.run(agent.analyze(SemanticGatewayInput(content="緊急！系統掛了", sender="boss")))
+
+        assert output.urgency_score == 10
+        assert output.category == "critical"
+        assert "degraded" in output.context_tags
+
+    def test_llm_errors_raise_without_fallback(self):
+        """Test that degraded mode is opt-in per gateway."""
+        def respond(prompt):
+            raise ConnectionError("LLM unavailable")
+
+        agent = self.gateway(respond)
+        with pytest.raises(ConnectionError):
+            asyncio.run(agent.analyze(SemanticGatewayInput(content="Outage", sender="ops")))
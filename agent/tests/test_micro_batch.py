@@ -0,0 +1,162 @@
+"""Tests for micro-batched semantic gateway calls."""
+
+import asyncio
+import json
+import time
+from unittest.mock import MagicMock
+
+from langchain_core.runnables import RunnableLambda
+
+from deepflow_agent.agents import MicroBatcher, SemanticGatewayAgent
+from deepflow_agent.models import SemanticGatewayInput
+
+
+def message(content, state="IDLE"):
+    return SemanticGatewayInput(content=content, sender="ops@corp.com", user_state=state)
+
+
+def answer(id, score, summary):
+    return {"id": id, "urgency_score": score, "category": "urgent" if score >= 6 else "low", "summary": summary}
+
+
+class TestMicroBatcher:
+    """Test batching of concurrent submissions."""
+
+    def test_full_batch_is_sent_without_waiting(self):
+        """Test that max_size items go out at once, in order."""
+        batches = []
+
+        async def run_batch(key, items):
+            batches.append((key, items))
+            return [item * 10 for item in items]
+
+        batcher = MicroBatcher(run_batch, max_size=3, max_wait_ms=10_000)
+
+        async def run():
+            return await asyncio.gather(*(batcher.submit("k", i) for i in (1, 2, 3)))
+
+        started = time.perf_counter()
+        assert asyncio.run(run()) == [10, 20, 30]
+        assert time.perf_counter() - started < 1
+        assert batches == [("k", [1, 2, 3])]
+
+    def test_partial_batch_is_sent_after_wait_and_per_key(self):
+        """Test that the timer flushes a partial batch and keys are not mixed."""
+        batches = []
+
+        async def run_batch(key, items):
+            batches.append((key, items))
+            return items
+
+        batcher = MicroBatcher(run_batch, max_size=8, max_wait_ms=20)
+
+        async def run():
+            return await asyncio.gather(batcher.submit("FLOW", 1), batcher.submit("IDLE", 2), batcher.submit("FLOW", 3))
+
+        assert asyncio.run(run()) == [1, 2, 3]
+        assert sorted(batches) == [("FLOW", [1, 3]), ("IDLE", [2])]
+        assert batcher.stats.mean_batch_size == 1.5
+
+    def test_batch_error_reaches_every_caller(self):
+        """Test that a failed batch call raises in each waiting caller."""
+        async def run_batch(key, items):
+            raise ConnectionError("LLM down")
+
+        batcher = MicroBatcher(run_batch, max_size=2, max_wait_ms=10)
+
+        async def run():
+            return await asyncio.gather(batcher.submit("k", 1), batcher.submit("k", 2), return_exceptions=True)
+
+        assert all(isinstance(r, ConnectionError) for r in asyncio.run(run()))
+
+    def test_close_sends_waiting_items_and_cancels_stragglers(self):
+        """Test that close() flushes waiting batches and cancels calls past the deadline."""
+        async def run_batch(key, items):
+            if key == "slow":
+                await asyncio.sleep(10)
+            return items
+
+        batcher = MicroBatcher(run_batch, max_size=8, max_wait_ms=10_000)
+
+        async def run():
+            fast = asyncio.create_task(batcher.submit("fast", 1))
+            slow = asyncio.create_task(batcher.submit("slow", 2))
+            await asyncio.sleep(0)
+            cancelled = await batcher.close(timeout=0.05)
+            results = await asyncio.gather(fast, slow, return_exceptions=True)
+            return cancelled, results
+
+        cancelled, (fast, slow) = asyncio.run(run())
+
+        assert cancelled == 1
+        assert fast == 1
+        assert isinstance(slow, asyncio.CancelledError)
+        assert batcher.running == 0
+
+
+class TestBatchedGateway:
+    """Test the gateway's batched LLM path."""
+
+    def gateway(self, batch_response, single_response='{"urgency_score": 4, "category": "standard", "summary": "single"}'):
+        calls = {"batch": [], "single": []}
+
+        def batch(prompt):
+            calls["batch"].append(prompt)
+            return batch_response
+
+        def single(prompt):
+            calls["single"].append(prompt)
+            return single_response
+
+        agent = SemanticGatewayAgent(llm=MagicMock(), batch_size=3, batch_wait_ms=20)
+        agent.batch_chain = agent.batch_prompt | RunnableLambda(batch)
+        agent.chain = RunnableLambda(single)
+        return agent, calls
+
+    def analyze_all(self, agent, contents):
+        async def run():
+            return await asyncio.gather(*(agent.analyze(message(c)) for c in contents))
+
+        return asyncio.run(run())
+
+    def test_one_request_for_the_batch(self):
+        """Test that results are matched to callers by id, not position."""
+        response = json.dumps([answer(3, 2, "lunch"), answer(1, 9, "outage"), answer(2, 5, "review")])
+        agent, calls = self.gateway(response)
+
+        outputs = self.analyze_all(agent, ["Prod is down", "Please review PR", "Lunch?"])
+
+        assert [o.summary for o in outputs] == ["outage", "review", "lunch"]
+        assert len(calls["batch"]) == 1 and calls["single"] == []
+        prompt = calls["batch"][0].to_string()
+        assert prompt.count("You are DeepFlow Sentinel") == 1
+        assert "### Message 3" in prompt
+
+    def test_missing_item_falls_back_individually(self):
+        """Test that a message the batch skipped gets its own call."""
+        response = json.dumps([answer(1, 9, "outage"), answer(2, 5, "review")])
+        agent, calls = self.gateway(response)
+
+        outputs = self.analyze_all(agent, ["Prod is down", "Please review PR", "Lunch?"])
+
+        assert [o.summary for o in outputs] == ["outage", "review", "single"]
+        assert len(calls["single"]) == 1
+        assert agent.batcher.stats.fallbacks == 1
+
+    def test_malformed_batch_falls_back_for_all(self):
+        """Test that an unparseable batch answer is redone one by one."""
+        agent, calls = self.gateway("Sure! Here are the results: ...")
+
+        outputs = self.analyze_all(agent, ["a", "b", "c"])
+
+        assert [o.summary for o in outputs] == ["single"] * 3
+        assert len(calls["single"]) == 3
+
+    def test_lone_message_uses_single_prompt(self):
+        """Test that a batch of one is sent with the normal prompt."""
+        agent, calls = self.gateway("[]")
+
+        output = asyncio.run(agent.analyze(message("Prod is down")))
+
+        assert output.summary == "single"
+        assert calls["batch"] == []
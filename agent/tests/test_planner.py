@@ -0,0 +1,159 @@
+"""Tests for the rule-based action planner."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from deepflow_agent.agents import ActionPlan, PlannedAction, execute_plan, plan_actions
+from deepflow_agent.models import SemanticGatewayOutput
+
+
+def analysis(score, category, summary="Prod API returning 500s"):
+    return SemanticGatewayOutput(
+        urgency_score=score,
+        category=category,
+        summary=summary,
+        suggested_action="Investigate",
+        estimated_time_minutes=20,
+    )
+
+
+def plan(score, category, state="IDLE", source="slack", content="message"):
+    return plan_actions(
+        analysis(score, category),
+        user_id="u1",
+        user_state=state,
+        sender="alice",
+        source=source,
+        source_id="m1",
+        content=content,
+    )
+
+
+def tools_of(result):
+    return [action.tool for action in result.actions]
+
+
+class TestPlanActions:
+    """Test the rules from the agent prompt."""
+
+    def test_critical_queues_and_notifies(self):
+        """Test that critical items are queued and sent to Telegram in any state."""
+        for state in ("FLOW", "SHALLOW", "IDLE"):
+            result = plan(9, "critical", state=state)
+            assert tools_of(result) == ["add_to_queue", "send_telegram_notification"]
+
+        queued = plan(10, "critical").actions[0].args
+        assert queued["urgency_score"] == 10
+        assert queued["category"] == "critical"
+        assert queued["estimated_minutes"] == 20
+
+    def test_urgent_without_deadline_is_queued(self):
+        """Test that urgent items with no time pressure are only queued."""
+        assert tools_of(plan(7, "urgent", content="Can you review the design doc?")) == ["add_to_queue"]
+
+    def test_urgent_with_deadline_goes_to_agent(self):
+        """Test that a possible deadline leaves the notification call to the agent."""
+        assert plan(7, "urgent", content="Need sign-off by 3pm") is None
+        assert plan(7, "urgent", content="Due in 90 minutes") is None
+
+    def test_standard_auto_replies_in_flow(self):
+        """Test that standard items get an auto-reply only in FLOW."""
+        flow = plan(5, "standard", state="FLOW")
+        assert tools_of(flow) == ["add_to_queue", "send_auto_reply"]
+        assert flow.actions[1].args["channel"] == "slack"
+        assert flow.actions[1].args["recipient"] == "alice"
+
+        assert tools_of(plan(5, "standard", state="IDLE")) == ["add_to_queue"]
+        assert tools_of(plan(4, "standard", state="FLOW", source="jira")) == ["add_to_queue"]
+
+    def test_low_is_queued_and_discard_does_nothing(self):
+        """Test low and discard categories."""
+        assert tools_of(plan(2, "low")) == ["add_to_queue"]
+        assert plan(1, "discard").actions == []
+
+    def test_category_mismatch_goes_to_agent(self):
+        """Test that a category inconsistent with the score is left to the agent."""
+        assert plan(5, "critical") is None
+        assert plan(9, "standard") is None
+
+    def test_unknown_source_is_queued_as_manual(self):
+        """Test that sources outside the queue's enum are recorded as manual."""
+        assert plan(3, "low", source="jira").actions[0].args["source"] == "manual"
+
+
+class TestExecutePlan:
+    """Test direct execution of planned tools."""
+
+    def test_runs_tools_and_records_calls(self):
+        """Test that each planned tool is invoked with its args."""
+        queue_tool = MagicMock()
+        queue_tool.ainvoke = AsyncMock(return_value={"success": True})
+        notify_tool = MagicMock()
+        notify_tool.ainvoke = AsyncMock(side_effect=RuntimeError("telegram down"))
+        planned = ActionPlan(rule="critical:FLOW", actions=[
+            PlannedAction("add_to_queue", {"user_id": "u1"}),
+            PlannedAction("send_telegram_notification", {"user_id": "u1"}),
+        ])
+
+        with patch("deepflow_agent.tools.add_to_queue", queue_tool), \
+                patch("deepflow_agent.tools.send_telegram_notification", notify_tool):
+            records = asyncio.run(execute_plan(planned))
+
+        queue_tool.ainvoke.assert_awaited_once_with({"user_id": "u1"})
+        assert records[0]["name"] == "add_to_queue"
+        assert records[0]["result"] == {"success": True}
+        assert records[1]["error"] == "telegram down"
+
+
+class TestProcessSignal:
+    """Test that ingested signals reach the planner with their real sender."""
+
+    def run(self, signal, score, category, state="FLOW"):
+        import main
+        from deepflow_agent.agents import react_agent
+
+        settings = MagicMock(agent_mode="two_phase", llm_model="gpt-4-turbo", agent_rule_planner=True)
+        gateway = MagicMock()
+        gateway.analyze = AsyncMock(return_value=analysis(score, category))
+        executed = []
+
+        async def execute(planned):
+            executed.append(planned)
+            return []
+
+        with patch.object(react_agent, "get_settings", return_value=settings), \
+                patch.object(react_agent, "get_semantic_gateway", return_value=gateway), \
+                patch.object(react_agent, "execute_plan", side_effect=execute), \
+                patch.object(react_agent, "load_user_state", return_value=state), \
+                patch.object(react_agent, "load_conversation_history", return_value=""):
+            asyncio.run(main.process_signal(json.dumps(signal)))
+
+        return gateway.analyze.call_args.args[0], executed[0]
+
+    def test_auto_reply_goes_to_the_reply_target(self):
+        """Test that a FLOW auto-reply addresses the signal's sender and reply target."""
+        signal = {
+            "source": "slack",
+            "content": "Can you look at the Q3 slides?",
+            "sender": "alice",
+            "source_id": "m1",
+            "metadata": {"user_id": "u1", "reply_to": "C024BE91L"},
+        }
+
+        gateway_input, planned = self.run(signal, 5, "standard")
+
+        assert gateway_input.sender == "alice"
+        assert gateway_input.content == "Can you look at the Q3 slides?"
+        reply = planned.actions[1].args
+        assert reply["recipient"] == "C024BE91L"
+        assert reply["sender_name"] == "alice"
+        assert reply["incoming_content"] == "Can you look at the Q3 slides?"
+
+    def test_critical_alert_names_the_sender(self):
+        """Test that the Telegram title names the signal's sender."""
+        signal = {"source": "email", "content": "Checkout is down", "sender": "ops@corp.com"}
+
+        _, planned = self.run(signal, 9, "critical")
+
+        assert planned.actions[1].args["title"] == "🚨 Critical: ops@corp.com"
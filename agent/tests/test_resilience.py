@@ -0,0 +1,181 @@
+"""Tests for LLM call deadlines, hedging and the circuit breaker."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from deepflow_agent.agents import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMGuard,
+    SemanticGatewayAgent,
+    plan_actions,
+)
+from deepflow_agent.keyword_rules import KeywordRules
+from deepflow_agent.models import SemanticGatewayInput, SemanticGatewayOutput
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def open_breaker(clock):
+    breaker = CircuitBreaker(failure_rate=0.5, window=4, min_calls=4, cooldown=10.0, clock=clock)
+    for success in (True, False, False, False):
+        breaker.record(success)
+    return breaker
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions."""
+
+    def test_opens_at_failure_rate(self):
+        """Test that the breaker stays closed until enough calls fail."""
+        breaker = CircuitBreaker(failure_rate=0.5, window=4, min_calls=4)
+        for success in (False, False, True):
+            breaker.record(success)
+        assert breaker.state == "closed"  # too few calls to judge
+
+        breaker.record(False)
+        assert breaker.is_open
+        assert not breaker.allow()
+        assert breaker.to_dict()["state_code"] == 2
+        assert breaker.to_dict()["rejected"] == 1
+
+    def test_half_open_probe_closes_or_reopens(self):
+        """Test that after the cooldown one probe decides the state."""
+        clock = FakeClock()
+        breaker = open_breaker(clock)
+
+        clock.now = 10.0
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+        assert not breaker.allow()  # only one probe at a time
+        breaker.record(False)
+        assert breaker.is_open
+        assert breaker.times_opened == 2
+
+        clock.now = 20.0
+        assert breaker.allow()
+        breaker.record(True)
+        assert breaker.state == "closed"
+        assert breaker.error_rate == 0.0
+
+
+class TestLLMGuard:
+    """Test deadlines and hedged requests."""
+
+    def test_deadline_cancels_slow_call(self):
+        """Test that a call past the deadline raises and counts as a breaker failure."""
+        breaker = CircuitBreaker(min_calls=1, failure_rate=1.0)
+        guard = LLMGuard(timeout=0.05, breaker=breaker)
+
+        async def slow():
+            await asyncio.sleep(1)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(guard.call(slow))
+        assert guard.stats.timeouts == 1
+        assert breaker.is_open
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(guard.call(slow))
+        assert guard.stats.rejected == 1
+
+    def test_hedge_answers_when_first_request_stalls(self):
+        """Test that a second request after the p95 wins over a stalled first one."""
+        guard = LLMGuard(timeout=1.0, hedge=True, hedge_min_samples=3)
+        guard._latencies.extend([0.01, 0.02, 0.03])
+        delays = [0.5, 0.01]
+
+        async def call():
+            await asyncio.sleep(delays.pop(0))
+            return "answer"
+
+        async def run():
+            started = asyncio.get_running_loop().time()
+            result = await guard.call(call)
+            return result, asyncio.get_running_loop().time() - started
+
+        result, elapsed = asyncio.run(run())
+        assert result == "answer"
+        assert elapsed < 0.3
+        assert guard.stats.hedged == 1
+        assert guard.stats.hedge_wins == 1
+
+    def test_no_hedge_without_samples(self):
+        """Test that hedging waits for enough latency samples."""
+        guard = LLMGuard(hedge=True, hedge_min_samples=3)
+        assert guard.hedge_delay() is None
+        guard._latencies.extend([0.1, 0.2, 0.3])
+        assert guard.hedge_delay() == 0.3
+
+
+class TestDegradedPipeline:
+    """Test local heuristics while the provider is unavailable."""
+
+    def test_gateway_answers_locally_while_breaker_open(self):
+        """Test that an open breaker skips the LLM and tags the answer degraded."""
+        calls = []
+        breaker = open_breaker(FakeClock())
+        agent = SemanticGatewayAgent(
+            llm=MagicMock(),
+            keyword_rules=KeywordRules(),
+            keyword_fallback=True,
+            guard=LLMGuard(breaker=breaker),
+        )
+        agent.chain = RunnableLambda(lambda prompt: calls.append(prompt) or "{}")
+
+        output = asyncio.run(agent.analyze(SemanticGatewayInput(content="Production is down", sender="ops")))
+        assert calls == []
+        assert output.urgency_score == 9
+        assert "degraded" in output.context_tags
+
+    def test_fallback_plan_covers_ambiguous_cases(self):
+        """Test that fallback planning decides cases the rules normally leave to the agent."""
+        analysis = SemanticGatewayOutput(
+            urgency_score=7,
+            category="critical",
+            summary="Sign-off needed",
+            suggested_action="Review",
+        )
+        kwargs = dict(user_id="u1", user_state="FLOW", sender="bob", source="slack", content="Need sign-off by 3pm")
+        assert plan_actions(analysis, **kwargs) is None
+
+        plan = plan_actions(analysis, **kwargs, fallback=True)
+        assert plan.rule == "urgent:FLOW"
+        assert [action.tool for action in plan.actions] == ["add_to_queue"]
+
+    def test_process_message_skips_agent_when_degraded(self):
+        """Test that a degraded analysis is planned by rules even for ambiguous cases."""
+        from deepflow_agent.agents import react_agent
+
+        gateway = MagicMock()
+        gateway.analyze = AsyncMock(return_value=SemanticGatewayOutput(
+            urgency_score=7,
+            category="urgent",
+            summary="Release due",
+            suggested_action="Review this message",
+            context_tags=["degraded"],
+        ))
+        execute = AsyncMock(return_value=[{"tool": "add_to_queue"}])
+
+        with patch.object(react_agent, "get_semantic_gateway", return_value=gateway), \
+                patch.object(react_agent, "get_deepflow_agent") as get_agent, \
+                patch.object(react_agent, "execute_plan", execute), \
+                patch.object(react_agent, "load_conversation_history", return_value=""):
+            result = asyncio.run(react_agent.process_message(
+                user_id="u1",
+                user_state="IDLE",
+                message_content="Release is due by 3pm",
+                sender="bob",
+            ))
+
+        assert result["planner"] == "fallback"
+        assert execute.await_count == 1
+        get_agent.assert_not_called()
@@ -0,0 +1,152 @@
+"""Tests for signal retries and the dead-letter queue."""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import main
+from deepflow_agent.worker import LeasedSignalQueue, RetryScheduler, user_queue_key
+
+from .test_signal_leases import FakeRedis, make_queue
+
+SIGNAL = json.dumps({"source": "slack", "source_id": "m1", "content": "hi"})
+USER_QUEUE = user_queue_key("normal", "default_user")
+
+
+class TestRetryScheduler:
+    """Test backoff scheduling, promotion and dead-lettering."""
+
+    def test_backoff_grows_exponentially_within_jitter(self):
+        """Test that delays double per attempt, stay within jitter and cap."""
+        retries = RetryScheduler(FakeRedis(), base_delay=2.0, max_delay=30.0, jitter=0.5)
+
+        for attempts, base in [(1, 2.0), (2, 4.0), (3, 8.0), (10, 30.0)]:
+            delay = retries.backoff(attempts)
+            assert base * 0.5 <= delay <= base * 1.5
+
+    def test_failed_signal_is_retried_after_backoff(self):
+        """Test that a failure is promoted back to its user's queue only once due."""
+        redis = FakeRedis()
+        retries = RetryScheduler(redis, base_delay=10.0, jitter=0.0)
+
+        assert retries.schedule(SIGNAL, RuntimeError("429 Too Many Requests"), now=1000) == "retry"
+        assert retries.promote_due(now=1005) == 0
+        assert retries.promote_due(now=1010) == 1
+
+        requeued = json.loads(redis.lists[USER_QUEUE][0])
+        assert requeued["source_id"] == "m1"
+        assert requeued["retry"]["attempts"] == 1
+        assert "429" in requeued["retry"]["last_error"]
+        assert retries.retry_count() == 0
+
+    def test_racing_promoters_requeue_each_retry_once(self):
+        """Test that only the worker whose script removes a retry queues it."""
+        redis = FakeRedis()
+        retries = RetryScheduler(redis, base_delay=1.0, jitter=0.0)
+        retries.schedule(SIGNAL, RuntimeError("boom"), now=0)
+        (item,) = redis.zrangebyscore(RetryScheduler.RETRY_KEY, "-inf", 10)
+
+        assert retries.promote(item) is True
+        assert retries.promote(item) is False
+        assert len(redis.lists[USER_QUEUE]) == 1
+
+    def test_failed_promotion_keeps_the_retry(self):
+        """Test that a promotion that errors leaves the retry scheduled."""
+        redis = FakeRedis()
+        retries = RetryScheduler(redis, base_delay=1.0, jitter=0.0)
+        retries.schedule(SIGNAL, RuntimeError("boom"), now=0)
+
+        with patch.object(redis, "eval", side_effect=ConnectionError("reset")):
+            try:
+                retries.promote_due(now=10)
+            except ConnectionError:
+                pass
+
+        assert retries.retry_count() == 1
+        assert USER_QUEUE not in redis.lists
+
+    def test_next_due_is_earliest_retry(self):
+        """Test that the promoter can sleep until the earliest retry is due."""
+        retries = RetryScheduler(FakeRedis(), base_delay=10.0, jitter=0.0)
+        assert retries.next_due() is None
+
+        retries.schedule(SIGNAL, RuntimeError("boom"), now=2000)
+        retries.schedule(SIGNAL.replace("m1", "m2"), RuntimeError("boom"), now=1000)
+        assert retries.next_due() == 1010
+
+    def test_dead_letters_after_max_attempts(self):
+        """Test that the last allowed failure moves the signal to the DLQ."""
+        redis = FakeRedis()
+        retries = RetryScheduler(redis, max_attempts=3, jitter=0.0)
+
+        item = SIGNAL
+        outcomes = []
+        for _ in range(3):
+            outcomes.append(retries.schedule(item, TimeoutError("slow"), now=0))
+            retries.promote_due(now=10_000)
+            item = redis.lpop(USER_QUEUE)
+
+        assert outcomes == ["retry", "retry", "dead"]
+        assert retries.dead_letter_count() == 1
+        assert retries.dead_letters()[0]["retry"]["attempts"] == 3
+
+    def test_replay_resets_attempts(self):
+        """Test that replayed dead letters get a fresh retry budget."""
+        redis = FakeRedis()
+        retries = RetryScheduler(redis, max_attempts=1)
+        retries.schedule(SIGNAL, RuntimeError("boom"))
+        retries.schedule(SIGNAL, RuntimeError("boom"))
+
+        assert retries.replay_dead_letters(limit=1) == 1
+        assert retries.dead_letter_count() == 1
+
+        replayed = json.loads(redis.lists[USER_QUEUE][0])
+        assert "retry" not in replayed
+        assert replayed["content"] == "hi"
+
+
+class TestSettleFailure:
+    """Test what the worker does with a signal whose handling failed."""
+
+    def test_schedules_retry_and_acks(self):
+        """Test that a failed signal is scheduled for retry and leaves the processing list."""
+        redis = FakeRedis()
+        redis.rpush(LeasedSignalQueue.PENDING_KEY, SIGNAL)
+        queue = make_queue(redis, "w1")
+        item = asyncio.run(queue.claim())
+
+        outcome = asyncio.run(main.settle_failure(queue, RetryScheduler(redis), item, RuntimeError("boom")))
+
+        assert outcome == "retry"
+        assert not redis.lists[queue.processing_key("w1")]
+        assert redis.zcard(RetryScheduler.RETRY_KEY) == 1
+
+    def test_requeues_when_retry_cannot_be_scheduled(self):
+        """Test that a signal goes back to its queue if the retry ZADD fails."""
+        redis = FakeRedis()
+        redis.rpush(LeasedSignalQueue.PENDING_KEY, SIGNAL)
+        queue = make_queue(redis, "w1")
+        item = asyncio.run(queue.claim())
+        retries = RetryScheduler(redis)
+
+        with patch.object(retries, "schedule", side_effect=ConnectionError("reset")):
+            outcome = asyncio.run(main.settle_failure(queue, retries, item, RuntimeError("boom")))
+
+        assert outcome == "requeued"
+        assert redis.lists[USER_QUEUE] == [SIGNAL]
+        assert not redis.lists[queue.processing_key("w1")]
+
+    def test_holds_signal_when_requeue_fails_too(self):
+        """Test that a signal stays claimed for release or the reaper if nothing else works."""
+        redis = FakeRedis()
+        redis.rpush(LeasedSignalQueue.PENDING_KEY, SIGNAL)
+        queue = make_queue(redis, "w1")
+        item = asyncio.run(queue.claim())
+        retries = RetryScheduler(redis)
+
+        with patch.object(retries, "schedule", side_effect=ConnectionError("reset")), \
+                patch.object(queue, "requeue", side_effect=ConnectionError("reset")):
+            outcome = asyncio.run(main.settle_failure(queue, retries, item, RuntimeError("boom")))
+
+        assert outcome == "held"
+        assert redis.lists[queue.processing_key("w1")] == [SIGNAL]
@@ -0,0 +1,134 @@
+"""Tests for adaptive and blocking signal fetch."""
+
+import asyncio
+
+from deepflow_agent.config import Settings
+from deepflow_agent.worker import (
+    AdaptivePollFetcher,
+    BlockingFetcher,
+    LeasedSignalQueue,
+    create_fetcher,
+    lane_key,
+)
+from deepflow_agent.contract.lanes import DOORBELL_KEY
+
+from .test_signal_leases import AsyncFakeRedis, FakeRedis
+
+
+class FakeBlockingClient:
+    """Records doorbell BLPOP calls; a "ring" pushes a signal before waking."""
+
+    def __init__(self, redis, rings):
+        self.redis = redis
+        self.rings = list(rings)
+        self.calls = []
+
+    async def blpop(self, keys, timeout):
+        self.calls.append((keys, timeout))
+        if not self.rings:
+            return None
+        self.redis.rpush(lane_key("normal"), self.rings.pop(0))
+        return (keys[0], "1")
+
+
+class CountingRedis(AsyncFakeRedis):
+    """Counts the REST commands the queue sends."""
+
+    def __init__(self, redis):
+        super().__init__(redis)
+        self.commands = []
+
+    def __getattr__(self, name):
+        self.commands.append(name)
+        return super().__getattr__(name)
+
+
+class TestAdaptivePollFetcher:
+    """Test backoff while idle and reset after work."""
+
+    def test_backs_off_when_idle_and_resets_on_work(self):
+        """Test that empty polls grow the interval up to the ceiling."""
+        redis = FakeRedis()
+        queue = LeasedSignalQueue(AsyncFakeRedis(redis), worker_id="w1")
+        fetcher = AdaptivePollFetcher(queue, min_interval=0.001, max_interval=0.004)
+
+        async def run():
+            intervals = []
+            for _ in range(4):
+                assert await fetcher.fetch() is None
+                intervals.append(fetcher.interval)
+            redis.rpush(LeasedSignalQueue.PENDING_KEY, "s1")
+            item = await fetcher.fetch()
+            return intervals, item
+
+        intervals, item = asyncio.run(run())
+
+        assert intervals == [0.002, 0.004, 0.004, 0.004]
+        assert item == "s1"
+        assert fetcher.interval == 0.001
+
+
+    def test_idle_poll_is_one_call(self):
+        """Test that an idle poll checks EXISTS instead of scanning every lane."""
+        client = CountingRedis(FakeRedis())
+        fetcher = AdaptivePollFetcher(LeasedSignalQueue(client, worker_id="w1"), min_interval=0.001)
+
+        async def run():
+            await fetcher.fetch()  # startup claim
+            client.commands.clear()
+            for _ in range(3):
+                assert await fetcher.fetch() is None
+
+        asyncio.run(run())
+        assert client.commands == ["exists"] * 3
+
+
+class TestBlockingFetcher:
+    """Test BLMOVE-based claiming."""
+
+    def test_claims_after_doorbell(self):
+        """Test that an idle fetch waits on the doorbell, then claims into processing."""
+        redis = FakeRedis()
+        queue = LeasedSignalQueue(AsyncFakeRedis(redis), worker_id="w1")
+        client = FakeBlockingClient(redis, ["s1"])
+        fetcher = BlockingFetcher(queue, client, block_timeout=2)
+
+        assert asyncio.run(fetcher.fetch()) == "s1"
+        assert redis.lists[queue.processing_key("w1")] == ["s1"]
+        assert asyncio.run(fetcher.fetch()) is None
+        assert client.calls[0] == ([DOORBELL_KEY], 2)
+
+    def test_claims_queued_lanes_before_blocking(self):
+        """Test that waiting signals in any lane are claimed without blocking."""
+        redis = FakeRedis()
+        redis.rpush(lane_key("low"), "s1")
+        queue = LeasedSignalQueue(AsyncFakeRedis(redis), worker_id="w1")
+        client = FakeBlockingClient(redis, [])
+        fetcher = BlockingFetcher(queue, client, block_timeout=2)
+
+        assert asyncio.run(fetcher.fetch()) == "s1"
+        assert client.calls == []
+
+    def test_idle_block_does_not_claim(self):
+        """Test that a timed-out block costs one EXISTS, not a claim over every lane."""
+        redis = FakeRedis()
+        counting = CountingRedis(redis)
+        client = FakeBlockingClient(redis, [])
+        fetcher = BlockingFetcher(LeasedSignalQueue(counting, worker_id="w1"), client, block_timeout=2)
+
+        async def run():
+            await fetcher.fetch()  # startup claim, then the first block
+            counting.commands.clear()
+            for _ in range(3):
+                assert await fetcher.fetch() is None
+
+        asyncio.run(run())
+        assert counting.commands == ["exists"] * 3
+        assert len(client.calls) == 4
+
+    def test_falls_back_to_polling_without_redis_url(self):
+        """Test that blocking mode without REDIS_URL uses adaptive polling."""
+        queue = LeasedSignalQueue(AsyncFakeRedis(FakeRedis()), worker_id="w1")
+        settings = Settings(worker_fetch_mode="blocking", redis_url="")
+
+        assert isinstance(create_fetcher(queue, settings), AdaptivePollFetcher)
@@ -0,0 +1,122 @@
+"""Tests for urgency lanes in signal intake."""
+
+import asyncio
+import json
+
+from deepflow_agent.worker import (
+    LeasedSignalQueue,
+    RetryScheduler,
+    lane_key,
+    lane_of,
+    user_queue_key,
+)
+from deepflow_agent.worker.priority import weighted_schedule
+
+from .test_signal_leases import AsyncFakeRedis, FakeRedis
+
+
+def signal(name, lane=None):
+    data = {"source_id": name}
+    if lane:
+        data["lane"] = lane
+    return json.dumps(data)
+
+
+def make_queue(redis, worker_id="w1"):
+    queue = LeasedSignalQueue(AsyncFakeRedis(redis), worker_id=worker_id, visibility_timeout=30)
+    asyncio.run(queue.register())
+    return queue
+
+
+class TestLanes:
+    """Test lane keys, lane lookup and the weighted schedule."""
+
+    def test_lane_of(self):
+        """Test that the lane is read from the signal, defaulting to normal."""
+        assert lane_of(signal("a", "critical")) == "critical"
+        assert lane_of(signal("a")) == "normal"
+        assert lane_of(signal("a", "bogus")) == "normal"
+        assert lane_of("not json") == "normal"
+
+    def test_normal_lane_is_legacy_pending_key(self):
+        """Test that unclassified producers keep landing in the normal lane."""
+        assert lane_key("normal") == LeasedSignalQueue.PENDING_KEY
+        assert lane_key("low") == f"{LeasedSignalQueue.PENDING_KEY}:low"
+
+    def test_weighted_schedule_shares(self):
+        """Test that each lane appears in proportion to its weight."""
+        order = weighted_schedule({"high": 4, "normal": 2, "low": 1})
+        assert order.count("high") == 4
+        assert order.count("normal") == 2
+        assert order.count("low") == 1
+
+
+class TestPriorityClaims:
+    """Test claim order across lanes."""
+
+    def test_critical_jumps_backlog(self):
+        """Test that a critical signal is claimed before a large backlog."""
+        redis = FakeRedis()
+        redis.rpush(lane_key("low"), *[signal(f"news{i}", "low") for i in range(2000)])
+        redis.rpush(lane_key("normal"), *[signal(f"mail{i}") for i in range(500)])
+        redis.rpush(lane_key("critical"), signal("outage", "critical"))
+        queue = make_queue(redis)
+
+        assert json.loads(asyncio.run(queue.claim()))["source_id"] == "outage"
+
+    def test_weighted_share_under_backlog(self):
+        """Test that non-critical lanes share claims by weight without starving."""
+        redis = FakeRedis()
+        for lane in ("high", "normal", "low"):
+            redis.rpush(lane_key(lane), *[signal(f"{lane}{i}", lane) for i in range(100)])
+        queue = make_queue(redis)
+
+        claimed = [lane_of(asyncio.run(queue.claim())) for _ in range(70)]
+        assert claimed.count("high") == 40
+        assert claimed.count("normal") == 20
+        assert claimed.count("low") == 10
+
+    def test_empty_lane_falls_through(self):
+        """Test that an empty preferred lane does not waste a claim."""
+        redis = FakeRedis()
+        redis.rpush(lane_key("low"), signal("only", "low"))
+        queue = make_queue(redis)
+
+        assert lane_of(asyncio.run(queue.claim())) == "low"
+        assert asyncio.run(queue.claim()) is None
+
+    def test_lane_depths(self):
+        """Test per-lane backlog counts."""
+        redis = FakeRedis()
+        redis.rpush(lane_key("critical"), signal("a", "critical"))
+        redis.rpush(lane_key("low"), signal("b", "low"), signal("c", "low"))
+        queue = make_queue(redis)
+
+        assert asyncio.run(queue.lane_depths()) == {"critical": 1, "high": 0, "normal": 0, "low": 2}
+
+    def test_reaper_requeues_to_each_signals_lane(self):
+        """Test that an expired worker's signals go back to their own lanes."""
+        redis = FakeRedis()
+        redis.rpush(lane_key("critical"), signal("c1", "critical"))
+        redis.rpush(lane_key("low"), signal("l1", "low"), signal("l2", "low"))
+        dead = make_queue(redis, "dead")
+        alive = make_queue(redis, "alive")
+        asyncio.run(dead.claim())
+        asyncio.run(dead.claim())
+
+        redis.expire_lease("dead")
+        assert asyncio.run(alive.reap()) == 2
+        critical = redis.lists[user_queue_key("critical", "default_user")]
+        assert [json.loads(item)["source_id"] for item in critical] == ["c1"]
+        low = redis.lists[user_queue_key("low", "default_user")] + redis.lists[lane_key("low")]
+        assert [json.loads(item)["source_id"] for item in low] == ["l1", "l2"]
+
+    def test_retry_promotes_to_original_lane(self):
+        """Test that a retried signal goes back to its lane, not the normal one."""
+        redis = FakeRedis()
+        retries = RetryScheduler(redis, base_delay=1.0, jitter=0.0)
+        retries.schedule(signal("c1", "critical"), RuntimeError("boom"), now=0)
+
+        assert retries.promote_due(now=10) == 1
+        promoted = redis.lists[user_queue_key("critical", "default_user")]
+        assert json.loads(promoted[0])["source_id"] == "c1"
@@ -0,0 +1,244 @@
+"""Tests for leased signal consumption across workers."""
+
+import asyncio
+
+from deepflow_agent.worker import LeasedSignalQueue, RetryScheduler, user_queue_key
+
+USER_QUEUE = user_queue_key("normal", "default_user")
+
+
+class FakeRedis:
+    """In-memory stand-in for the list/set/zset/key commands used by the worker."""
+
+    def __init__(self):
+        self.lists = {}
+        self.sets = {}
+        self.zsets = {}
+        self.keys = {}
+
+    def rpush(self, key, *items):
+        self.lists.setdefault(key, []).extend(items)
+
+    def lpush(self, key, *items):
+        for item in items:
+            self.lists.setdefault(key, []).insert(0, item)
+
+    def lpop(self, key):
+        items = self.lists.get(key)
+        return items.pop(0) if items else None
+
+    def rpop(self, key):
+        items = self.lists.get(key)
+        return items.pop() if items else None
+
+    def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:None if end == -1 else end + 1]
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def lindex(self, key, index):
+        items = self.lists.get(key, [])
+        try:
+            return items[index]
+        except IndexError:
+            return None
+
+    def zadd(self, key, scores):
+        self.zsets.setdefault(key, {}).update(scores)
+
+    def zrangebyscore(self, key, min, max, offset=None, count=None):
+        zset = self.zsets.get(key, {})
+        due = sorted((score, member) for member, score in zset.items() if score <= max)
+        members = [member for _, member in due]
+        return members[offset or 0:(offset or 0) + count] if count else members
+
+    def zrange(self, key, start, end, withscores=False):
+        ranked = sorted((score, member) for member, score in self.zsets.get(key, {}).items())
+        ranked = ranked[start:None if end == -1 else end + 1]
+        return [(member, score) for score, member in ranked] if withscores else [m for _, m in ranked]
+
+    def zrem(self, key, member):
+        return 1 if self.zsets.get(key, {}).pop(member, None) is not None else 0
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def lmove(self, source, destination, wherefrom="LEFT", whereto="RIGHT"):
+        items = self.lists.get(source)
+        if not items:
+            return None
+        item = items.pop(0 if wherefrom == "LEFT" else -1)
+        target = self.lists.setdefault(destination, [])
+        if whereto == "LEFT":
+            target.insert(0, item)
+        else:
+            target.append(item)
+        return item
+
+    def ltrim(self, key, start, end):
+        items = self.lists.get(key, [])
+        self.lists[key] = items[start:None if end == -1 else end + 1]
+
+    def lrem(self, key, count, element):
+        items = self.lists.get(key, [])
+        if element not in items:
+            return 0
+        if count < 0:
+            del items[len(items) - 1 - items[::-1].index(element)]
+        else:
+            items.remove(element)
+        return 1
+
+    def set(self, key, value, ex=None):
+        self.keys[key] = value
+
+    def exists(self, *keys):
+        return sum(1 for key in keys if key in self.keys or self.lists.get(key) or self.sets.get(key))
+
+    def delete(self, key):
+        self.keys.pop(key, None)
+        self.lists.pop(key, None)
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(members)
+
+    def eval(self, script, keys=None, args=None):
+        """Run a worker Lua script through its Python equivalent (see SCRIPTS)."""
+        return SCRIPTS[script](self, keys or [], args or [])
+
+    def expire_lease(self, worker_id):
+        """Simulate a worker whose lease TTL ran out."""
+        self.keys.pop(LeasedSignalQueue.lease_key(worker_id), None)
+
+
+def _promote(redis, keys, args):
+    if not redis.zrem(keys[0], args[0]):
+        return 0
+    redis.rpush(keys[1], args[1])
+    redis.sadd(keys[2], args[2])
+    redis.rpush(keys[3], "1")
+    redis.ltrim(keys[3], -int(args[3]), -1)
+    return 1
+
+
+def _claim(redis, keys, args):
+    retired = []
+    for source, user in zip(keys[2:], args):
+        item = redis.lmove(source, keys[0], "LEFT", "RIGHT")
+        if item:
+            return [user, item, *retired]
+        if user != "*":
+            redis.srem(keys[1], user)
+            retired.append(user)
+    return ["", "", *retired]
+
+
+SCRIPTS = {RetryScheduler.PROMOTE_SCRIPT: _promote, LeasedSignalQueue.CLAIM_SCRIPT: _claim}
+
+
+class AsyncFakeRedis:
+    """FakeRedis behind the async client's interface (commands are coroutines)."""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+
+        async def command(*args, **kwargs):
+            await asyncio.sleep(0)  # let concurrent callers interleave, as over the network
+            return method(*args, **kwargs)
+
+        return command
+
+
+def make_queue(redis, worker_id, **kwargs):
+    queue = LeasedSignalQueue(AsyncFakeRedis(redis), worker_id=worker_id, visibility_timeout=30, **kwargs)
+    asyncio.run(queue.register())
+    return queue
+
+
+class TestLeasedSignalQueue:
+    """Test claim/ack, reaping and release."""
+
+    def test_claim_and_ack(self):
+        """Test that a claimed signal stays in processing until acked."""
+        redis = FakeRedis()
+        redis.rpush(LeasedSignalQueue.PENDING_KEY, "s1", "s2")
+        queue = make_queue(redis, "w1")
+
+        item = asyncio.run(queue.claim())
+        assert item == "s1"
+        assert redis.lists[queue.processing_key("w1")] == ["s1"]
+
+        asyncio.run(queue.ack(item))
+        assert redis.lists[queue.processing_key("w1")] == []
+        assert redis.lists[LeasedSignalQueue.PENDING_KEY] == ["s2"]
+
+    def test_reaper_requeues_signals_of_dead_worker_in_order(self):
+        """Test that an expired worker's signals return to their user's queue in order."""
+        redis = FakeRedis()
+        redis.rpush(LeasedSignalQueue.PENDING_KEY, "s1", "s2", "s3")
+        dead = make_queue(redis, "dead")
+        alive = make_queue(redis, "alive")
+        asyncio.run(dead.claim())
+        asyncio.run(dead.claim())
+
+        redis.expire_lease("dead")
+        requeued = asyncio.run(alive.reap())
+
+        assert requeued == 2
+        assert redis.lists[USER_QUEUE] == ["s1", "s2"]
+        assert redis.lists[LeasedSignalQueue.PENDING_KEY] == ["s3"]
+        assert "default_user" in redis.smembers("deepflow:signals:pending:users")
+        assert "dead" not in redis.smembers(LeasedSignalQueue.WORKERS_KEY)
+
+    def test_racing_reapers_requeue_each_signal_once(self):
+        """Test that two reapers of the same dead worker hand back each signal exactly once."""
+        redis = FakeRedis()
+        redis.rpush(LeasedSignalQueue.PENDING_KEY, "s1", "s2", "s3")
+        dead = make_queue(redis, "dead")
+        first = make_queue(redis, "first")
+        second = make_queue(redis, "second")
+        for _ in range(3):
+            asyncio.run(dead.claim())
+        redis.expire_lease("dead")
+
+        async def race():
+            return await asyncio.gather(first.reap(), second.reap())
+
+        assert sum(asyncio.run(race())) == 3
+        assert redis.lists[USER_QUEUE] == ["s1", "s2", "s3"]
+        assert redis.lists[first.processing_key("first")] == []
+        assert redis.lists[second.processing_key("second")] == []
+
+    def test_reaper_leaves_live_workers_alone(self):
+        """Test that signals under a valid lease are not re-queued."""
+        redis = FakeRedis()
+        redis.rpush(LeasedSignalQueue.PENDING_KEY, "s1")
+        busy = make_queue(redis, "busy")
+        other = make_queue(redis, "other")
+        asyncio.run(busy.claim())
+
+        assert asyncio.run(other.reap()) == 0
+        assert redis.lists[busy.processing_key("busy")] == ["s1"]
+
+    def test_release_returns_unfinished_signals(self):
+        """Test that a clean shutdown hands back in-flight signals."""
+        redis = FakeRedis()
+        redis.rpush(LeasedSignalQueue.PENDING_KEY, "s1", "s2")
+        queue = make_queue(redis, "w1")
+        asyncio.run(queue.claim())
+
+        assert asyncio.run(queue.release()) == 1
+        assert redis.lists[USER_QUEUE] == ["s1"]
+        assert redis.lists[LeasedSignalQueue.PENDING_KEY] == ["s2"]
+        assert not redis.exists(queue.lease_key("w1"))
@@ -0,0 +1,196 @@
+"""Tests for the single-call structured decision mode."""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from langchain_core.runnables import RunnableLambda
+
+from deepflow_agent.agents import StructuredDecisionAgent, to_analysis, to_plan
+from deepflow_agent.models import SemanticGatewayInput, StructuredDecision
+
+
+def decision(score=9, category="critical", actions=None):
+    return StructuredDecision.model_validate({
+        "urgency_score": score,
+        "category": category,
+        "summary": "Checkout API is down",
+        "suggested_action": "Page on-call",
+        "estimated_time_minutes": 30,
+        "actions": actions if actions is not None else [
+            {"tool": "add_to_queue", "task_summary": "Fix checkout outage", "estimated_minutes": 30},
+            {"tool": "send_telegram_notification", "title": "Outage", "body": "Checkout down", "urgency": "critical"},
+        ],
+    })
+
+
+def fake_llm(respond):
+    llm = MagicMock()
+    llm.with_structured_output.return_value = RunnableLambda(respond)
+    return llm
+
+
+class TestStructuredDecisionAgent:
+    """Test the schema-constrained single call."""
+
+    def test_decide_returns_parsed_decision(self):
+        """Test that the chain asks for the schema and passes the message through."""
+        seen = {}
+
+        def respond(prompt):
+            seen["text"] = prompt.to_string()
+            return decision()
+
+        llm = fake_llm(respond)
+        agent = StructuredDecisionAgent(llm)
+        result = asyncio.run(agent.decide(
+            SemanticGatewayInput(content="checkout is down", sender="ops", user_state="FLOW"),
+            source="telegram",
+        ))
+
+        assert llm.with_structured_output.call_args.args[0] is StructuredDecision
+        assert [a.tool for a in result.actions] == ["add_to_queue", "send_telegram_notification"]
+        assert "Source: telegram" in seen["text"]
+        assert '"FLOW" state' in seen["text"]
+
+
+class TestToPlan:
+    """Test conversion of the model's actions into tool calls."""
+
+    def test_routing_comes_from_the_message(self):
+        """Test that user, source and scores are filled in locally."""
+        plan = to_plan(decision(), user_id="u1", user_state="FLOW", sender="ops", source="jira", source_id="J-1")
+
+        queued, notified = plan.actions
+        assert queued.tool == "add_to_queue"
+        assert queued.args["user_id"] == "u1"
+        assert queued.args["source"] == "manual"
+        assert queued.args["urgency_score"] == 9
+        assert queued.args["category"] == "critical"
+        assert queued.args["task_summary"] == "Fix checkout outage"
+        assert notified.args == {"user_id": "u1", "title": "Outage", "body": "Checkout down", "urgency": "critical"}
+
+    def test_auto_reply_only_on_reply_channels(self):
+        """Test that auto-replies are addressed to the sender and dropped elsewhere."""
+        reply = decision(5, "standard", [{"tool": "add_to_queue", "task_summary": "Review"}, {"tool": "send_auto_reply"}])
+
+        slack = to_plan(reply, user_id="u1", user_state="FLOW", sender="alice", source="slack", source_id="m1")
+        assert [a.tool for a in slack.actions] == ["add_to_queue", "send_auto_reply"]
+        assert slack.actions[1].args["recipient"] == "alice"
+        assert slack.actions[1].args["original_msg_id"] == "m1"
+
+        jira = to_plan(reply, user_id="u1", user_state="FLOW", sender="alice", source="jira")
+        assert [a.tool for a in jira.actions] == ["add_to_queue"]
+
+    def test_duplicate_actions_run_once(self):
+        """Test that a tool repeated by the model is planned once."""
+        twice = decision(actions=[{"tool": "add_to_queue", "task_summary": "a"}, {"tool": "add_to_queue", "task_summary": "b"}])
+        plan = to_plan(twice, user_id="u1", user_state="IDLE", sender="ops", source="slack")
+        assert len(plan.actions) == 1
+
+    def test_analysis_is_truncated_like_the_gateway(self):
+        """Test that long summaries fit SemanticGatewayOutput."""
+        long = decision()
+        long.summary = "x" * 500
+        assert len(to_analysis(long).summary) == 200
+
+
+class TestSingleCallMode:
+    """Test AGENT_MODE=single_call in process_message."""
+
+    def run(self, agent):
+        from deepflow_agent.agents import react_agent
+
+        settings = MagicMock(agent_mode="single_call", llm_model="gpt-4-turbo", agent_rule_planner=True)
+        executed = []
+
+        async def execute(plan):
+            executed.append(plan)
+            return [{"name": a.tool, "args": a.args, "id": f"planned-{i}"} for i, a in enumerate(plan.actions)]
+
+        with patch.object(react_agent, "get_settings", return_value=settings), \
+                patch.object(react_agent, "get_structured_agent", return_value=agent), \
+                patch.object(react_agent, "execute_plan", side_effect=execute), \
+                patch.object(react_agent, "load_user_state", return_value="SHALLOW"):
+            result = asyncio.run(react_agent.process_message(
+                user_id="u1",
+                user_state=None,
+                message_content="checkout is down",
+                sender="ops",
+                source="slack",
+            ))
+        return result, executed
+
+    def test_one_call_then_local_execution(self):
+        """Test that the decision is executed without the gateway or ReAct agent."""
+        agent = MagicMock()
+
+        async def decide(input, source=None):
+            assert input.user_state == "SHALLOW"
+            return decision()
+
+        agent.decide = decide
+        result, executed = self.run(agent)
+
+        assert result["planner"] == "single_call"
+        assert result["analysis"]["urgency_score"] == 9
+        assert [c["name"] for c in result["tool_calls"]] == ["add_to_queue", "send_telegram_notification"]
+        assert set(result["timings"]) >= {"state_ms", "decide_ms", "actions_ms", "total_ms"}
+        assert len(executed) == 1
+
+    def test_failed_call_falls_back_to_two_phase(self):
+        """Test that a failed structured call takes the two-phase path."""
+        from deepflow_agent.agents import react_agent
+        from deepflow_agent.models import SemanticGatewayOutput
+
+        agent = MagicMock()
+
+        async def decide(input, source=None):
+            raise ValueError("schema mismatch")
+
+        agent.decide = decide
+        gateway = MagicMock()
+
+        async def analyze(input):
+            return SemanticGatewayOutput(urgency_score=2, category="low", summary="FYI", suggested_action="")
+
+        gateway.analyze = analyze
+        with patch.object(react_agent, "get_semantic_gateway", return_value=gateway), \
+                patch.object(react_agent, "load_conversation_history", return_value=""):
+            result, executed = self.run(agent)
+
+        assert result["planner"] == "rules"
+        assert [c["name"] for c in result["tool_calls"]] == ["add_to_queue"]
+
+    def test_ingested_signal_replies_to_its_sender(self):
+        """Test that a signal from process_signal is decided and replied to as its real sender."""
+        import json
+
+        import main
+        from deepflow_agent.agents import react_agent
+
+        seen = []
+        agent = MagicMock()
+
+        async def decide(input, source=None):
+            seen.append(input)
+            return decision(5, "standard", [{"tool": "send_auto_reply"}])
+
+        agent.decide = decide
+        settings = MagicMock(agent_mode="single_call", llm_model="gpt-4-turbo", agent_rule_planner=True)
+        executed = []
+
+        async def execute(plan):
+            executed.append(plan)
+            return []
+
+        signal = {"source": "email", "content": "Lunch on Friday?", "sender": "bob@corp.com", "metadata": {"user_id": "u1"}}
+        with patch.object(react_agent, "get_settings", return_value=settings), \
+                patch.object(react_agent, "get_structured_agent", return_value=agent), \
+                patch.object(react_agent, "execute_plan", side_effect=execute), \
+                patch.object(react_agent, "load_user_state", return_value="FLOW"):
+            asyncio.run(main.process_signal(json.dumps(signal)))
+
+        assert (seen[0].sender, seen[0].content) == ("bob@corp.com", "Lunch on Friday?")
+        reply = executed[0].actions[0].args
+        assert reply["recipient"] == reply["sender_name"] == "bob@corp.com"
+        assert reply["incoming_content"] == "Lunch on Friday?"
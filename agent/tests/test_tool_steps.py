@@ -0,0 +1,150 @@
+"""Tests for concurrent tool calls within one agent step."""
+
+import asyncio
+from typing import Any, List
+
+from langchain.agents import create_agent
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from deepflow_agent.agents import ToolStepMiddleware, record_tool_steps, run_step
+from deepflow_agent.agents.tool_steps import step_dependencies
+
+DELAY = 0.1
+
+
+class ToolCallingFakeModel(GenericFakeChatModel):
+    """Fake chat model that accepts bind_tools and replays scripted messages."""
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self
+
+
+def call(name, call_id, **args):
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+def agent_with(calls: List[dict], log: List[str]):
+    """Agent whose model requests `calls` in one step, then answers."""
+
+    async def work(name):
+        log.append(f"start:{name}")
+        await asyncio.sleep(DELAY)
+        log.append(f"end:{name}")
+        return "ok"
+
+    @tool
+    async def add_to_queue(user_id: str) -> str:
+        """Queue a task."""
+        return await work("add_to_queue")
+
+    @tool
+    async def send_telegram_notification(user_id: str) -> str:
+        """Notify on Telegram."""
+        return await work("send_telegram_notification")
+
+    @tool
+    async def update_task_status(user_id: str) -> str:
+        """Update a task."""
+        return await work("update_task_status")
+
+    model = ToolCallingFakeModel(messages=iter([AIMessage(content="", tool_calls=calls), AIMessage(content="done")]))
+    return create_agent(
+        model,
+        [add_to_queue, send_telegram_notification, update_task_status],
+        middleware=[ToolStepMiddleware()],
+    )
+
+
+class TestStepDependencies:
+    """Test the dependency allowlist."""
+
+    def test_only_listed_pairs_wait(self):
+        """Test that calls only wait for earlier calls of tools they depend on."""
+        names = ["add_to_queue", "send_telegram_notification", "update_task_status", "send_browser_notification"]
+        assert step_dependencies(names) == [[], [], [0], [1]]
+        # Order in the step matters: nothing to wait for if the dependency comes later
+        assert step_dependencies(["update_task_status", "add_to_queue"]) == [[], []]
+
+
+class TestRunStep:
+    """Test run_step used by the rule planner."""
+
+    def test_independent_calls_overlap(self):
+        """Test that queue + notify costs about as much as the slowest tool."""
+        async def invoke(c):
+            await asyncio.sleep(DELAY)
+            return c["name"]
+
+        calls = [{"name": "add_to_queue", "id": "1"}, {"name": "send_telegram_notification", "id": "2"}]
+        with record_tool_steps() as steps:
+            results, step = asyncio.run(run_step(calls, invoke))
+
+        assert results == ["add_to_queue", "send_telegram_notification"]
+        assert steps == [step]
+        assert step.wall_ms < 1.6 * DELAY * 1000
+        assert step.serial_ms >= 2 * DELAY * 1000 * 0.9
+        assert [t.name for t in step.tools] == ["add_to_queue", "send_telegram_notification"]
+
+    def test_dependent_call_runs_after_failed_dependency(self):
+        """Test ordering, and that a failed dependency does not block its dependent."""
+        order = []
+
+        async def invoke(c):
+            order.append(c["name"])
+            await asyncio.sleep(0.01)
+            if c["name"] == "send_telegram_notification":
+                raise RuntimeError("telegram down")
+            return "ok"
+
+        async def safe(c):
+            try:
+                return await invoke(c)
+            except RuntimeError as e:
+                return str(e)
+
+        calls = [{"name": "send_telegram_notification", "id": "1"}, {"name": "send_browser_notification", "id": "2"}]
+        results, step = asyncio.run(run_step(calls, safe))
+
+        assert results == ["telegram down", "ok"]
+        assert step.tools[1].start_ms >= step.tools[0].end_ms
+        assert step.tools[1].waited_ms > 0
+
+
+class TestToolStepMiddleware:
+    """Test ordering and timing inside the ReAct agent."""
+
+    def test_queue_and_notify_run_concurrently(self):
+        """Test that one step's independent tools overlap and the step is reported."""
+        log = []
+        agent = agent_with([call("add_to_queue", "c1", user_id="u1"), call("send_telegram_notification", "c2", user_id="u1")], log)
+
+        async def run():
+            with record_tool_steps() as steps:
+                await agent.ainvoke({"messages": [{"role": "user", "content": "outage"}]})
+            return steps
+
+        steps = asyncio.run(run())
+
+        # Both started before either finished
+        assert set(log[:2]) == {"start:add_to_queue", "start:send_telegram_notification"}
+        assert len(steps) == 1
+        assert {t.name for t in steps[0].tools} == {"add_to_queue", "send_telegram_notification"}
+        assert steps[0].wall_ms < 1.6 * DELAY * 1000
+
+    def test_dependent_tool_waits_within_step(self):
+        """Test that update_task_status waits for add_to_queue from the same step."""
+        log = []
+        agent = agent_with([call("add_to_queue", "c1", user_id="u1"), call("update_task_status", "c2", user_id="u1")], log)
+
+        async def run():
+            with record_tool_steps() as steps:
+                await agent.ainvoke({"messages": [{"role": "user", "content": "done"}]})
+            return steps
+
+        steps = asyncio.run(run())
+
+        assert log == ["start:add_to_queue", "end:add_to_queue", "start:update_task_status", "end:update_task_status"]
+        update = next(t for t in steps[0].tools if t.name == "update_task_status")
+        assert update.waited_ms >= DELAY * 1000 * 0.9
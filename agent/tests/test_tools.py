@@ -0,0 +1,157 @@
+"""Tests for the async agent tools."""
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from deepflow_agent.tools import add_to_queue, send_auto_reply, send_telegram_notification
+from deepflow_agent.tools import base
+
+
+class FakeAsyncRedis:
+    """In-memory stand-in for the async Upstash client (commands used by the tools)."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.values = {}
+        self.zsets = {}
+        self.lists = {}
+        self.published = []
+
+    async def _tick(self):
+        await asyncio.sleep(self.delay)
+
+    async def get(self, key):
+        await self._tick()
+        return self.values.get(key)
+
+    async def set(self, key, value):
+        await self._tick()
+        self.values[key] = value
+
+    async def zadd(self, key, mapping):
+        await self._tick()
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zcard(self, key):
+        await self._tick()
+        return len(self.zsets.get(key, {}))
+
+    async def zrevrank(self, key, member):
+        await self._tick()
+        ranked = sorted(self.zsets.get(key, {}).items(), key=lambda kv: -kv[1])
+        return [m for m, _ in ranked].index(member)
+
+    async def lpush(self, key, value):
+        await self._tick()
+        self.lists.setdefault(key, []).insert(0, value)
+
+    async def ltrim(self, key, start, stop):
+        await self._tick()
+        self.lists[key] = self.lists.get(key, [])[start:stop + 1]
+
+    async def publish(self, channel, message):
+        await self._tick()
+        self.published.append((channel, message))
+
+
+class TestAsyncTools:
+    """Test that tools run as coroutines on the caller's event loop."""
+
+    def test_add_to_queue_uses_async_client(self):
+        """Test queueing a task and publishing the queue diff without blocking calls."""
+        redis = FakeAsyncRedis()
+        with patch("deepflow_agent.tools.add_to_queue.get_async_redis_client", return_value=redis), \
+                patch("deepflow_agent.tools.base.get_async_redis_client", return_value=redis):
+            result = asyncio.run(add_to_queue.ainvoke({
+                "user_id": "u1",
+                "task_summary": "Fix checkout",
+                "urgency_score": 9,
+                "category": "critical",
+                "source": "slack",
+            }))
+
+        assert result["success"] is True
+        assert result["result"]["queue_length"] == 1
+        assert list(redis.zsets) == ["user:u1:queue"]
+        channel, event = redis.published[0]
+        assert channel == "user_events:u1"
+        assert json.loads(event)["type"] == "queue"
+
+    def test_telegram_notification_inside_running_loop(self):
+        """Test that the Telegram send is awaited instead of nesting asyncio.run."""
+        redis = FakeAsyncRedis()
+        redis.values["deepflow_binding:u1"] = "4242"
+        bot = MagicMock()
+        bot.send_message = AsyncMock()
+
+        with patch("deepflow_agent.tools.send_telegram_notification.get_async_redis_client", return_value=redis), \
+                patch("deepflow_agent.tools.send_telegram_notification.get_telegram_bot", return_value=bot):
+            result = asyncio.run(send_telegram_notification.ainvoke({
+                "user_id": "u1",
+                "title": "Outage",
+                "body": "Checkout is down",
+                "urgency": "critical",
+            }))
+
+        assert result["result"]["success"] is True
+        bot.send_message.assert_awaited_once()
+        assert bot.send_message.call_args.kwargs["chat_id"] == "4242"
+        assert len(redis.lists["user:u1:telegram_notification_history"]) == 1
+
+    def test_auto_reply_awaits_negotiator(self):
+        """Test that the reply is generated with the async negotiator and sent to Slack."""
+        negotiator = MagicMock()
+        negotiator.generate_reply = AsyncMock(return_value=MagicMock(should_reply=True, reply_message="In focus, later!"))
+        slack = MagicMock()
+        slack.chat_postMessage = AsyncMock(return_value={"ts": "1.2"})
+
+        with patch("deepflow_agent.agents.auto_negotiator.create_auto_negotiator", return_value=negotiator), \
+                patch("deepflow_agent.tools.send_auto_reply.get_slack_client", return_value=slack):
+            result = asyncio.run(send_auto_reply.ainvoke({
+                "channel": "slack",
+                "recipient": "C123",
+                "incoming_content": "Can you look at my PR?",
+                "sender_name": "alice",
+            }))
+
+        assert result["result"]["status"] == "sent"
+        negotiator.generate_reply.assert_awaited_once()
+        assert slack.chat_postMessage.call_args.kwargs == {"channel": "C123", "text": "In focus, later!"}
+
+    def test_tool_calls_overlap(self):
+        """Test that concurrent tool calls share the loop instead of queueing behind each other."""
+        redis = FakeAsyncRedis(delay=0.05)
+        args = {"user_id": "u1", "task_summary": "t", "urgency_score": 5, "category": "standard", "source": "manual"}
+
+        async def run_three():
+            return await asyncio.gather(*(add_to_queue.ainvoke(args) for _ in range(3)))
+
+        with patch("deepflow_agent.tools.add_to_queue.get_async_redis_client", return_value=redis), \
+                patch("deepflow_agent.tools.base.get_async_redis_client", return_value=redis):
+            started = time.perf_counter()
+            results = asyncio.run(run_three())
+            elapsed = time.perf_counter() - started
+
+        assert all(r["success"] for r in results)
+        assert len(redis.zsets["user:u1:queue"]) == 3
+        # 5 Redis round trips each: ~0.25s overlapped, ~0.75s one after another
+        assert elapsed < 0.6
+
+
+class TestAsyncRedisClient:
+    """Test the per-event-loop async client."""
+
+    def test_one_client_per_loop(self, monkeypatch):
+        """Test that a loop reuses its client and a new loop gets its own."""
+        monkeypatch.setenv("UPSTASH_REDIS_REST_URL", "https://example.upstash.io")
+        monkeypatch.setenv("UPSTASH_REDIS_REST_TOKEN", "token")
+
+        async def twice():
+            return base.get_async_redis_client(), base.get_async_redis_client()
+
+        first, again = asyncio.run(twice())
+        other, _ = asyncio.run(twice())
+        assert first is again
+        assert other is not first
@@ -0,0 +1,164 @@
+"""Tests for the local urgency classifier in front of the semantic gateway."""
+
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from deepflow_agent.agents import ClassifierStats, SemanticGatewayAgent, UrgencyClassifier, train_classifier
+from deepflow_agent.agents.urgency_classifier import LABEL_LOG_KEY, extract_ngrams, load_examples
+from deepflow_agent.models import SemanticGatewayInput
+
+EXAMPLES = [
+    ("Production is down, checkout API returns 500 for every request", "oncall@corp.com", 10),
+    ("URGENT: database outage, customers cannot log in", "oncall@corp.com", 9),
+    ("Outage: payments service is down right now", "alerts@corp.com", 10),
+    ("正式環境掛了，結帳 API 全部回傳 500", "值班@corp.com", 10),
+    ("緊急：資料庫故障，客戶無法登入", "值班@corp.com", 9),
+    ("Weekly newsletter: ten tips for better meetings", "news@medium.com", 1),
+    ("Newsletter: this week's top stories in design", "news@medium.com", 1),
+    ("Lunch on Friday? The team is going out", "bob@corp.com", 2),
+    ("本週電子報：十個提升效率的小技巧", "news@medium.com", 1),
+    ("下週五團隊聚餐，大家有空嗎？", "bob@corp.com", 2),
+]
+
+
+@pytest.fixture(scope="module")
+def model():
+    return train_classifier(EXAMPLES, epochs=40, n_features=1 << 16)
+
+
+def message(content, sender="oncall@corp.com"):
+    return SemanticGatewayInput(content=content, sender=sender, user_state="FLOW")
+
+
+class TestFeatures:
+    """Test n-gram extraction."""
+
+    def test_digits_case_and_width_do_not_count(self):
+        """Test that numbers are masked and full-width text is normalized."""
+        assert extract_ngrams("Build 4821 FAILED") == extract_ngrams("build 17 failed")
+        assert extract_ngrams("ＡＰＩ ５００") == extract_ngrams("api 500")
+
+    def test_chinese_gets_character_ngrams(self):
+        """Test that unsegmented Chinese yields character n-grams."""
+        features = extract_ngrams("資料庫故障")
+        assert "c2:故障" in features
+        assert "c4:資料庫故" in features
+
+
+class TestUrgencyClassifier:
+    """Test training, prediction and the artifact."""
+
+    def test_predicts_unseen_messages_in_both_languages(self, model):
+        """Test that urgent and low messages are told apart in English and Chinese."""
+        assert model.predict("The API is down, customers see 500 errors", "oncall@corp.com").category == "critical"
+        assert model.predict("資料庫掛了，客戶無法結帳", "值班@corp.com").category == "critical"
+        assert model.predict("Newsletter: top stories this week", "news@medium.com").category in ("low", "discard")
+        assert model.predict("本週電子報：效率技巧", "news@medium.com").category in ("low", "discard")
+
+    def test_confidence_is_category_probability(self, model):
+        """Test that confidence is a probability and gates predict_confident."""
+        model.stats = ClassifierStats()
+        prediction = model.predict("Production is down", "oncall@corp.com")
+        assert 0 < prediction.confidence <= 1
+        assert model.predict_confident("Production is down", "oncall@corp.com", min_confidence=1.01) is None
+        assert model.predict_confident("Production is down", "oncall@corp.com", min_confidence=0.0) == prediction
+        assert model.stats.fallback_rate == pytest.approx(0.5)
+
+    def test_artifact_round_trip(self, model, tmp_path):
+        """Test that a saved and loaded model predicts the same."""
+        path = tmp_path / "classifier.json"
+        model.save(path)
+        loaded = UrgencyClassifier.load(path)
+
+        for content, sender, _ in EXAMPLES:
+            expected, actual = model.predict(content, sender), loaded.predict(content, sender)
+            assert actual.urgency_score == expected.urgency_score
+            assert actual.confidence == pytest.approx(expected.confidence, abs=1e-3)
+
+    def test_load_rejects_other_files(self, tmp_path):
+        """Test that a file that is not a classifier artifact is refused."""
+        path = tmp_path / "other.json"
+        path.write_text(json.dumps({"format": "something-else"}))
+        with pytest.raises(ValueError):
+            UrgencyClassifier.load(path)
+
+    def test_load_examples_reads_json_and_jsonl(self, tmp_path):
+        """Test that golden datasets and label logs load alike."""
+        case = {"input": {"content": "Server down", "sender": "ops"}, "expected": {"urgency_score": 9}}
+        (tmp_path / "golden.json").write_text(json.dumps([case]))
+        (tmp_path / "labels.jsonl").write_text(json.dumps(case) + "\n\n" + json.dumps(case) + "\n")
+        examples = load_examples([tmp_path / "golden.json", tmp_path / "labels.jsonl"])
+        assert examples == [("Server down", "ops", 9)] * 3
+
+
+class FakeLabelRedis:
+    """Async Redis pipeline recording LPUSH/LTRIM."""
+
+    def __init__(self):
+        self.lists = {}
+
+    def pipeline(self):
+        redis, commands = self, []
+
+        class Pipeline:
+            def lpush(self, key, value):
+                commands.append(lambda: redis.lists.setdefault(key, []).insert(0, value))
+
+            def ltrim(self, key, start, stop):
+                commands.append(lambda: redis.lists.__setitem__(key, redis.lists.get(key, [])[start:stop + 1]))
+
+            async def exec(self):
+                return [command() for command in commands]
+
+        return Pipeline()
+
+
+class TestTieredGateway:
+    """Test the classifier as the gateway's first tier."""
+
+    def gateway(self, classifier, **kwargs):
+        calls = []
+
+        def respond(prompt):
+            calls.append(prompt)
+            return '{"urgency_score": 3, "category": "low", "summary": "From the LLM"}'
+
+        agent = SemanticGatewayAgent(llm=MagicMock(), classifier=classifier, **kwargs)
+        agent.chain = RunnableLambda(respond)
+        return agent, calls
+
+    def test_confident_prediction_skips_llm(self, model):
+        """Test that a confident classifier answers without the LLM."""
+        agent, calls = self.gateway(model, min_confidence=0.0)
+        output = asyncio.run(agent.analyze(message("Production is down, checkout returns 500")))
+
+        assert calls == []
+        assert output.category == "critical"
+        assert output.summary == "Production is down, checkout returns 500"
+
+    def test_unsure_prediction_falls_back_to_llm(self, model):
+        """Test that the LLM answers below the confidence threshold."""
+        agent, calls = self.gateway(model, min_confidence=1.01)
+        output = asyncio.run(agent.analyze(message("Production is down")))
+
+        assert len(calls) == 1
+        assert output.summary == "From the LLM"
+
+    def test_llm_answers_are_logged_as_labels(self, monkeypatch):
+        """Test that LLM analyses are pushed to the capped label log."""
+        redis = FakeLabelRedis()
+        monkeypatch.setattr("deepflow_agent.tools.base.get_async_redis_client", lambda: redis)
+        agent, _ = self.gateway(None, label_log_size=2)
+
+        async def run():
+            for text in ("first", "second", "third"):
+                await agent.analyze(message(text))
+
+        asyncio.run(run())
+        labels = [json.loads(raw) for raw in redis.lists[LABEL_LOG_KEY]]
+        assert [label["input"]["content"] for label in labels] == ["third", "second"]
+        assert labels[0]["expected"] == {"urgency_score": 3, "category": "low"}
@@ -0,0 +1,280 @@
+"""Tests for the bounded-concurrency worker pool."""
+
+import asyncio
+import random
+from collections import defaultdict
+
+import pytest
+
+from deepflow_agent.worker import WorkerPool
+
+
+class TestWorkerPool:
+    """Test WorkerPool concurrency, timeouts and counters."""
+
+    def test_runs_signals_concurrently_up_to_limit(self):
+        """Test that at most `concurrency` handlers run at once."""
+        running = 0
+        peak = 0
+
+        async def handler(item):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        async def run():
+            pool = WorkerPool(handler, concurrency=5)
+            for i in range(20):
+                await pool.submit(i)
+            await pool.drain()
+            return pool
+
+        pool = asyncio.run(run())
+
+        assert peak == 5
+        assert pool.stats.completed == 20
+        assert pool.stats.in_flight == 0
+
+    def test_network_bound_signals_overlap(self):
+        """Test that waiting handlers overlap instead of running serially."""
+
+        async def handler(item):
+            await asyncio.sleep(0.05)
+
+        async def run():
+            pool = WorkerPool(handler, concurrency=50)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            for i in range(50):
+                await pool.submit(i)
+            await pool.drain()
+            return loop.time() - start
+
+        # Serial processing would take 2.5s
+        assert asyncio.run(run()) < 0.5
+
+    def test_counts_failures_and_timeouts(self):
+        """Test that errors and timeouts are counted and free their slot."""
+
+        async def handler(item):
+            if item == "boom":
+                raise RuntimeError("boom")
+            if item == "slow":
+                await asyncio.sleep(1)
+
+        async def run():
+            pool = WorkerPool(handler, concurrency=1, timeout=0.05)
+            for item in ["ok", "boom", "slow", "ok"]:
+                await pool.submit(item)
+            await pool.drain()
+            return pool
+
+        stats = asyncio.run(run()).stats.to_dict()
+
+        assert stats == {"in_flight": 0, "completed": 2, "failed": 2, "timed_out": 1}
+
+    def test_accepts_up_to_max_pending(self):
+        """Test that submit() blocks once max_pending signals are unfinished."""
+        release = None
+
+        async def handler(item):
+            await release.wait()
+
+        async def run():
+            nonlocal release
+            release = asyncio.Event()
+            pool = WorkerPool(handler, concurrency=2, max_pending=3)
+            for i in range(3):
+                await pool.submit(i, key="alice")
+            blocked = asyncio.create_task(pool.submit(3, key="alice"))
+            await asyncio.sleep(0.01)
+            was_blocked = not blocked.done()
+            release.set()
+            await blocked
+            await pool.drain()
+            return was_blocked, pool
+
+        was_blocked, pool = asyncio.run(run())
+
+        assert was_blocked
+        assert pool.stats.completed == 4
+        assert pool.lane_count == 0
+
+    def test_rejects_invalid_concurrency(self):
+        """Test that a pool needs at least one slot."""
+        with pytest.raises(ValueError):
+            WorkerPool(lambda item: asyncio.sleep(0), concurrency=0)
+
+
+class TestUserLanes:
+    """Test per-user ordering with cross-user parallelism."""
+
+    def test_per_user_order_under_load(self):
+        """Test that 1,000 concurrent signals keep per-user arrival order."""
+        rng = random.Random(42)
+        signals = [(f"user-{rng.randrange(50)}", seq) for seq in range(1000)]
+        processed = defaultdict(list)
+        active_per_user = defaultdict(int)
+        running = 0
+        peak = 0
+        overlaps = 0
+
+        async def handler(signal):
+            nonlocal running, peak, overlaps
+            user_id, seq = signal
+            active_per_user[user_id] += 1
+            if active_per_user[user_id] > 1:
+                overlaps += 1
+            running += 1
+            peak = max(peak, running)
+            # Random latency would reorder an unkeyed pool
+            await asyncio.sleep(rng.random() * 0.003)
+            processed[user_id].append(seq)
+            running -= 1
+            active_per_user[user_id] -= 1
+
+        async def run():
+            pool = WorkerPool(handler, concurrency=32, max_pending=1000)
+            for signal in signals:
+                await pool.submit(signal, key=signal[0])
+            await pool.drain()
+            return pool
+
+        pool = asyncio.run(run())
+
+        expected = defaultdict(list)
+        for user_id, seq in signals:
+            expected[user_id].append(seq)
+
+        assert processed == expected
+        assert overlaps == 0
+        assert peak > 1
+        assert pool.stats.completed == 1000
+        assert pool.lane_count == 0
+
+    def test_busy_user_does_not_block_others(self):
+        """Test that a long lane holds one slot and other users proceed."""
+        finished = []
+
+        async def handler(signal):
+            user_id, _ = signal
+            await asyncio.sleep(0.02 if user_id == "busy" else 0.001)
+            finished.append(user_id)
+
+        async def run():
+            pool = WorkerPool(handler, concurrency=2)
+            for i in range(5):
+                await pool.submit(("busy", i), key="busy")
+            for i in range(5):
+                await pool.submit((f"user-{i}", 0), key=f"user-{i}")
+            await pool.drain()
+
+        asyncio.run(run())
+
+        # All quick users finish before the busy lane's second signal
+        assert finished[:5] == [f"user-{i}" for i in range(5)]
+
+
+class TestPoolCallbacks:
+    """Test completion and failure callbacks."""
+
+    def test_callbacks_receive_outcome(self):
+        """Test that success acks and failures (including timeouts) report the error."""
+        completed = []
+        failed = []
+
+        async def handler(item):
+            if item == "boom":
+                raise RuntimeError("boom")
+            if item == "slow":
+                await asyncio.sleep(1)
+
+        async def run():
+            pool = WorkerPool(
+                handler,
+                timeout=0.05,
+                on_complete=completed.append,
+                on_failure=lambda item, error: failed.append((item, type(error))),
+            )
+            for item in ["ok", "boom", "slow"]:
+                await pool.submit(item)
+            await pool.drain()
+
+        asyncio.run(run())
+
+        assert completed == ["ok"]
+        assert sorted(failed) == [("boom", RuntimeError), ("slow", TimeoutError)]
+
+    def test_coroutine_callbacks_are_awaited(self):
+        """Test that async callbacks (e.g. an ack over the async client) finish before the slot frees."""
+        acked = []
+
+        async def handler(item):
+            pass
+
+        async def ack(item):
+            await asyncio.sleep(0.01)
+            acked.append(item)
+
+        async def run():
+            pool = WorkerPool(handler, on_complete=ack)
+            await pool.submit("s1")
+            await pool.drain()
+
+        asyncio.run(run())
+
+        assert acked == ["s1"]
+
+
+class TestPoolShutdown:
+    """Test bounded graceful shutdown."""
+
+    def test_finishes_in_flight_before_deadline(self):
+        """Test that signals finishing within the deadline complete normally."""
+        completed = []
+
+        async def handler(item):
+            await asyncio.sleep(0.02)
+
+        async def run():
+            pool = WorkerPool(handler, concurrency=4, on_complete=completed.append)
+            for i in range(4):
+                await pool.submit(i)
+            return await pool.shutdown(timeout=1.0)
+
+        assert asyncio.run(run()) == 0
+        assert sorted(completed) == [0, 1, 2, 3]
+
+    def test_cancels_signals_past_deadline_without_callbacks(self):
+        """Test that slow and queued signals are cancelled and neither acked nor failed."""
+        completed = []
+        failed = []
+
+        async def handler(item):
+            if item != "fast":
+                await asyncio.sleep(10)
+
+        async def run():
+            pool = WorkerPool(
+                handler,
+                concurrency=2,
+                on_complete=completed.append,
+                on_failure=lambda item, error: failed.append(item),
+            )
+            await pool.submit("fast")
+            await pool.submit("slow-a", key="u1")
+            await pool.submit("queued-a", key="u1")
+            started = asyncio.get_running_loop().time()
+            cancelled = await pool.shutdown(timeout=0.05)
+            return cancelled, asyncio.get_running_loop().time() - started, pool
+
+        cancelled, elapsed, pool = asyncio.run(run())
+
+        assert cancelled == 2
+        assert elapsed < 1.0
+        assert completed == ["fast"]
+        assert failed == []
+        assert pool.in_flight == 0
+        assert pool.lane_count == 0
@@ -3,18 +3,19 @@ Notifications API - SSE Stream for Browser Notifications
 
 Provides Server-Sent Events endpoint for real-time browser notifications.
 Agent's send_browser_notification tool publishes to Redis,
-this endpoint subscribes and streams to the frontend.
+a shared NotificationHub picks it up and this endpoint streams to the frontend.
 """
 
 import asyncio
 import json
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, List, Optional, Tuple
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Query, Request
 from fastapi.responses import StreamingResponse
 from upstash_redis import Redis
 
 from ..config import get_settings
+from ..services import NotificationHub, get_notification_hub
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
@@ -33,66 +34,125 @@ def get_redis_client() -> Redis:
     )
 
 
-async def notification_stream(user_id: str, request: Request) -> AsyncGenerator[str, None]:
+def format_sse(event: str, data: Any, event_id: Optional[str] = None) -> str:
+    """Format a single Server-Sent Event."""
+    id_line = f"id: {event_id}\n" if event_id else ""
+    return f"{id_line}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def format_batch(entries: List[Tuple[str, dict]]) -> str:
     """
-    Generate SSE events from Redis notifications.
+    Format stream entries as one SSE event.
     
-    Polls Redis list for new notifications and yields them as SSE events.
-    Note: Upstash REST API doesn't support blocking operations,
-    so we poll with a short interval.
+    A single entry is sent as `notification` (the original event shape);
+    several are sent together as a `notifications` array. The event ID is
+    the newest entry's stream ID either way.
     """
-    redis = get_redis_client()
-    notification_key = f"browser_notifications:{user_id}:pending"
+    last_id = entries[-1][0]
+    if len(entries) == 1:
+        return format_sse("notification", entries[0][1], last_id)
+    return format_sse("notifications", [data for _, data in entries], last_id)
+
+
+async def notification_stream(
+    user_id: str,
+    request: Request,
+    last_event_id: Optional[str] = None,
+) -> AsyncGenerator[str, None]:
+    """
+    Generate SSE events from Redis notifications.
     
-    # Send initial connection event
-    yield f"event: connected\ndata: {json.dumps({'status': 'connected', 'user_id': user_id})}\n\n"
+    Notifications are read from the user's Redis Stream by the process-wide
+    NotificationHub, which is woken by Redis pub/sub (or, without TCP Redis,
+    polls all connected users in one batched call per tick) and fans
+    results out to per-connection queues.
     
-    while True:
-        # Check if client disconnected
-        if await request.is_disconnected():
-            break
+    Each event carries its stream entry ID as the SSE `id:`. When the client
+    reconnects with Last-Event-ID, retained entries after it are replayed
+    before live delivery resumes; without one, replay starts after the last
+    entry delivered to the user (see NotificationHub.resume_point).
+    
+    Entries read together are sent as one batch event. Keep-alive pings are
+    only sent after `keepalive_interval` seconds without any other event.
+    """
+    hub = get_notification_hub()
+    queue = None
+    
+    try:
+        queue = await hub.subscribe(user_id)
+        
+        # Send initial connection event
+        yield format_sse("connected", {"status": "connected", "user_id": user_id})
         
+        # Replay what was missed. Live entries buffered in the queue during
+        # the replay are skipped below if the replay already covered them.
         try:
-            # Pop notification from pending list (LPOP)
-            notification = redis.lpop(notification_key)
+            if not last_event_id:
+                last_event_id = await hub.resume_point(user_id)
+            missed = await hub.replay(user_id, last_event_id)
+            if missed:
+                yield format_batch(missed)
+                last_event_id = missed[-1][0]
+                await hub.mark_delivered(user_id, last_event_id)
+        except Exception as e:
+            yield format_sse("error", {"error": str(e)})
+        
+        while True:
+            # Check if client disconnected
+            if await request.is_disconnected():
+                break
             
-            if notification:
-                # Parse and send as SSE event
-                try:
-                    data = json.loads(notification) if isinstance(notification, str) else notification
-                except json.JSONDecodeError:
-                    data = {"message": notification}
-                
-                yield f"event: notification\ndata: {json.dumps(data)}\n\n"
-            else:
-                # No notification, send keepalive ping
-                yield f"event: ping\ndata: {json.dumps({'type': 'ping'})}\n\n"
+            try:
+                event, data = await asyncio.wait_for(queue.get(), timeout=hub.keepalive_interval)
+            except asyncio.TimeoutError:
+                # Quiet for a full interval, send keepalive ping
+                yield format_sse("ping", {"type": "ping"})
+                continue
             
-            # Wait before next poll (500ms)
-            await asyncio.sleep(0.5)
+            if event != "notifications":
+                yield format_sse(event, data)
+                continue
             
-        except Exception as e:
-            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
-            await asyncio.sleep(1)
+            entries = [entry for entry in data if hub.is_newer(entry[0], last_event_id)]
+            if entries:
+                yield format_batch(entries)
+                last_event_id = entries[-1][0]
+                await hub.mark_delivered(user_id, last_event_id)
+    finally:
+        if queue is not None:
+            hub.unsubscribe(user_id, queue)
 
 
 @router.get("/stream/{user_id}")
-async def stream_notifications(user_id: str, request: Request):
+async def stream_notifications(
+    user_id: str,
+    request: Request,
+    last_event_id: Optional[str] = Query(
+        None, description="Resume after this event ID (fallback for the Last-Event-ID header)"
+    ),
+):
     """
     SSE endpoint for browser notifications.
     
     Frontend connects to this endpoint to receive real-time notifications
     from the Agent's send_browser_notification tool.
     
+    EventSource sends the Last-Event-ID header automatically when it
+    reconnects; a fresh page load can pass ?last_event_id= instead.
+    
     Usage:
         const eventSource = new EventSource('/api/v1/notifications/stream/user-123');
         eventSource.addEventListener('notification', (e) => {
             const data = JSON.parse(e.data);
             new Notification(data.title, { body: data.body });
         });
+        eventSource.addEventListener('notifications', (e) => {
+            for (const data of JSON.parse(e.data)) { ... }
+        });
     """
+    resume_from = request.headers.get("last-event-id") or last_event_id
     return StreamingResponse(
-        notification_stream(user_id, request),
+        notification_stream(user_id, request, resume_from),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -119,8 +179,15 @@ async def test_notification(user_id: str, title: str = "Test", body: str = "This
         "data": {"url": "/dashboard"}
     }
     
-    # Push to pending list (same format as Agent tool)
-    notification_key = f"browser_notifications:{user_id}:pending"
-    redis.rpush(notification_key, json.dumps(notification))
+    # Append to the user's capped stream (same format as Agent tool)
+    entry_id = redis.xadd(
+        NotificationHub.stream_key(user_id),
+        "*",
+        {"data": json.dumps(notification)},
+        maxlen=NotificationHub.STREAM_MAXLEN,
+    )
+    
+    # Wake up push-mode hubs
+    redis.publish(NotificationHub.channel(user_id), entry_id)
     
-    return {"status": "sent", "notification": notification}
+    return {"status": "sent", "id": entry_id, "notification": notification}
@@ -0,0 +1,183 @@
+"""
+Realtime API - Unified WebSocket Channel
+
+One authenticated WebSocket per tab that pushes queue diffs, focus state
+changes and browser notifications, replacing the GET /queue and GET /state
+polling loops and the separate notification SSE stream.
+
+Messages (server -> client, JSON):
+    {"type": "snapshot", "state": ..., "queue": [{"task_id", "score"}],
+     "current_task_id": ..., "total_count": ...}
+    {"type": "queue", "added": [...], "removed": [...], "reordered": [...]}
+    {"type": "state", "state": "FLOW"}
+    {"type": "notifications", "items": [{"id": ..., "data": {...}}]}
+    {"type": "ping"}
+
+If the pub/sub subscription cannot be established, the socket gets one
+snapshot and is closed with code 1011; the client then polls the REST
+endpoints until it reconnects.
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+
+from ..config import get_settings
+from ..deps import get_current_user, get_queue_manager, get_state_manager
+from ..services import NotificationHub, get_notification_hub, get_user_event_hub
+
+router = APIRouter(tags=["realtime"])
+
+# Queue entries included in the initial snapshot
+SNAPSHOT_QUEUE_SIZE = 50
+
+
+def build_snapshot(user_id: str) -> Dict[str, Any]:
+    """Current state and queue, sent once before live diffs (sync Redis calls, run it in a thread)."""
+    state_manager = get_state_manager()
+    queue_manager = get_queue_manager()
+    return {
+        "type": "snapshot",
+        "state": state_manager.get_state(user_id),
+        "queue": [
+            {"task_id": tid, "score": score}
+            for tid, score in queue_manager.peek(user_id, count=SNAPSHOT_QUEUE_SIZE)
+        ],
+        "current_task_id": queue_manager.get_current_task(user_id),
+        "total_count": queue_manager.get_queue_length(user_id),
+    }
+
+
+def format_notifications(entries) -> Dict[str, Any]:
+    """Wrap notification stream entries as one WebSocket message."""
+    return {
+        "type": "notifications",
+        "items": [{"id": entry_id, "data": data} for entry_id, data in entries],
+    }
+
+
+async def _pump_events(events: asyncio.Queue, outbox: asyncio.Queue) -> None:
+    """Forward queue/state change events to the connection's outbox."""
+    while True:
+        await outbox.put(await events.get())
+
+
+async def _pump_notifications(
+    hub: NotificationHub,
+    notifications: asyncio.Queue,
+    outbox: asyncio.Queue,
+    last_event_id: Optional[str],
+) -> None:
+    """Forward notification batches, skipping entries already replayed."""
+    while True:
+        event, data = await notifications.get()
+        if event != "notifications":
+            await outbox.put({"type": event, **data})
+            continue
+
+        entries = [entry for entry in data if hub.is_newer(entry[0], last_event_id)]
+        if entries:
+            await outbox.put(format_notifications(entries))
+            last_event_id = entries[-1][0]
+
+
+async def _drain_client(websocket: WebSocket) -> None:
+    """Read (and ignore) client frames until the socket closes."""
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.websocket("/ws")
+async def realtime_socket(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None, description="Access token (browsers cannot set headers on WebSocket)"),
+    last_event_id: Optional[str] = Query(None, description="Resume notifications after this ID"),
+):
+    """
+    Multiplexed push channel for queue, state and notification updates.
+
+    Usage:
+        const ws = new WebSocket(`ws://localhost:8000/api/v1/ws?token=${token}`);
+        ws.onmessage = (e) => {
+            const msg = JSON.parse(e.data);
+            if (msg.type === 'queue') { ... }
+        };
+    """
+    if not token:
+        authorization = websocket.headers.get("authorization", "")
+        token = authorization.removeprefix("Bearer ").strip() or None
+
+    try:
+        user = await get_current_user(token, get_settings())
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+
+    notification_hub = get_notification_hub()
+    event_hub = get_user_event_hub()
+    keepalive = notification_hub.keepalive_interval
+
+    # Subscribe before the snapshot so no change between the two is lost
+    try:
+        events = await event_hub.subscribe(user.id)
+    except asyncio.TimeoutError:
+        # Live updates are unavailable: send the current view once and let
+        # the client fall back to polling
+        try:
+            await websocket.send_json(await asyncio.to_thread(build_snapshot, user.id))
+        finally:
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Realtime updates unavailable")
+        return
+    notifications = None
+    outbox: asyncio.Queue = asyncio.Queue()
+    tasks = []
+
+    try:
+        notifications = await notification_hub.subscribe(user.id)
+        await websocket.send_json(await asyncio.to_thread(build_snapshot, user.id))
+
+        # Without a Last-Event-ID, resume after what the user last received
+        if not last_event_id:
+            last_event_id = await notification_hub.resume_point(user.id)
+        missed = await notification_hub.replay(user.id, last_event_id)
+        if missed:
+            await websocket.send_json(format_notifications(missed))
+            last_event_id = missed[-1][0]
+            await notification_hub.mark_delivered(user.id, last_event_id)
+
+        tasks = [
+            asyncio.create_task(_pump_events(events, outbox)),
+            asyncio.create_task(_pump_notifications(notification_hub, notifications, outbox, last_event_id)),
+        ]
+        client = asyncio.create_task(_drain_client(websocket))
+        tasks.append(client)
+
+        # All sends happen here, one at a time
+        while not client.done():
+            getter = asyncio.create_task(outbox.get())
+            done, _ = await asyncio.wait(
+                {getter, client}, timeout=keepalive, return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter in done:
+                message = getter.result()
+                await websocket.send_json(message)
+                if message["type"] == "notifications":
+                    await notification_hub.mark_delivered(user.id, message["items"][-1]["id"])
+            else:
+                getter.cancel()
+                if client not in done:
+                    await websocket.send_json({"type": "ping"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        event_hub.unsubscribe(user.id, events)
+        if notifications is not None:
+            notification_hub.unsubscribe(user.id, notifications)
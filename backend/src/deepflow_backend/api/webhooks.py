@@ -3,6 +3,9 @@ Webhooks API - Ingestion Endpoint for External Signals
 
 Receives webhooks from external services (Slack, Jira, etc.)
 and pushes them to the Redis queue for the Agent to process.
+
+Each signal is triaged into an urgency lane by the keyword rules it
+shares with the agent (see services/signal_triage.py).
 """
 
 import json
@@ -15,6 +18,8 @@ from pydantic import BaseModel
 from upstash_redis import Redis
 
 from ..config import get_settings
+from ..contract.lanes import DEFAULT_USER, DOORBELL_KEY, DOORBELL_MAX, lane_users_key, user_queue_key
+from ..services.signal_triage import get_signal_triage
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 logger = logging.getLogger(__name__)
@@ -43,6 +48,9 @@ def push_to_queue(payload: WebhookPayload):
     try:
         redis = get_redis_client()
         
+        lane = get_signal_triage().classify(payload.content, payload.sender, payload.metadata)
+        user_id = str(payload.metadata.get("user_id") or DEFAULT_USER)
+
         # Structure the signal for the Agent
         signal = {
             "type": "incoming_signal",
@@ -51,13 +59,19 @@ def push_to_queue(payload: WebhookPayload):
             "sender": payload.sender,
             "source_id": payload.source_id or f"manual-{int(time.time())}",
             "metadata": payload.metadata,
-            "timestamp": time.time()
+            "timestamp": time.time(),
+            "lane": lane,
         }
         
-        # Push to the list that Agent monitors
-        # Use key: deepflow:signals:pending
-        redis.rpush("deepflow:signals:pending", json.dumps(signal))
-        logger.info(f"Pushed signal to queue: {signal['source_id']}")
+        # Push to the user's queue in its urgency lane, mark the user active
+        # and ring the doorbell for workers blocked on an empty queue
+        pipeline = redis.pipeline()
+        pipeline.rpush(user_queue_key(lane, user_id), json.dumps(signal))
+        pipeline.sadd(lane_users_key(lane), user_id)
+        pipeline.rpush(DOORBELL_KEY, "1")
+        pipeline.ltrim(DOORBELL_KEY, -DOORBELL_MAX, -1)
+        pipeline.exec()
+        logger.info(f"Pushed signal to queue: {signal['source_id']} (lane={lane}, user={user_id})")
         
     except Exception as e:
         logger.error(f"Failed to push signal to Redis: {e}")
@@ -32,6 +32,24 @@ class Settings(BaseSettings):
     upstash_redis_rest_url: str = ""
     upstash_redis_rest_token: str = ""
 
+    # Notification hub (shared SSE poller)
+    notification_poll_interval: float = 0.5
+    notification_poll_max_interval: float = 5.0  # idle backoff ceiling
+    notification_batch_size: int = 50  # entries read per user per call
+    notification_keepalive_interval: float = 15.0  # SSE ping interval
+    # Seconds of notifications replayed to a client with no Last-Event-ID
+    # when no delivery was recorded for the user
+    notification_replay_window: float = 3600.0
+    # Push mode: wake the hub via Redis pub/sub over TCP instead of polling.
+    # Falls back to REST polling when the TCP connection is unavailable.
+    notification_push_enabled: bool = True
+
+    # Signal triage: comma-separated senders whose signals go to the "high" lane
+    triage_vip_senders: str = ""
+    # Keyword rules JSON shared with the agent (same KEYWORD_RULES_PATH); empty = built-in rules
+    keyword_rules_path: str = ""
+    keyword_rules_reload_seconds: float = 5.0  # how often the file is checked for changes
+
     # JWT
     jwt_secret: str = "dev-secret-change-in-production"
 
@@ -43,6 +61,10 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
+    @property
+    def triage_vip_senders_list(self) -> List[str]:
+        return [sender.strip() for sender in self.triage_vip_senders.split(",") if sender.strip()]
+
     @property
     def is_configured(self) -> bool:
         """Check if required services are configured."""
@@ -1,12 +1,20 @@
 """Database package."""
 
 from .supabase import get_supabase_client, get_supabase_admin_client
-from .redis_client import get_redis_client, UserStateManager, TaskQueueManager
+from .redis_client import (
+    get_redis_client,
+    get_async_redis_client,
+    publish_user_event,
+    UserStateManager,
+    TaskQueueManager,
+)
 
 __all__ = [
     "get_supabase_client",
     "get_supabase_admin_client",
     "get_redis_client",
+    "get_async_redis_client",
+    "publish_user_event",
     "UserStateManager",
     "TaskQueueManager",
 ]
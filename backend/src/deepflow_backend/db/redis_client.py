@@ -6,12 +6,21 @@ Uses Upstash Redis (serverless).
 """
 
 from functools import lru_cache
-from typing import Optional, List
-import json
+from typing import Any, Dict, Optional, List
+import logging
 
 import redis
+import redis.asyncio
 
 from ..config import get_settings
+from ..contract.events import (
+    encode_event,
+    queue_diff,
+    state_event,
+    user_events_channel,
+)
+
+logger = logging.getLogger(__name__)
 
 
 @lru_cache
@@ -21,6 +30,26 @@ def get_redis_client() -> redis.Redis:
     return redis.from_url(settings.upstash_redis_url, decode_responses=True)
 
 
+@lru_cache
+def get_async_redis_client() -> redis.asyncio.Redis:
+    """Get cached asyncio Redis client (TCP), used for blocking/pub-sub reads."""
+    settings = get_settings()
+    return redis.asyncio.from_url(settings.upstash_redis_url, decode_responses=True)
+
+
+def publish_user_event(redis_client: redis.Redis, user_id: str, event: Dict[str, Any]) -> None:
+    """
+    Publish a change event for a user's live connections.
+
+    Best effort: the write that triggered the event has already happened,
+    so a failed publish is logged rather than raised.
+    """
+    try:
+        redis_client.publish(user_events_channel(user_id), encode_event(event))
+    except Exception as e:
+        logger.warning(f"Failed to publish {event.get('type')} event for {user_id}: {e}")
+
+
 class UserStateManager:
     """Manage user focus state in Redis."""
 
@@ -40,6 +69,7 @@ class UserStateManager:
         if state not in self.VALID_STATES:
             return False
         self.redis.set(f"{self.STATE_KEY_PREFIX}{user_id}", state)
+        publish_user_event(self.redis, user_id, state_event(state))
         return True
 
 
@@ -60,13 +90,16 @@ class TaskQueueManager:
 
     def add_task(self, user_id: str, task_id: str, score: float) -> None:
         """Add task to priority queue with score."""
-        self.redis.zadd(self._queue_key(user_id), {task_id: score})
+        is_new = self.redis.zadd(self._queue_key(user_id), {task_id: score})
+        diff = queue_diff(added=[(task_id, score)]) if is_new else queue_diff(reordered=[(task_id, score)])
+        publish_user_event(self.redis, user_id, diff)
 
     def pop_next(self, user_id: str) -> Optional[str]:
         """Pop highest priority task from queue."""
         result = self.redis.zpopmax(self._queue_key(user_id), count=1)
         if result:
             task_id, _ = result[0]
+            publish_user_event(self.redis, user_id, queue_diff(removed=[task_id]))
             return task_id
         return None
 
@@ -82,15 +115,20 @@ class TaskQueueManager:
 
     def remove_task(self, user_id: str, task_id: str) -> bool:
         """Remove specific task from queue."""
-        return self.redis.zrem(self._queue_key(user_id), task_id) > 0
+        removed = self.redis.zrem(self._queue_key(user_id), task_id) > 0
+        if removed:
+            publish_user_event(self.redis, user_id, queue_diff(removed=[task_id]))
+        return removed
 
     def update_score(self, user_id: str, task_id: str, new_score: float) -> None:
         """Update task's priority score."""
         self.redis.zadd(self._queue_key(user_id), {task_id: new_score})
+        publish_user_event(self.redis, user_id, queue_diff(reordered=[(task_id, new_score)]))
 
     def set_current_task(self, user_id: str, task_id: str) -> None:
         """Set current active task."""
         self.redis.set(self._current_key(user_id), task_id)
+        publish_user_event(self.redis, user_id, {**queue_diff(), "current_task_id": task_id})
 
     def get_current_task(self, user_id: str) -> Optional[str]:
         """Get current active task ID."""
@@ -99,3 +137,4 @@ class TaskQueueManager:
     def clear_current_task(self, user_id: str) -> None:
         """Clear current task."""
         self.redis.delete(self._current_key(user_id))
+        publish_user_event(self.redis, user_id, {**queue_diff(), "current_task_id": None})
@@ -10,7 +10,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import get_settings
-from .api import state_router, queue_router, tasks_router, pomodoro_router, auth_router, notifications_router, webhooks_router
+from .api import state_router, queue_router, tasks_router, pomodoro_router, auth_router, notifications_router, webhooks_router, realtime_router
+from .services import get_notification_hub, get_user_event_hub
 
 
 @asynccontextmanager
@@ -21,6 +22,8 @@ async def lifespan(app: FastAPI):
     print(f"🚀 DeepFlow Backend starting in {settings.app_env} mode")
     yield
     # Shutdown
+    await get_notification_hub().stop()
+    await get_user_event_hub().stop()
     print("👋 DeepFlow Backend shutting down")
 
 
@@ -49,6 +52,7 @@ app.include_router(tasks_router, prefix="/api/v1")
 app.include_router(pomodoro_router, prefix="/api/v1")
 app.include_router(notifications_router, prefix="/api/v1")
 app.include_router(webhooks_router, prefix="/api/v1")
+app.include_router(realtime_router, prefix="/api/v1")
 
 
 @app.get("/")
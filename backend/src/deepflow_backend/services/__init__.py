@@ -1,5 +1,17 @@
 """Services package."""
 
 from .priority_engine import PriorityEngine, priority_engine
+from .notification_hub import NotificationHub, get_notification_hub
+from .user_event_hub import UserEventHub, get_user_event_hub
+from .signal_triage import SignalTriage, get_signal_triage
 
-__all__ = ["PriorityEngine", "priority_engine"]
+__all__ = [
+    "PriorityEngine",
+    "priority_engine",
+    "NotificationHub",
+    "get_notification_hub",
+    "UserEventHub",
+    "get_user_event_hub",
+    "SignalTriage",
+    "get_signal_triage",
+]
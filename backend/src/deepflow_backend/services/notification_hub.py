@@ -0,0 +1,431 @@
+"""
+Notification Hub Service
+
+Process-wide fan-out for browser notification SSE streams.
+
+Notifications live in a capped per-user Redis Stream
+(browser_notifications:{user_id}:stream). Reads are non-destructive, so
+several tabs of the same user see every entry and a reconnecting browser
+can resume from its Last-Event-ID. A client without one (a fresh page
+load) resumes after the last entry delivered to any of the user's
+connections (browser_notifications:{user_id}:delivered), or from the
+start of a recent window if nothing was recorded.
+
+Two delivery modes share the same per-connection asyncio queues:
+
+- push: when TCP Redis is reachable, one pub/sub subscriber per process
+  waits for wake-ups published by send_browser_notification and reads
+  only the user that was notified. No idle polling, near-zero latency.
+- poll: fallback for REST-only deployments. A single background poller
+  reads the streams of every connected user in one Upstash REST XREAD
+  per tick, so idle cost does not grow with connections. Idle ticks back
+  off exponentially; a full batch triggers an immediate re-read.
+
+Everything read in one call is delivered to a connection as one batch.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import redis.asyncio
+from upstash_redis.asyncio import Redis
+
+from ..config import get_settings
+from ..db import get_async_redis_client
+
+logger = logging.getLogger(__name__)
+
+# (stream entry ID, notification payload)
+StreamEntry = Tuple[str, Dict[str, Any]]
+
+# (event name, payload) delivered to each SSE connection. "notifications"
+# carries a List[StreamEntry] batch, "error" a dict.
+HubMessage = Tuple[str, Any]
+
+
+class NotificationHub:
+    """
+    Shared subscriber/poller that fans browser notifications out to SSE connections.
+
+    Each SSE connection subscribes with its user ID and receives its own
+    asyncio.Queue. Several connections for the same user (multiple tabs)
+    all receive every notification read for that user.
+    """
+
+    STREAM_KEY_TEMPLATE = "browser_notifications:{user_id}:stream"
+    DELIVERED_KEY_TEMPLATE = "browser_notifications:{user_id}:delivered"
+    CHANNEL_PREFIX = "browser_notifications:"
+    CHANNEL_PATTERN = "browser_notifications:*"
+
+    # Entries kept per user for replay (XADD MAXLEN ~)
+    STREAM_MAXLEN = 100
+    # Lifetime of a user's last-delivered ID, renewed on every delivery
+    DELIVERED_TTL = 7 * 24 * 3600
+
+    def __init__(
+        self,
+        redis_client: Optional[Redis] = None,
+        push_client: Optional[redis.asyncio.Redis] = None,
+        push_enabled: bool = False,
+        poll_interval: float = 0.5,
+        max_poll_interval: float = 5.0,
+        keepalive_interval: float = 15.0,
+        error_backoff: float = 1.0,
+        queue_size: int = 100,
+        drain_count: int = 50,
+        replay_window: float = 3600.0,
+    ):
+        self._redis = redis_client
+        self._push_client = push_client
+        self.push_enabled = push_enabled
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.keepalive_interval = keepalive_interval
+        self.error_backoff = error_backoff
+        self.queue_size = queue_size
+        self.drain_count = drain_count
+        self.replay_window = replay_window
+        self.mode: Optional[str] = None
+
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        # Last stream entry ID read for each connected user
+        self._cursors: Dict[str, str] = {}
+        self._wakeup = asyncio.Event()
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def redis(self) -> Redis:
+        """Lazily create the async Upstash REST client."""
+        if self._redis is None:
+            settings = get_settings()
+            if not settings.is_redis_rest_configured:
+                raise ValueError(
+                    "Redis REST API not configured. "
+                    "Set UPSTASH_REDIS_REST_URL and UPSTASH_REDIS_REST_TOKEN"
+                )
+            self._redis = Redis(
+                url=settings.upstash_redis_rest_url,
+                token=settings.upstash_redis_rest_token,
+            )
+        return self._redis
+
+    @property
+    def client(self):
+        """Redis client for the active mode (TCP in push mode, REST otherwise)."""
+        return self._push_client if self.mode == "push" else self.redis
+
+    @property
+    def connection_count(self) -> int:
+        """Number of subscribed SSE connections across all users."""
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    @property
+    def user_count(self) -> int:
+        """Number of distinct users with at least one connection."""
+        return len(self._subscribers)
+
+    @classmethod
+    def stream_key(cls, user_id: str) -> str:
+        return cls.STREAM_KEY_TEMPLATE.format(user_id=user_id)
+
+    @classmethod
+    def delivered_key(cls, user_id: str) -> str:
+        return cls.DELIVERED_KEY_TEMPLATE.format(user_id=user_id)
+
+    @classmethod
+    def channel(cls, user_id: str) -> str:
+        return f"{cls.CHANNEL_PREFIX}{user_id}"
+
+    @staticmethod
+    def parse_id(entry_id: Optional[str]) -> Optional[Tuple[int, int]]:
+        """Parse a stream ID ("<ms>-<seq>") for ordering; None if invalid."""
+        if not entry_id:
+            return None
+        ms, _, seq = str(entry_id).partition("-")
+        try:
+            return int(ms), int(seq or 0)
+        except ValueError:
+            return None
+
+    @classmethod
+    def is_newer(cls, entry_id: str, than: Optional[str]) -> bool:
+        """Whether entry_id comes after `than` in the stream."""
+        parsed, reference = cls.parse_id(entry_id), cls.parse_id(than)
+        if parsed is None or reference is None:
+            return True
+        return parsed > reference
+
+    async def subscribe(self, user_id: str) -> asyncio.Queue:
+        """
+        Register an SSE connection and return its message queue.
+
+        Starts the background subscriber/poller on first use. The queue
+        receives entries added after this call; use replay() for older ones.
+        If the stream tail cannot be read the connection is removed again
+        before the error is raised.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            self._ensure_running()
+            await self._ready.wait()
+            if user_id not in self._cursors:
+                tail = await self._tail_id(user_id)
+                self._cursors.setdefault(user_id, tail)
+        except BaseException:
+            self.unsubscribe(user_id, queue)
+            raise
+
+        self._wakeup.set()
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        """Remove an SSE connection; drops the user once no tabs remain."""
+        queues = self._subscribers.get(user_id)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+            self._cursors.pop(user_id, None)
+
+    async def replay(self, user_id: str, last_event_id: str) -> List[StreamEntry]:
+        """Return the retained entries after last_event_id, oldest first."""
+        if self.parse_id(last_event_id) is None:
+            return []
+        await self._ready.wait()
+        entries = await self.client.xrange(
+            self.stream_key(user_id), f"({last_event_id}", "+", count=self.STREAM_MAXLEN
+        )
+        return self._parse_entries(entries)
+
+    async def resume_point(self, user_id: str) -> str:
+        """
+        Where to replay from for a client without a Last-Event-ID.
+
+        The last entry delivered to any of the user's connections, or the
+        start of the replay window if none was recorded.
+        """
+        await self._ready.wait()
+        delivered = await self.client.get(self.delivered_key(user_id))
+        if self.parse_id(delivered) is not None:
+            return delivered
+        return f"{int((time.time() - self.replay_window) * 1000)}-0"
+
+    async def mark_delivered(self, user_id: str, entry_id: str) -> None:
+        """Record the newest entry sent to one of the user's clients (best effort)."""
+        try:
+            await self.client.set(self.delivered_key(user_id), entry_id, ex=self.DELIVERED_TTL)
+        except Exception as e:
+            logger.warning(f"Could not record delivered notification for {user_id}: {e}")
+
+    async def stop(self) -> None:
+        """Cancel the background task (called on application shutdown)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._ready.clear()
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._ready.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Run in push mode when TCP Redis is reachable, else poll."""
+        while True:
+            if self.push_enabled and await self._connect_push():
+                try:
+                    await self._run_push()
+                except Exception as e:
+                    logger.error(f"Notification subscriber failed: {e}")
+                    await asyncio.sleep(self.error_backoff)
+                continue
+
+            self.mode = "poll"
+            self._ready.set()
+            await self._run_poll()
+
+    async def _connect_push(self) -> bool:
+        """Check that the TCP Redis client is usable for pub/sub."""
+        try:
+            if self._push_client is None:
+                self._push_client = get_async_redis_client()
+            await asyncio.wait_for(self._push_client.ping(), timeout=2)
+            return True
+        except Exception as e:
+            logger.warning(f"TCP Redis unavailable, polling notifications over REST: {e}")
+            self._push_client = None
+            return False
+
+    async def _run_push(self) -> None:
+        """Wait for per-user wake-ups and read only the notified user."""
+        pubsub = self._push_client.pubsub()
+        await pubsub.psubscribe(self.CHANNEL_PATTERN)
+        self.mode = "push"
+        self._ready.set()
+        try:
+            # Catch up on anything written while (re)connecting
+            for user_id in list(self._subscribers):
+                await self._drain_user(user_id)
+
+            async for message in pubsub.listen():
+                if message.get("type") != "pmessage":
+                    continue
+                user_id = message["channel"][len(self.CHANNEL_PREFIX):]
+                if user_id in self._subscribers:
+                    await self._drain_user(user_id)
+        finally:
+            await pubsub.aclose()
+
+    async def _drain_user(self, user_id: str) -> None:
+        """Read every new stream entry for a user over TCP."""
+        while user_id in self._cursors:
+            try:
+                response = await self._push_client.xread(
+                    {self.stream_key(user_id): self._cursors[user_id]},
+                    count=self.drain_count,
+                )
+            except Exception as e:
+                logger.error(f"Notification read failed for {user_id}: {e}")
+                self._deliver(user_id, ("error", {"error": str(e)}))
+                return
+
+            entries = self._parse_read(response).get(user_id, [])
+            self._dispatch(user_id, entries)
+            if len(entries) < self.drain_count:
+                return
+
+    async def _run_poll(self) -> None:
+        """Read all connected users' streams in one XREAD per tick."""
+        interval = self.poll_interval
+        while True:
+            if not self._subscribers:
+                # Nobody is listening: sleep until the next subscribe()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            self._wakeup.clear()
+            try:
+                results = await self._poll()
+            except Exception as e:
+                logger.error(f"Notification poll failed: {e}")
+                self._broadcast(("error", {"error": str(e)}))
+                await asyncio.sleep(self.error_backoff)
+                continue
+
+            for user_id, entries in results.items():
+                self._dispatch(user_id, entries)
+
+            if any(len(entries) >= self.drain_count for entries in results.values()):
+                # Burst in progress: read the rest right away
+                interval = self.poll_interval
+                continue
+            if results:
+                interval = self.poll_interval
+            else:
+                interval = min(interval * 2, self.max_poll_interval)
+
+            # Sleep, but let a new connection trigger an immediate read
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+                interval = self.poll_interval
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self) -> Dict[str, List[StreamEntry]]:
+        """Read new entries for every connected user in a single call."""
+        streams = {
+            self.stream_key(user_id): self._cursors[user_id]
+            for user_id in self._subscribers
+            if user_id in self._cursors
+        }
+        if not streams:
+            return {}
+        response = await self.redis.xread(streams, count=self.drain_count)
+        return self._parse_read(response)
+
+    async def _tail_id(self, user_id: str) -> str:
+        """ID of the newest entry in a user's stream ("0-0" if empty)."""
+        entries = await self.client.xrevrange(self.stream_key(user_id), "+", "-", count=1)
+        parsed = self._parse_entries(entries)
+        return parsed[0][0] if parsed else "0-0"
+
+    def _dispatch(self, user_id: str, entries: List[StreamEntry]) -> None:
+        """Advance the user's cursor and fan the batch out to its connections."""
+        if not entries:
+            return
+        if user_id in self._cursors:
+            self._cursors[user_id] = entries[-1][0]
+        self._deliver(user_id, ("notifications", entries))
+
+    def _parse_read(self, response: Any) -> Dict[str, List[StreamEntry]]:
+        """Map an XREAD response (REST or TCP format) to entries per user."""
+        prefix, suffix = self.STREAM_KEY_TEMPLATE.split("{user_id}")
+        results: Dict[str, List[StreamEntry]] = {}
+        for stream, entries in response or []:
+            user_id = stream[len(prefix):len(stream) - len(suffix)]
+            results[user_id] = self._parse_entries(entries)
+        return results
+
+    @classmethod
+    def _parse_entries(cls, entries: Any) -> List[StreamEntry]:
+        """Normalize stream entries; REST returns flat field lists, TCP dicts."""
+        parsed = []
+        for entry_id, fields in entries or []:
+            if isinstance(fields, list):
+                fields = dict(zip(fields[::2], fields[1::2]))
+            parsed.append((entry_id, cls._decode(fields.get("data"))))
+        return parsed
+
+    @staticmethod
+    def _decode(raw: Any) -> Dict[str, Any]:
+        if not isinstance(raw, str):
+            return raw
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return {"message": raw}
+
+    def _deliver(self, user_id: str, message: HubMessage) -> None:
+        for queue in self._subscribers.get(user_id, ()):
+            self._put(queue, message)
+
+    def _broadcast(self, message: HubMessage) -> None:
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._put(queue, message)
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, message: HubMessage) -> None:
+        """Enqueue without blocking; a stalled client loses its oldest message."""
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(message)
+
+
+@lru_cache
+def get_notification_hub() -> NotificationHub:
+    """Get the process-wide notification hub."""
+    settings = get_settings()
+    return NotificationHub(
+        push_enabled=settings.notification_push_enabled,
+        poll_interval=settings.notification_poll_interval,
+        max_poll_interval=settings.notification_poll_max_interval,
+        keepalive_interval=settings.notification_keepalive_interval,
+        drain_count=settings.notification_batch_size,
+        replay_window=settings.notification_replay_window,
+    )
@@ -0,0 +1,87 @@
+"""
+Signal Triage Service
+
+Cheap, local pre-classification of incoming signals into urgency lanes.
+
+Runs at ingestion, before any LLM call, so the agent can drain urgent
+signals first instead of strict FIFO. Rules, in order:
+- An explicit "priority" in the webhook metadata wins
+- Keywords at critical urgency (outage, 緊急, 掛了, sev1, ...)
+- VIP senders go to "high", as do keywords at high urgency
+- Bulk/automated senders (no-reply, newsletter, ...) and discard-level
+  keywords (unsubscribe, 廣告, ...) go to "low"
+- Everything else is "normal"
+
+The keywords and lane keys come from the contract package the agent
+shares, so ingestion and the agent's own re-queueing agree on both. With
+keyword_rules_path set, the rules are read from that JSON file and
+reloaded when it changes; point the agent's KEYWORD_RULES_PATH at the
+same file so both services route by the same rules.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+
+from ..config import get_settings
+from ..contract.keywords import DEFAULT_RULES, KeywordRules, KeywordRuleSet
+from ..contract.lanes import DEFAULT_LANE, LANES
+
+LOW_SENDER_PATTERNS = ["no-reply", "noreply", "donotreply", "newsletter", "notifications@", "marketing"]
+
+
+class SignalTriage:
+    """
+    Keyword and sender-prior classifier for incoming signals.
+
+    Usage:
+        triage = SignalTriage(vip_senders=["ceo@example.com"])
+        lane = triage.classify(content, sender, metadata)
+    """
+
+    def __init__(self, vip_senders: Optional[Iterable[str]] = None, rules: Optional[Any] = None):
+        self.vip_senders = {s.strip().lower() for s in vip_senders or [] if s.strip()}
+        # Anything with score(text) -> Optional[KeywordHint]
+        self.rules = rules or KeywordRuleSet(DEFAULT_RULES)
+
+    def classify(
+        self,
+        content: str,
+        sender: str = "",
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Pick the lane for a signal.
+
+        Args:
+            content: Signal text
+            sender: Sender address or handle
+            metadata: Webhook metadata; a valid "priority" value overrides the rules
+
+        Returns:
+            One of LANES
+        """
+        override = str((metadata or {}).get("priority", "")).lower()
+        if override in LANES:
+            return override
+
+        sender = (sender or "").lower()
+        hint = self.rules.score(content or "")
+        keyword_lane = hint.lane if hint else DEFAULT_LANE
+
+        if keyword_lane == "critical":
+            return "critical"
+        if sender in self.vip_senders or keyword_lane == "high":
+            return "high"
+        if any(pattern in sender for pattern in LOW_SENDER_PATTERNS) or keyword_lane == "low":
+            return "low"
+        return DEFAULT_LANE
+
+
+@lru_cache
+def get_signal_triage() -> SignalTriage:
+    """Get the process-wide signal triage."""
+    settings = get_settings()
+    return SignalTriage(
+        vip_senders=settings.triage_vip_senders_list,
+        rules=KeywordRules(settings.keyword_rules_path, settings.keyword_rules_reload_seconds),
+    )
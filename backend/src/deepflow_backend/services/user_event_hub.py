@@ -0,0 +1,164 @@
+"""
+User Event Hub Service
+
+Process-wide fan-out of per-user change events to live WebSocket connections.
+
+TaskQueueManager, UserStateManager and the agent tools publish JSON change
+events (queue diffs, state changes) to user_events:{user_id}. One pattern
+subscription per process receives them all and copies each event to the
+queues of that user's open connections.
+"""
+
+import asyncio
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Optional, Set
+
+import redis.asyncio
+
+from ..contract.events import USER_EVENTS_CHANNEL_PREFIX
+from ..db import get_async_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class UserEventHub:
+    """
+    Shared pub/sub subscriber that fans user change events out to connections.
+
+    Each connection subscribes with its user ID and receives its own
+    asyncio.Queue of event dicts.
+    """
+
+    CHANNEL_PATTERN = f"{USER_EVENTS_CHANNEL_PREFIX}*"
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.asyncio.Redis] = None,
+        error_backoff: float = 1.0,
+        queue_size: int = 100,
+        ready_timeout: float = 5.0,
+    ):
+        self._redis = redis_client
+        self.error_backoff = error_backoff
+        self.queue_size = queue_size
+        self.ready_timeout = ready_timeout
+
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def redis(self) -> redis.asyncio.Redis:
+        """Lazily use the shared asyncio TCP Redis client."""
+        if self._redis is None:
+            self._redis = get_async_redis_client()
+        return self._redis
+
+    @property
+    def connection_count(self) -> int:
+        """Number of subscribed connections across all users."""
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    async def subscribe(self, user_id: str) -> asyncio.Queue:
+        """
+        Register a connection and return its event queue.
+
+        Starts the background subscriber on first use and waits until the
+        pattern subscription is active, so no later event is missed.
+
+        Raises:
+            TimeoutError: pub/sub did not come up within ready_timeout
+                seconds (e.g. REDIS_URL unreachable); nothing stays registered.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        self._ensure_running()
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=self.ready_timeout)
+        except BaseException:
+            self.unsubscribe(user_id, queue)
+            raise
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        """Remove a connection; drops the user once no connections remain."""
+        queues = self._subscribers.get(user_id)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    async def stop(self) -> None:
+        """Cancel the background task (called on application shutdown)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._ready.clear()
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._ready.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Keep the pattern subscription alive, reconnecting after errors."""
+        while True:
+            try:
+                await self._listen()
+            except Exception as e:
+                logger.error(f"User event subscriber failed: {e}")
+                self._broadcast({"type": "error", "error": str(e)})
+                await asyncio.sleep(self.error_backoff)
+
+    async def _listen(self) -> None:
+        pubsub = self.redis.pubsub()
+        await pubsub.psubscribe(self.CHANNEL_PATTERN)
+        self._ready.set()
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "pmessage":
+                    continue
+                user_id = message["channel"][len(USER_EVENTS_CHANNEL_PREFIX):]
+                if user_id in self._subscribers:
+                    self._deliver(user_id, self._decode(message["data"]))
+        finally:
+            await pubsub.aclose()
+
+    @staticmethod
+    def _decode(raw: Any) -> Dict[str, Any]:
+        try:
+            return json.loads(raw)
+        except (TypeError, json.JSONDecodeError):
+            return {"type": "unknown", "data": raw}
+
+    def _deliver(self, user_id: str, event: Dict[str, Any]) -> None:
+        for queue in self._subscribers.get(user_id, ()):
+            self._put(queue, event)
+
+    def _broadcast(self, event: Dict[str, Any]) -> None:
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._put(queue, event)
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+        """Enqueue without blocking; a stalled client loses its oldest event."""
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(event)
+
+
+@lru_cache
+def get_user_event_hub() -> UserEventHub:
+    """Get the process-wide user event hub."""
+    return UserEventHub()
@@ -74,3 +74,16 @@ class TestAuthAPI:
         """Test that /auth/me requires authentication."""
         response = client.get("/api/v1/auth/me")
         assert response.status_code == 401
+
+
+class TestRealtimeAPI:
+    """Test realtime WebSocket endpoint."""
+
+    def test_websocket_requires_auth(self, client):
+        """Test that the WebSocket is closed without a valid token."""
+        from starlette.websockets import WebSocketDisconnect
+
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with client.websocket_connect("/api/v1/ws?token=invalid-token"):
+                pass
+        assert exc_info.value.code == 1008
@@ -0,0 +1,342 @@
+"""
+Tests for Notification Hub Service
+
+Tests shared polling, push wake-ups, per-connection fan-out and replay.
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from deepflow_backend.services.notification_hub import NotificationHub
+
+
+class FakeStreams:
+    """In-memory Redis Streams shared by the REST and TCP fakes."""
+
+    def __init__(self):
+        self.streams = {}
+        self.seq = 0
+
+    def xadd(self, key, fields):
+        self.seq += 1
+        entry_id = f"1700000000000-{self.seq}"
+        self.streams.setdefault(key, []).append((entry_id, fields))
+        return entry_id
+
+    def after(self, key, last_id, count=None):
+        last = NotificationHub.parse_id(last_id)
+        entries = [
+            (entry_id, fields)
+            for entry_id, fields in self.streams.get(key, [])
+            if NotificationHub.parse_id(entry_id) > last
+        ]
+        return entries[:count] if count else entries
+
+
+class FakeRedis:
+    """Minimal async Upstash REST stand-in (flat field lists)."""
+
+    def __init__(self, streams=None):
+        self.store = streams or FakeStreams()
+        self.keys = {}
+        self.xread_calls = 0
+
+    async def get(self, key):
+        return self.keys.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.keys[key] = value
+
+    @staticmethod
+    def _flat(entries):
+        return [[entry_id, [k for kv in fields.items() for k in kv]] for entry_id, fields in entries]
+
+    async def xread(self, streams, count=None):
+        self.xread_calls += 1
+        response = []
+        for key, last_id in streams.items():
+            entries = self.store.after(key, last_id, count)
+            if entries:
+                response.append([key, self._flat(entries)])
+        return response
+
+    async def xrange(self, key, start="-", end="+", count=None):
+        return self._flat(self.store.after(key, start.lstrip("("), count))
+
+    async def xrevrange(self, key, end="+", start="-", count=None):
+        entries = list(reversed(self.store.streams.get(key, [])))
+        return self._flat(entries[:count] if count else entries)
+
+    def push(self, user_id, notification):
+        return self.store.xadd(
+            NotificationHub.stream_key(user_id), {"data": json.dumps(notification)}
+        )
+
+
+class FakePubSub:
+    """Async pub/sub stand-in fed from an asyncio.Queue."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.patterns = []
+
+    async def psubscribe(self, pattern):
+        self.patterns.append(pattern)
+
+    async def listen(self):
+        while True:
+            yield await self.messages.get()
+
+    async def aclose(self):
+        pass
+
+
+class FakeTcpRedis(FakeRedis):
+    """Minimal redis.asyncio stand-in for push mode (dict fields)."""
+
+    def __init__(self, streams=None):
+        super().__init__(streams)
+        self.messages = asyncio.Queue()
+
+    @staticmethod
+    def _flat(entries):
+        return [(entry_id, dict(fields)) for entry_id, fields in entries]
+
+    async def ping(self):
+        return True
+
+    def pubsub(self):
+        return FakePubSub(self.messages)
+
+    async def publish(self, user_id, notification):
+        entry_id = self.push(user_id, notification)
+        await self.messages.put({
+            "type": "pmessage",
+            "pattern": NotificationHub.CHANNEL_PATTERN,
+            "channel": NotificationHub.channel(user_id),
+            "data": entry_id,
+        })
+        return entry_id
+
+
+class TestNotificationHub:
+    """Test cases for NotificationHub."""
+
+    @pytest.mark.asyncio
+    async def test_fans_out_to_all_connections_of_user(self):
+        """Test that every tab of a user receives the notification."""
+        redis = FakeRedis()
+        hub = NotificationHub(redis_client=redis, poll_interval=0.01)
+
+        tab_a = await hub.subscribe("alice")
+        tab_b = await hub.subscribe("alice")
+        other = await hub.subscribe("bob")
+        entry_id = redis.push("alice", {"title": "Deploy failed"})
+
+        try:
+            event_a, batch_a = await asyncio.wait_for(tab_a.get(), timeout=1)
+            event_b, batch_b = await asyncio.wait_for(tab_b.get(), timeout=1)
+        finally:
+            await hub.stop()
+
+        assert event_a == event_b == "notifications"
+        assert batch_a == batch_b == [(entry_id, {"title": "Deploy failed"})]
+        assert other.empty()
+
+    @pytest.mark.asyncio
+    async def test_one_request_per_tick_for_all_users(self):
+        """Test that idle polling cost does not grow with connections."""
+        redis = FakeRedis()
+        hub = NotificationHub(redis_client=redis, poll_interval=0.05, max_poll_interval=0.05)
+
+        for i in range(50):
+            await hub.subscribe(f"user-{i}")
+
+        await asyncio.sleep(0.12)
+        await hub.stop()
+
+        # ~3 ticks, regardless of the 50 connections
+        assert 1 <= redis.xread_calls <= 4
+
+    @pytest.mark.asyncio
+    async def test_idle_polling_backs_off(self):
+        """Test that empty ticks lengthen the poll interval."""
+        redis = FakeRedis()
+        hub = NotificationHub(redis_client=redis, poll_interval=0.01, max_poll_interval=0.08)
+
+        await hub.subscribe("alice")
+        await asyncio.sleep(0.3)
+        await hub.stop()
+
+        # Without backoff this would be ~30 reads
+        assert redis.xread_calls <= 8
+
+    @pytest.mark.asyncio
+    async def test_burst_is_drained_in_batches(self):
+        """Test that a burst is delivered in full batches without waiting per item."""
+        redis = FakeRedis()
+        hub = NotificationHub(redis_client=redis, poll_interval=0.5, drain_count=10)
+
+        queue = await hub.subscribe("alice")
+        for i in range(25):
+            redis.push("alice", {"title": f"n{i}"})
+        hub._wakeup.set()
+
+        batches = []
+        try:
+            while sum(len(batch) for batch in batches) < 25:
+                _, batch = await asyncio.wait_for(queue.get(), timeout=0.3)
+                batches.append(batch)
+        finally:
+            await hub.stop()
+
+        assert [len(batch) for batch in batches] == [10, 10, 5]
+
+    @pytest.mark.asyncio
+    async def test_new_connection_starts_at_stream_tail(self):
+        """Test that old entries are not re-sent without Last-Event-ID."""
+        redis = FakeRedis()
+        redis.push("alice", {"title": "Old"})
+        hub = NotificationHub(redis_client=redis, poll_interval=0.01)
+
+        queue = await hub.subscribe("alice")
+        redis.push("alice", {"title": "New"})
+        try:
+            _, batch = await asyncio.wait_for(queue.get(), timeout=1)
+        finally:
+            await hub.stop()
+
+        assert [data["title"] for _, data in batch] == ["New"]
+
+    @pytest.mark.asyncio
+    async def test_replay_after_last_event_id(self):
+        """Test that a reconnecting client can catch up from its last ID."""
+        redis = FakeRedis()
+        first = redis.push("alice", {"title": "One"})
+        redis.push("alice", {"title": "Two"})
+        redis.push("alice", {"title": "Three"})
+        hub = NotificationHub(redis_client=redis, poll_interval=0.01)
+
+        await hub.subscribe("alice")
+        missed = await hub.replay("alice", first)
+        invalid = await hub.replay("alice", "not-an-id")
+        await hub.stop()
+
+        assert [data["title"] for _, data in missed] == ["Two", "Three"]
+        assert invalid == []
+
+    @pytest.mark.asyncio
+    async def test_resumes_after_last_delivered_without_last_event_id(self):
+        """Test that a fresh page load gets what arrived after its last delivery."""
+        redis = FakeRedis()
+        first = redis.push("alice", {"title": "Seen"})
+        redis.push("alice", {"title": "Missed"})
+        hub = NotificationHub(redis_client=redis, poll_interval=0.01)
+
+        await hub.subscribe("alice")
+        await hub.mark_delivered("alice", first)
+        resume = await hub.resume_point("alice")
+        missed = await hub.replay("alice", resume)
+        await hub.stop()
+
+        assert resume == first
+        assert [data["title"] for _, data in missed] == ["Missed"]
+
+    @pytest.mark.asyncio
+    async def test_resume_point_falls_back_to_recent_window(self):
+        """Test that without a delivery record replay covers only the recent window."""
+        hub = NotificationHub(redis_client=FakeRedis(), poll_interval=0.01, replay_window=60)
+
+        await hub.subscribe("alice")
+        ms, _ = NotificationHub.parse_id(await hub.resume_point("alice"))
+        await hub.stop()
+
+        assert abs(ms - (time.time() - 60) * 1000) < 5000
+
+    @pytest.mark.asyncio
+    async def test_failed_subscribe_does_not_leak_connection(self):
+        """Test that a Redis error reading the stream tail unregisters the connection."""
+        redis = FakeRedis()
+
+        async def broken(*args, **kwargs):
+            raise ConnectionError("reset")
+
+        redis.xrevrange = broken
+        hub = NotificationHub(redis_client=redis, poll_interval=0.01)
+
+        with pytest.raises(ConnectionError):
+            await hub.subscribe("alice")
+        await hub.stop()
+
+        assert hub.connection_count == 0
+        assert hub.user_count == 0
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_removes_user(self):
+        """Test that the last connection leaving drops the user."""
+        hub = NotificationHub(redis_client=FakeRedis(), poll_interval=0.01)
+
+        queue = await hub.subscribe("alice")
+        assert hub.connection_count == 1
+        hub.unsubscribe("alice", queue)
+        await hub.stop()
+
+        assert hub.connection_count == 0
+        assert hub.user_count == 0
+
+    @pytest.mark.asyncio
+    async def test_push_mode_delivers_without_polling(self):
+        """Test that push mode reads only on pub/sub wake-ups."""
+        tcp = FakeTcpRedis()
+        rest = FakeRedis()
+        hub = NotificationHub(
+            redis_client=rest,
+            push_client=tcp,
+            push_enabled=True,
+            poll_interval=0.01,
+        )
+
+        queue = await hub.subscribe("alice")
+        await asyncio.sleep(0.05)
+        idle_reads = tcp.xread_calls
+
+        entry_id = await tcp.publish("alice", {"title": "Outage"})
+        try:
+            event, batch = await asyncio.wait_for(queue.get(), timeout=1)
+        finally:
+            await hub.stop()
+
+        assert hub.mode == "push"
+        assert event == "notifications"
+        assert batch == [(entry_id, {"title": "Outage"})]
+        assert idle_reads == 0
+        assert rest.xread_calls == 0
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_polling_without_tcp_redis(self):
+        """Test that an unreachable TCP Redis switches the hub to polling."""
+
+        class DeadRedis:
+            async def ping(self):
+                raise ConnectionError("refused")
+
+        rest = FakeRedis()
+        hub = NotificationHub(
+            redis_client=rest,
+            push_client=DeadRedis(),
+            push_enabled=True,
+            poll_interval=0.01,
+        )
+
+        queue = await hub.subscribe("alice")
+        rest.push("alice", {"title": "Fallback"})
+        try:
+            _, batch = await asyncio.wait_for(queue.get(), timeout=1)
+        finally:
+            await hub.stop()
+
+        assert hub.mode == "poll"
+        assert batch[0][1]["title"] == "Fallback"
@@ -0,0 +1,110 @@
+"""
+Tests for Signal Triage Service
+
+Tests keyword and sender-prior lane classification at ingestion.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from deepflow_backend.contract.lanes import lane_key, lane_users_key, user_queue_key
+from deepflow_backend.contract.keywords import KeywordRules
+from deepflow_backend.services.signal_triage import SignalTriage
+
+CONTRACT_DIR = Path(__file__).parents[1] / "src" / "deepflow_backend" / "contract"
+AGENT_CONTRACT_DIR = Path(__file__).parents[2] / "agent" / "src" / "deepflow_agent" / "contract"
+
+
+class TestSignalTriage:
+    """Test cases for SignalTriage."""
+
+    def test_outage_is_critical(self):
+        """Test that outage keywords go to the critical lane."""
+        triage = SignalTriage()
+
+        assert triage.classify("Production is down, SEV1 declared", "oncall@corp.com") == "critical"
+        assert triage.classify("Security breach detected on api-gw", "alerts@corp.com") == "critical"
+
+    def test_critical_beats_bulk_sender(self):
+        """Test that a critical page from a no-reply sender is still critical."""
+        triage = SignalTriage()
+
+        assert triage.classify("Incident opened: checkout outage", "no-reply@pagerduty.com") == "critical"
+
+    def test_newsletter_is_low(self):
+        """Test that bulk mail goes to the low lane."""
+        triage = SignalTriage()
+
+        assert triage.classify("This week's digest. Unsubscribe here", "team@vendor.com") == "low"
+        assert triage.classify("Your receipt", "noreply@shop.com") == "low"
+
+    def test_chinese_keywords(self):
+        """Test that the shared multilingual rules route Chinese signals."""
+        triage = SignalTriage()
+
+        assert triage.classify("緊急！線上系統掛了", "pm@corp.com") == "critical"
+        assert triage.classify("客戶抱怨結帳頁面很慢", "cs@corp.com") == "high"
+        assert triage.classify("這個不緊急，有空再看", "peer@corp.com") == "low"
+
+    def test_rules_file_drives_lanes(self, tmp_path):
+        """Test that a shared rules file replaces the built-in keywords and is reloaded."""
+        path = tmp_path / "rules.json"
+        path.write_text(json.dumps({"rules": [{"urgency": 9, "keywords": ["火災"]}]}), encoding="utf-8")
+        triage = SignalTriage(rules=KeywordRules(str(path), reload_seconds=0))
+
+        assert triage.classify("二樓火災警報", "facilities@corp.com") == "critical"
+        assert triage.classify("Production is down", "oncall@corp.com") == "normal"
+
+        path.write_text(json.dumps({"rules": [{"urgency": 1, "keywords": ["火災"]}]}), encoding="utf-8")
+        triage.rules.reload()
+
+        assert triage.classify("二樓火災演習通知", "facilities@corp.com") == "low"
+
+    def test_vip_sender_is_high(self):
+        """Test that VIP senders go to the high lane."""
+        triage = SignalTriage(vip_senders=["CEO@corp.com"])
+
+        assert triage.classify("Can we chat later?", "ceo@corp.com") == "high"
+        assert triage.classify("Can we chat later?", "peer@corp.com") == "normal"
+
+    def test_metadata_priority_overrides(self):
+        """Test that an explicit metadata priority wins over the rules."""
+        triage = SignalTriage()
+
+        assert triage.classify("Weekly newsletter", "news@x.com", {"priority": "critical"}) == "critical"
+        assert triage.classify("outage", "a@b.com", {"priority": "bogus"}) == "critical"
+
+    def test_keywords_match_word_starts(self):
+        """Test that keywords do not match inside other words."""
+        triage = SignalTriage()
+
+        assert triage.classify("Please review the p0wer budget", "a@b.com") == "normal"
+        assert triage.classify("Coincidentally unrelated", "a@b.com") == "normal"
+
+    def test_lane_keys(self):
+        """Test that the normal lane keeps the legacy pending key."""
+        assert lane_key("normal") == "deepflow:signals:pending"
+        assert lane_key("critical") == "deepflow:signals:pending:critical"
+        assert lane_key("unknown") == "deepflow:signals:pending"
+
+    def test_user_queue_keys(self):
+        """Test per-user queue and active-user set keys within a lane."""
+        assert user_queue_key("normal", "alice") == "deepflow:signals:pending:user:alice"
+        assert user_queue_key("low", "alice") == "deepflow:signals:pending:low:user:alice"
+        assert lane_users_key("critical") == "deepflow:signals:pending:critical:users"
+
+
+class TestSharedContract:
+    """Test that the backend's contract package matches the agent's copy."""
+
+    def test_contract_copies_are_identical(self):
+        """Test that lane keys and keyword rules are the same on both sides."""
+        if not AGENT_CONTRACT_DIR.is_dir():
+            pytest.skip("agent source tree not available")
+
+        ours = {path.name: path.read_text(encoding="utf-8") for path in CONTRACT_DIR.glob("*.py")}
+        theirs = {path.name: path.read_text(encoding="utf-8") for path in AGENT_CONTRACT_DIR.glob("*.py")}
+
+        assert ours == theirs, "copy deepflow_backend/contract and deepflow_agent/contract over each other"
@@ -0,0 +1,170 @@
+"""
+Tests for User Event Hub Service
+
+Tests change-event publishing from the Redis managers and fan-out to
+WebSocket connections.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from deepflow_backend.contract.events import USER_EVENTS_CHANNEL_PREFIX
+from deepflow_backend.db import TaskQueueManager, UserStateManager
+from deepflow_backend.services.user_event_hub import UserEventHub
+
+
+class FakeSyncRedis:
+    """Minimal sync redis stand-in that records published events."""
+
+    def __init__(self):
+        self.zsets = {}
+        self.values = {}
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def zadd(self, key, mapping):
+        zset = self.zsets.setdefault(key, {})
+        added = sum(1 for member in mapping if member not in zset)
+        zset.update(mapping)
+        return added
+
+    def zrem(self, key, member):
+        return 1 if self.zsets.get(key, {}).pop(member, None) is not None else 0
+
+    def zpopmax(self, key, count=1):
+        zset = self.zsets.get(key, {})
+        if not zset:
+            return []
+        member = max(zset, key=zset.get)
+        return [(member, zset.pop(member))]
+
+
+class FakePubSub:
+    """Async pub/sub stand-in fed from an asyncio.Queue."""
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def psubscribe(self, pattern):
+        pass
+
+    async def listen(self):
+        while True:
+            yield await self.messages.get()
+
+    async def aclose(self):
+        pass
+
+
+class FakeAsyncRedis:
+    """Minimal redis.asyncio stand-in for the subscriber."""
+
+    def __init__(self):
+        self.messages = asyncio.Queue()
+
+    def pubsub(self):
+        return FakePubSub(self.messages)
+
+    async def publish(self, user_id, event):
+        await self.messages.put({
+            "type": "pmessage",
+            "channel": f"{USER_EVENTS_CHANNEL_PREFIX}{user_id}",
+            "data": json.dumps(event),
+        })
+
+
+class TestChangeEvents:
+    """Test change events emitted by the Redis managers."""
+
+    def test_queue_add_update_and_remove(self):
+        """Test that queue writes publish added/reordered/removed diffs."""
+        redis = FakeSyncRedis()
+        queue = TaskQueueManager(redis)
+
+        queue.add_task("alice", "t1", 40.0)
+        queue.update_score("alice", "t1", 55.0)
+        queue.pop_next("alice")
+
+        channels = {channel for channel, _ in redis.published}
+        events = [event for _, event in redis.published]
+        assert channels == {f"{USER_EVENTS_CHANNEL_PREFIX}alice"}
+        assert events[0]["added"] == [{"task_id": "t1", "score": 40.0}]
+        assert events[1]["reordered"] == [{"task_id": "t1", "score": 55.0}]
+        assert events[2]["removed"] == ["t1"]
+
+    def test_remove_missing_task_is_silent(self):
+        """Test that removing an unknown task publishes nothing."""
+        redis = FakeSyncRedis()
+
+        assert TaskQueueManager(redis).remove_task("alice", "missing") is False
+        assert redis.published == []
+
+    def test_state_change(self):
+        """Test that set_state publishes valid states only."""
+        redis = FakeSyncRedis()
+        state = UserStateManager(redis)
+
+        state.set_state("alice", "FLOW")
+        state.set_state("alice", "BOGUS")
+
+        assert [event for _, event in redis.published] == [{"type": "state", "state": "FLOW"}]
+
+
+class TestUserEventHub:
+    """Test cases for UserEventHub."""
+
+    @pytest.mark.asyncio
+    async def test_fans_out_to_user_connections_only(self):
+        """Test that events reach every connection of the target user only."""
+        redis = FakeAsyncRedis()
+        hub = UserEventHub(redis_client=redis)
+
+        tab_a = await hub.subscribe("alice")
+        tab_b = await hub.subscribe("alice")
+        other = await hub.subscribe("bob")
+        await redis.publish("alice", {"type": "state", "state": "FLOW"})
+
+        try:
+            event_a = await asyncio.wait_for(tab_a.get(), timeout=1)
+            event_b = await asyncio.wait_for(tab_b.get(), timeout=1)
+        finally:
+            await hub.stop()
+
+        assert event_a == event_b == {"type": "state", "state": "FLOW"}
+        assert other.empty()
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_removes_connection(self):
+        """Test that the last connection leaving drops the user."""
+        hub = UserEventHub(redis_client=FakeAsyncRedis())
+
+        queue = await hub.subscribe("alice")
+        hub.unsubscribe("alice", queue)
+        await hub.stop()
+
+        assert hub.connection_count == 0
+
+    @pytest.mark.asyncio
+    async def test_subscribe_times_out_when_pubsub_is_down(self):
+        """Test that subscribe gives up after ready_timeout and registers nothing."""
+
+        class DownRedis:
+            def pubsub(self):
+                raise ConnectionError("redis down")
+
+        hub = UserEventHub(redis_client=DownRedis(), error_backoff=0.01, ready_timeout=0.05)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await hub.subscribe("alice")
+        assert hub.connection_count == 0
+        await hub.stop()
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { cn } from '@/lib/utils';
 import { api as backendApi } from '@/lib/api';
+import { isRealtimeOpen, subscribeRealtime } from '@/lib/realtime';
 import { Shield, ShieldAlert, Waves, Loader2 } from 'lucide-react';
 
 interface FocusStateDisplayProps {
@@ -13,12 +14,15 @@ export function FocusStateDisplay({ initialState = 'IDLE' }: FocusStateDisplayPr
     const [lastUpdated, setLastUpdated] = useState<string>('Just now');
 
     useEffect(() => {
+        const applyState = (next: string) => {
+            setState(next === 'FLOW' ? 'FLOW' : 'IDLE');
+            setLastUpdated(new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }));
+        };
+
         const fetchState = async () => {
             try {
                 const response = await backendApi.state.get();
-                const mappedState = response.state === 'FLOW' ? 'FLOW' : 'IDLE';
-                setState(mappedState);
-                setLastUpdated(new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }));
+                applyState(response.state);
             } catch (error) {
                 console.error('Failed to fetch state:', error);
             } finally {
@@ -27,8 +31,23 @@ export function FocusStateDisplay({ initialState = 'IDLE' }: FocusStateDisplayPr
         };
 
         fetchState();
-        const interval = setInterval(fetchState, 10000);
-        return () => clearInterval(interval);
+
+        // Poll only while the realtime socket is down
+        const interval = setInterval(() => {
+            if (!isRealtimeOpen()) fetchState();
+        }, 10000);
+
+        // State changes are pushed over the realtime socket
+        const unsubscribe = subscribeRealtime((message) => {
+            if (message.type === 'state' || message.type === 'snapshot') {
+                applyState(message.state);
+            }
+        });
+
+        return () => {
+            clearInterval(interval);
+            unsubscribe();
+        };
     }, []);
 
     const isFlow = state === 'FLOW';
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { cn } from '@/lib/utils';
 import { api } from '@/lib/api';
+import { isRealtimeOpen, subscribeRealtime } from '@/lib/realtime';
 import type { Task } from '@/lib/api';
 import { Clock, Circle, Loader2, CheckCircle2 } from 'lucide-react';
 
@@ -21,8 +22,23 @@ export function TaskQueue() {
         };
 
         fetchQueue();
-        const interval = setInterval(fetchQueue, 5000);
-        return () => clearInterval(interval);
+
+        // Poll only while the realtime socket is down
+        const interval = setInterval(() => {
+            if (!isRealtimeOpen()) fetchQueue();
+        }, 5000);
+
+        // Refetch task details only when the queue actually changes
+        const unsubscribe = subscribeRealtime((message) => {
+            if (message.type === 'queue' || message.type === 'snapshot') {
+                fetchQueue();
+            }
+        });
+
+        return () => {
+            clearInterval(interval);
+            unsubscribe();
+        };
     }, []);
 
     if (isLoading) {
@@ -1,6 +1,10 @@
 "use client";
 
-import { useEffect, useRef, useCallback, useState } from "react";
+import { useEffect, useCallback, useState } from "react";
+import { isRealtimeOpen, LAST_EVENT_ID_KEY, subscribeRealtime } from "@/lib/realtime";
+
+const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000/api/v1";
+const FALLBACK_CHECK_MS = 5000;
 
 interface NotificationData {
     id: string;
@@ -17,7 +21,6 @@ interface NotificationData {
 
 interface UseNotificationsOptions {
     userId: string;
-    backendUrl?: string;
     onNotification?: (notification: NotificationData) => void;
     enabled?: boolean;
 }
@@ -30,7 +33,11 @@ interface UseNotificationsReturn {
 }
 
 /**
- * Hook for receiving browser notifications via SSE from the backend.
+ * Hook for receiving browser notifications from the backend.
+ * 
+ * Notifications arrive on the shared realtime WebSocket (see lib/realtime),
+ * which also carries queue and state updates. While that socket is down the
+ * hook falls back to the SSE stream, resuming from the last seen event ID.
  * 
  * Usage:
  * ```tsx
@@ -42,14 +49,12 @@ interface UseNotificationsReturn {
  */
 export function useNotifications({
     userId,
-    backendUrl = process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000",
     onNotification,
     enabled = true,
 }: UseNotificationsOptions): UseNotificationsReturn {
     const [isConnected, setIsConnected] = useState(false);
     const [hasPermission, setHasPermission] = useState(false);
     const [error, setError] = useState<string | null>(null);
-    const eventSourceRef = useRef<EventSource | null>(null);
 
     // Check initial permission state
     useEffect(() => {
@@ -120,67 +125,70 @@ export function useNotifications({
         }
     }, []);
 
-    // Connect to SSE endpoint
+    // Receive notifications over the shared realtime WebSocket
     useEffect(() => {
         if (!enabled || !userId) return;
 
-        const sseUrl = `${backendUrl}/api/v1/notifications/stream/${userId}`;
-
-        const connect = () => {
-            try {
-                // Hardcoded Dev User for now
-                const eventSource = new EventSource('http://localhost:8000/api/notifications/stream/dev-user-123');
-                eventSourceRef.current = eventSource;
-
-                eventSource.addEventListener("connected", (e) => {
-                    console.log("[Notifications] SSE connected:", JSON.parse(e.data));
-                    setIsConnected(true);
-                    setError(null);
-                });
+        setIsConnected(isRealtimeOpen());
 
-                eventSource.addEventListener("notification", (e) => {
-                    const data: NotificationData = JSON.parse(e.data);
-                    console.log("[Notifications] Received:", data);
+        const deliver = (data: NotificationData) => {
+            // Show browser notification
+            showNotification(data);
 
-                    // Show browser notification
-                    showNotification(data);
-
-                    // Call callback if provided
-                    onNotification?.(data);
-                });
+            // Call callback if provided
+            onNotification?.(data);
+        };
 
-                eventSource.addEventListener("ping", () => {
-                    // Keepalive, do nothing
-                });
+        // SSE fallback, open only while the realtime socket is down
+        let fallback: EventSource | null = null;
+        const checkFallback = () => {
+            if (isRealtimeOpen()) {
+                fallback?.close();
+                fallback = null;
+                return;
+            }
+            if (fallback) return;
+
+            const lastEventId = localStorage.getItem(LAST_EVENT_ID_KEY);
+            const resume = lastEventId ? `?last_event_id=${encodeURIComponent(lastEventId)}` : "";
+            fallback = new EventSource(`${API_BASE_URL}/notifications/stream/${userId}${resume}`);
+
+            const onEvent = (e: MessageEvent, batch: NotificationData[]) => {
+                if (e.lastEventId) localStorage.setItem(LAST_EVENT_ID_KEY, e.lastEventId);
+                batch.forEach(deliver);
+            };
+            fallback.addEventListener("notification", (e) => onEvent(e as MessageEvent, [JSON.parse((e as MessageEvent).data)]));
+            fallback.addEventListener("notifications", (e) => onEvent(e as MessageEvent, JSON.parse((e as MessageEvent).data)));
+        };
+        const interval = setInterval(checkFallback, FALLBACK_CHECK_MS);
 
-                eventSource.addEventListener("error", (e) => {
-                    console.error("[Notifications] SSE error:", e);
-                    setIsConnected(false);
-                    setError("Connection lost");
+        const unsubscribe = subscribeRealtime((message) => {
+            if (message.type === "closed") {
+                setIsConnected(false);
+                setError("Connection lost");
+                return;
+            }
 
-                    // Reconnect after 5 seconds
-                    setTimeout(connect, 5000);
-                });
+            if (message.type === "snapshot") {
+                setIsConnected(true);
+                setError(null);
+                return;
+            }
 
-                eventSource.onerror = () => {
-                    setIsConnected(false);
-                };
+            if (message.type !== "notifications") return;
 
-            } catch (err) {
-                console.error("[Notifications] Failed to connect:", err);
-                setError(err instanceof Error ? err.message : "Failed to connect");
+            console.log(`[Notifications] Received ${message.items.length}`);
+            for (const { data } of message.items as { data: NotificationData }[]) {
+                deliver(data);
             }
-        };
-
-        connect();
+        });
 
         return () => {
-            if (eventSourceRef.current) {
-                eventSourceRef.current.close();
-                eventSourceRef.current = null;
-            }
+            clearInterval(interval);
+            fallback?.close();
+            unsubscribe();
         };
-    }, [enabled, userId, backendUrl, showNotification, onNotification]);
+    }, [enabled, userId, showNotification, onNotification]);
 
     return {
         isConnected,
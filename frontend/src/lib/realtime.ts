@@ -0,0 +1,136 @@
+import { supabase } from '@/lib/supabase'
+
+const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api/v1';
+const WS_URL = API_BASE_URL.replace(/^http/, 'ws') + '/ws';
+export const LAST_EVENT_ID_KEY = 'deepflow:notifications:lastEventId';
+const RECONNECT_DELAY_MS = 5000;
+
+// --- Message Types ---
+
+export interface QueueEntry {
+    task_id: string;
+    score: number;
+}
+
+export interface SnapshotMessage {
+    type: 'snapshot';
+    state: 'FLOW' | 'IDLE' | 'SHALLOW';
+    queue: QueueEntry[];
+    current_task_id: string | null;
+    total_count: number;
+}
+
+export interface QueueMessage {
+    type: 'queue';
+    added: QueueEntry[];
+    removed: string[];
+    reordered: QueueEntry[];
+    current_task_id?: string | null;
+}
+
+export interface StateMessage {
+    type: 'state';
+    state: 'FLOW' | 'IDLE' | 'SHALLOW';
+}
+
+export interface NotificationsMessage {
+    type: 'notifications';
+    items: { id: string; data: any }[];
+}
+
+// Emitted locally when the socket drops (before the automatic reconnect)
+export interface ClosedMessage {
+    type: 'closed';
+}
+
+export type RealtimeMessage = SnapshotMessage | QueueMessage | StateMessage | NotificationsMessage | ClosedMessage;
+
+type Listener = (message: RealtimeMessage) => void;
+
+// One socket per tab, shared by every subscriber
+const listeners = new Set<Listener>();
+let socket: WebSocket | null = null;
+// True once the current socket delivered its snapshot (live updates flowing)
+let live = false;
+let connecting = false;
+let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+
+async function getToken(): Promise<string | undefined> {
+    const { data } = await supabase.auth.getSession();
+    return data.session?.access_token || localStorage.getItem('deepflow_token') || undefined;
+}
+
+async function connect() {
+    if (connecting || socket) return;
+    connecting = true;
+    let token: string | undefined;
+    try {
+        token = await getToken();
+    } finally {
+        connecting = false;
+    }
+    if (!token || listeners.size === 0) return;
+
+    const params = new URLSearchParams({ token });
+    const lastEventId = localStorage.getItem(LAST_EVENT_ID_KEY);
+    if (lastEventId) params.set('last_event_id', lastEventId);
+
+    const ws = new WebSocket(`${WS_URL}?${params}`);
+    socket = ws;
+
+    ws.onmessage = (e) => {
+        const message = JSON.parse(e.data);
+        if (message.type === 'ping') return;
+        if (message.type === 'snapshot') live = true;
+
+        if (message.type === 'notifications' && message.items.length) {
+            localStorage.setItem(LAST_EVENT_ID_KEY, message.items[message.items.length - 1].id);
+        }
+        listeners.forEach((listener) => listener(message));
+    };
+
+    ws.onclose = () => {
+        if (socket === ws) {
+            socket = null;
+            live = false;
+        }
+        listeners.forEach((listener) => listener({ type: 'closed' }));
+        if (listeners.size > 0 && !reconnectTimer) {
+            reconnectTimer = setTimeout(() => {
+                reconnectTimer = null;
+                connect();
+            }, RECONNECT_DELAY_MS);
+        }
+    };
+}
+
+/**
+ * Whether live updates are flowing. While false (connecting, or the server
+ * closed the socket because realtime updates are unavailable), components
+ * fall back to polling the REST endpoints.
+ */
+export function isRealtimeOpen(): boolean {
+    return live && socket?.readyState === WebSocket.OPEN;
+}
+
+/**
+ * Subscribe to the shared realtime socket. Opens it on first use and
+ * closes it when the last subscriber leaves.
+ *
+ * Returns an unsubscribe function.
+ */
+export function subscribeRealtime(listener: Listener): () => void {
+    listeners.add(listener);
+    if (!reconnectTimer) connect();
+
+    return () => {
+        listeners.delete(listener);
+        if (listeners.size === 0) {
+            if (reconnectTimer) clearTimeout(reconnectTimer);
+            reconnectTimer = null;
+            socket?.close();
+            socket = null;
+            live = false;
+        }
+    };
+}